@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# /api/events/stream/ (SSE) и /api/events/ws/ (WebSocket) — push-события заказов,
+# остальное обслуживает Django (api/realtime.py)
+from api.realtime import EventsRouter  # noqa: E402
+
+application = EventsRouter(django_application)
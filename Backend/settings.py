@@ -1,3 +1,4 @@
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -36,12 +37,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Должно идти первым
     'django.middleware.security.SecurityMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.db_router.DatabaseRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'Backend.urls'
@@ -64,13 +67,55 @@ TEMPLATES = [
 WSGI_APPLICATION = 'Backend.wsgi.application'
 
 # Database
+# Режим журнала хранится в самом файле базы, поэтому не входит в PRAGMA
+# соединения: его включают один раз при развёртывании командой
+# sqlite_journal_mode. В WAL читатели не мешают писателю и наоборот.
+SQLITE_JOURNAL_MODE = 'WAL'
+
+# PRAGMA для каждого соединения с SQLite (api/sqlite.py)
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',        # в режиме WAL без риска повредить базу
+    'busy_timeout': 5000,           # мс ожидания чужой блокировки вместо ошибки
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,           # 20 МБ страничного кэша
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # блокировка на запись берётся в начале транзакции — без взаимоблокировок писателей
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Копия для чтения: обновляется командой refresh_read_replica
+    # (или укажите здесь настоящую реплику)
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+    },
 }
 
+# list/retrieve читают из DATABASE_READ_ALIAS, запись — в default (api/db_router.py).
+# None — всё читается из default.
+DATABASE_ROUTERS = ['api.db_router.ReadReplicaRouter']
+DATABASE_READ_ALIAS = None
+# Сколько секунд после записи пользователь читает только из default
+READ_REPLICA_PIN_SECONDS = 5
+
+# Повтор транзакций при «database is locked»: попытки и экспоненциальная задержка, с
+SQLITE_LOCK_RETRIES = 5
+SQLITE_LOCK_BACKOFF = 0.05
+SQLITE_LOCK_BACKOFF_MAX = 1.0
+
+# Групповой коммит мелких записей (корзина, избранное) — api/group_commit.py
+SQLITE_GROUP_COMMIT = False
+GROUP_COMMIT_WINDOW = 0.0
+GROUP_COMMIT_MAX_BATCH = 64
+
 # Custom user model
 AUTH_USER_MODEL = 'api.User'
 
@@ -96,12 +141,84 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Новые загрузки именуются SHA-256 содержимого (api/storage.py): дубликаты не
+# хранятся повторно, а файлы отдаются с вечным кэшем (api/media.py)
+STORAGES = {
+    'default': {'BACKEND': 'api.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Отдача медиа фронтовым прокси: None — сам Django,
+# 'nginx' — X-Accel-Redirect на MEDIA_ACCEL_PREFIX (internal location),
+# 'sendfile' — X-Sendfile с абсолютным путём (Apache/lighttpd)
+MEDIA_ACCEL_REDIRECT = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Обработка фото блюд (api/images.py): в фоне, в пуле из IMAGE_WORKERS потоков
+IMAGE_PROCESSING_ASYNC = True
+IMAGE_WORKERS = 2
+
+# Кэш. LocMemCache живёт в памяти процесса; для нескольких воркеров
+# лучше общий бэкенд (Redis/Memcached), ключи от этого не меняются.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'backend-default',
+    }
+}
+
+# Кэш готовых ответов меню повара (api/menu_cache.py)
+MENU_CACHE_ENABLED = True
+MENU_CACHE_TIMEOUT = 300
+
+# Кэш аутентификации по токену: размер LRU и время жизни записи, сек
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_TTL = 60
+
+# Подписанные токены (api/tokens.py): время жизни access и refresh, сек
+SIGNED_ACCESS_TOKEN_TTL = 300
+SIGNED_REFRESH_TOKEN_TTL = 14 * 24 * 3600
+
+# Брокер push-событий заказов (api/events.py): InMemoryBroker — один процесс,
+# SQLiteBroker — общий файл EVENTS_SQLITE_PATH для нескольких воркеров
+EVENTS_BROKER = 'api.events.InMemoryBroker'
+EVENTS_SQLITE_PATH = BASE_DIR / 'events.sqlite3'
+
+# Лента изменений заказов GET /api/orders/changes/ (api/changes.py):
+# максимальное ожидание, интервал проверки счётчика и размер порции.
+# Ожидающий запрос занимает поток WSGI-воркера, поэтому одновременно ждут
+# не больше ORDER_CHANGES_MAX_WAITERS запросов на процесс — остальным
+# отвечают сразу. Держите значение заметно меньше числа потоков воркера.
+ORDER_CHANGES_MAX_WAIT = 25
+ORDER_CHANGES_POLL_INTERVAL = 0.5
+ORDER_CHANGES_PAGE_SIZE = 200
+ORDER_CHANGES_MAX_WAITERS = 4
+
+# Сколько ближайших заказов показывать на панели повара GET /api/cooks/me/dashboard/
+COOK_DASHBOARD_NEXT_ORDERS = 5
+
+# Выгрузка заказов GET /api/orders/export/ (api/export.py): строк на чтение из курсора и на пачку ответа
+ORDER_EXPORT_CHUNK_SIZE = 2000
+
+# Сжатие ответов (api/compression.py): минимальный размер тела, байт; уровни gzip
+# и Brotli (Brotli — если установлен пакет brotli); сколько хранить сжатые тела в кэше, сек
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_CACHE_TIMEOUT = 300
+
+# Списки блюд, заказов и корзины собираются из values_list() без ModelSerializer (api/read_serializers.py)
+FAST_READ_SERIALIZERS = True
+
 # CORS
 CORS_ORIGIN_ALLOW_ALL = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # Authorization: Bearer <access> — подписанные токены без запросов к базе (api/tokens.py)
+        'api.authentication.SignedTokenAuthentication',
+        # TokenAuthentication с кэшем token -> user (api/authentication.py)
+        'api.authentication.CachedTokenAuthentication',
         # Если нужны сессии в браузере, раскомментируйте:
         # 'rest_framework.authentication.SessionAuthentication',
     ],
@@ -111,9 +228,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # тот же JSON, что у JSONRenderer, но через orjson (api/renderers.py)
+        'api.renderers.FastJSONRenderer',
+        # Accept: application/msgpack — для мобильных клиентов, если установлен msgpack
+        *(['api.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        # только в DEBUG или для админа — см. DEFAULT_CONTENT_NEGOTIATION_CLASS
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'api.renderers.BrowsableAPINegotiation',
+    # выпадающие списки в формах браузерного API (например, все повара) — не длиннее
+    'HTML_SELECT_CUTOFF': 100,
     'DEFAULT_CHARSET': 'utf-8',
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
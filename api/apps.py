@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _ensure_search_index(sender, using, **kwargs):
+    from .search import ensure_index
+    ensure_index(using)
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # миграции, пересоздающие api_dish, теряют триггеры FTS — восстанавливаем
+        post_migrate.connect(_ensure_search_index, sender=self)
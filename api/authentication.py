@@ -0,0 +1,180 @@
+"""
+Аутентификация API.
+
+CachedTokenAuthentication — TokenAuthentication с кэшем token -> user в памяти процесса.
+SignedTokenAuthentication — подписанные access-токены (api/tokens.py) без запросов к базе.
+
+Стандартный TokenAuthentication на каждый запрос делает SELECT по
+authtoken_token JOIN api_user. Здесь результат хранится в LRU ограниченного
+размера (TOKEN_AUTH_CACHE_SIZE) не дольше TOKEN_AUTH_CACHE_TTL секунд.
+
+Сигналы (api/signals.py) сбрасывают записи при удалении токена и при любом
+сохранении или удалении пользователя (смена роли, is_active, пароля).
+Сброс действует в текущем процессе; другие воркеры увидят изменения не
+позже чем через TTL.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+
+from . import tokens
+
+
+class TokenCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, user, token)
+        self._by_user = {}             # user_id -> {key, ...}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        keys = self._by_user.get(entry[1].pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry[1].pk]
+        return True
+
+    def invalidate_key(self, key):
+        with self._lock:
+            if self._remove(key):
+                self.invalidations += 1
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                # каждое попадание — сэкономленный запрос к базе
+                'db_lookups_saved': self.hits,
+                'hit_ratio': round(self.hits / total, 4) if total else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            user, token = cached
+            # копия, чтобы запросы не делили состояние одного экземпляра модели
+            return copy.copy(user), token
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return copy.copy(user), token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Заголовок `Authorization: Bearer <access>` с подписанным токеном (api/tokens.py).
+
+    Пользователь не читается из базы: request.user — экземпляр User, в котором
+    заполнены только id и role, остальные поля отложены (deferred) и
+    подгружаются по одному запросу на поле. Поэтому IsAdmin/IsCook/IsCustomer и
+    фильтры вида filter(customer=request.user) обходятся без запросов, а
+    представления, которым нужен весь пользователь (users/me), получают его
+    одним запросом через load_user().
+
+    is_active здесь не проверяется: отключённый пользователь сохраняет доступ
+    до истечения уже выданного access-токена (SIGNED_ACCESS_TOKEN_TTL), но
+    обновить пару не сможет — tokens.rotate() отказывает неактивным.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Неверный заголовок авторизации.')
+        try:
+            user_id, role = tokens.read_access(auth[1].decode())
+        except (tokens.InvalidToken, UnicodeError):
+            raise exceptions.AuthenticationFailed('Токен недействителен или истёк.')
+
+        User = get_user_model()
+        user = User.from_db(router.db_for_read(User), ['id', 'role'], [user_id, role])
+        return user, auth[1].decode()
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+def load_user(user, queryset=None):
+    """
+    Полный экземпляр пользователя вместо заглушки SignedTokenAuthentication —
+    одним запросом вместо отдельного SELECT на каждое отложенное поле.
+    Отключённый или удалённый пользователь — AuthenticationFailed.
+    """
+    if not user.get_deferred_fields():
+        return user
+    if queryset is None:
+        queryset = get_user_model().objects.all()
+    loaded = queryset.filter(pk=user.pk, is_active=True).first()
+    if loaded is None:
+        raise exceptions.AuthenticationFailed('Пользователь отключён или удалён.')
+    return loaded
@@ -0,0 +1,127 @@
+"""
+Лента изменений заказов: GET /api/orders/changes/?since=<cursor>.
+
+Курсор — номер из ChangeSequence. Каждое сохранение Order и OrderItem
+(в том числе смена статуса позиции) получает новый change_seq, поэтому
+выборка «всё, что изменилось после курсора» идёт по индексам
+(cook|customer, change_seq) и не зависит от общего числа заказов.
+
+Если изменений нет, запрос ждёт до `wait` секунд, раз в POLL_INTERVAL
+читая только строку счётчика (поиск по первичному ключу). Удалённые заказы
+в ленту не попадают.
+
+Ожидание синхронное: всё это время запрос держит поток WSGI-воркера. Поэтому
+ждать одновременно могут не больше ORDER_CHANGES_MAX_WAITERS запросов на
+процесс, остальные получают ответ сразу (как с wait=0) и повторяют опрос
+сами. Клиентам, которым нужны мгновенные уведомления, подходит push-канал
+на ASGI (api/realtime.py) — там ожидание не занимает поток.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .models import ChangeSequence, Order, OrderItem
+
+
+def max_wait():
+    return getattr(settings, 'ORDER_CHANGES_MAX_WAIT', 25)
+
+
+def poll_interval():
+    return getattr(settings, 'ORDER_CHANGES_POLL_INTERVAL', 0.5)
+
+
+def page_size():
+    return getattr(settings, 'ORDER_CHANGES_PAGE_SIZE', 200)
+
+
+def max_waiters():
+    return getattr(settings, 'ORDER_CHANGES_MAX_WAITERS', 4)
+
+
+_waiters_lock = threading.Lock()
+_waiters = 0
+
+
+@contextmanager
+def wait_slot():
+    """Место для ожидания изменений: True, если занято, False — все места заняты."""
+    global _waiters
+    with _waiters_lock:
+        granted = _waiters < max_waiters()
+        if granted:
+            _waiters += 1
+    try:
+        yield granted
+    finally:
+        if granted:
+            with _waiters_lock:
+                _waiters -= 1
+
+
+def visible_orders(user, queryset=None):
+    queryset = Order.objects.all() if queryset is None else queryset
+    if user.role == 'admin':
+        return queryset
+    if user.role == 'cook':
+        return queryset.filter(cook=user)
+    if user.role == 'customer':
+        return queryset.filter(customer=user)
+    return queryset.none()
+
+
+def visible_items(user, queryset=None):
+    queryset = OrderItem.objects.all() if queryset is None else queryset
+    if user.role == 'admin':
+        return queryset
+    if user.role == 'cook':
+        return queryset.filter(order__cook=user)
+    if user.role == 'customer':
+        return queryset.filter(order__customer=user)
+    return queryset.none()
+
+
+def fetch(orders, items, since, head, limit):
+    """
+    Изменения в (since, head]. Возвращает (orders, items, cursor).
+    Если записей больше limit, курсор ставится на последний отданный номер,
+    и клиент сразу дочитывает остаток следующим запросом.
+    """
+    window = {'change_seq__gt': since, 'change_seq__lte': head}
+    orders = list(orders.filter(**window).order_by('change_seq')[:limit + 1])
+    items = list(items.filter(**window).order_by('change_seq')[:limit + 1])
+
+    cursor = head
+    for rows in (orders, items):
+        if len(rows) > limit:
+            cursor = min(cursor, rows[limit - 1].change_seq)
+    orders = [order for order in orders if order.change_seq <= cursor]
+    items = [item for item in items if item.change_seq <= cursor]
+    return orders, items, cursor
+
+
+def wait_for_changes(user, since, wait, orders=None, items=None):
+    """
+    Ждёт изменений, видимых пользователю, не дольше wait секунд.
+    Возвращает (orders, items, cursor); при таймауте списки пустые.
+    """
+    orders = visible_orders(user, orders)
+    items = visible_items(user, items)
+    deadline = time.monotonic() + wait
+    while True:
+        # всё с номером <= head уже закоммичено (см. ChangeSequence)
+        head = ChangeSequence.current()
+        # курсор из будущего (например, база пересоздана) — начинаем с текущего номера
+        since = min(since, head)
+        if head > since:
+            found_orders, found_items, cursor = fetch(orders, items, since, head, page_size())
+            if found_orders or found_items:
+                return found_orders, found_items, cursor
+            # изменения были, но чужие — двигаем курсор, чтобы не перечитывать их
+            since = cursor
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return [], [], since
+        time.sleep(min(poll_interval(), remaining))
@@ -0,0 +1,141 @@
+"""
+Сжатие ответов API: Brotli (если установлен пакет brotli) или gzip.
+
+Сжимаются только GET/HEAD-ответы 200 не меньше COMPRESSION_MIN_SIZE байт с
+типом из COMPRESSIBLE_TYPES. Потоковые ответы (выгрузка заказов, SSE, медиа)
+не трогаются: их пачки должны уходить клиенту сразу. Ответы на POST (выдача
+токенов и т. п.) не сжимаются — секрет в сжатом теле открыт для BREACH.
+
+Если представление пометило ответ ключом compression_cache_key (кэш меню,
+api/menu_cache.py), сжатое тело кладётся в кэш под этим ключом и при
+следующем таком же ответе берётся оттуда без повторного сжатия. Ключ должен
+однозначно задавать тело: у меню это ключ уже закэшированных данных, а ETag
+условных GET для этого не годится. Кэшируются только типы из CACHEABLE_TYPES: их тело
+определяется одними данными. HTML браузерного API содержит имя пользователя
+и CSRF-токен и сжимается каждый раз заново.
+"""
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/msgpack',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+
+# тело зависит только от данных, а не от того, кто и как его запросил
+CACHEABLE_TYPES = ('application/json', 'application/msgpack')
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с q > 0; '*' раскрывается в br и gzip."""
+    accepted = set()
+    refused = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        (accepted if quality > 0 else refused).add(coding)
+    if '*' in accepted:
+        accepted |= {'br', 'gzip'} - refused
+    return accepted
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+    # mtime=0: одинаковое тело — одинаковые байты
+    return gzip.compress(body, compresslevel=getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+
+
+def _media_type(response):
+    return response.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def is_compressible(response):
+    content_type = _media_type(response)
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+def _cached_compress(key, body, encoding):
+    # длина тела в записи — защита от ключа, который не определяет тело однозначно
+    entry = cache.get(key)
+    if entry is not None and entry[0] == len(body):
+        return entry[1]
+    compressed = compress(body, encoding)
+    cache.set(key, (len(body), compressed), getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 300))
+    return compressed
+
+
+class CompressionMiddleware:
+    """Ставится в MIDDLEWARE сразу после SecurityMiddleware — сжимает готовое тело последним."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            request.method not in ('GET', 'HEAD')
+            or response.streaming
+            or response.status_code != 200
+            or response.has_header('Content-Encoding')
+            or not is_compressible(response)
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        body = response.content
+        key = getattr(response, 'compression_cache_key', None)
+        media_type = _media_type(response)
+        if key and media_type in CACHEABLE_TYPES:
+            compressed = _cached_compress(f'compressed:{encoding}:{media_type}:{key}', body, encoding)
+        else:
+            compressed = compress(body, encoding)
+        if len(compressed) >= len(body):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # тело другое, смысл тот же: сильный ETag становится слабым (как в GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
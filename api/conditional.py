@@ -0,0 +1,94 @@
+"""
+Условные GET (ETag / Last-Modified -> 304) по маркерам версий.
+
+ETag строится из токенов маркеров (api/versions.py), URL запроса, Accept и
+пользователя — без выборки данных и без сериализации. Если клиент прислал
+совпадающий If-None-Match (или If-Modified-Since не старше маркеров),
+ответ 304 отдаётся сразу.
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from . import versions
+
+
+def make_etag(request, markers):
+    user = getattr(request, 'user', None)
+    parts = [
+        request.build_absolute_uri(),
+        request.META.get('HTTP_ACCEPT', ''),
+        str(getattr(user, 'pk', '') or ''),
+    ]
+    parts.extend(f'{key}={token}' for key, (token, _) in sorted(markers.items()))
+    return '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def _last_modified(markers):
+    stamps = [updated_at for _, updated_at in markers.values() if updated_at is not None]
+    if len(stamps) != len(markers):
+        return None
+    return max(stamps)
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # слабое сравнение: сжатый ответ уходит с W/-версией того же ETag (api/compression.py)
+        return etag in (tag.removeprefix('W/') for tag in parse_etags(if_none_match))
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    if if_modified_since is not None and last_modified is not None:
+        return int(last_modified.timestamp()) <= if_modified_since
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # клиент обязан перепроверять ответ, а общие кэши не должны его хранить
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Accept', 'Authorization'))
+    return response
+
+
+def conditional_response(request, keys, build):
+    """
+    Отдаёт 304 по маркерам `keys` или вызывает build() и ставит ETag на ответ.
+    """
+    markers = versions.get(*keys)
+    # маркеры пригодятся дальше по цепочке (например, для ключа кэша меню)
+    request.version_markers = markers
+    etag = make_etag(request, markers)
+    last_modified = _last_modified(markers)
+    if _not_modified(request, etag, last_modified):
+        return _set_validators(HttpResponseNotModified(), etag, last_modified)
+    response = build()
+    if response.status_code == 200:
+        # ETag не ставится ключом кэша сжатых тел (api/compression.py): маркеры не
+        # обязаны покрывать каждое выводимое поле, и устаревшее тело ушло бы и на обычный GET
+        _set_validators(response, etag, last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Добавляет условные GET к list/retrieve ViewSet-а.
+    Наследник определяет get_version_keys() — список ключей маркеров.
+    """
+
+    def get_version_keys(self):
+        raise NotImplementedError(
+            f'{type(self).__name__} должен определить get_version_keys() — '
+            'список ключей маркеров версий (api/versions.py).'
+        )
+
+    def list(self, request, *args, **kwargs):
+        parent = super().list
+        return conditional_response(request, self.get_version_keys(), lambda: parent(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        parent = super().retrieve
+        return conditional_response(request, self.get_version_keys(), lambda: parent(request, *args, **kwargs))
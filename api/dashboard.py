@@ -0,0 +1,124 @@
+"""
+Панель повара: GET /api/cooks/me/dashboard/.
+
+Число новых, принятых и готовящихся заказов хранится в CookOrderCounters и
+меняется при каждом переходе статуса в той же транзакции, что и сам заказ:
+сигналы на save()/delete() (api/signals.py) и явный вызов on_orders_created()
+после bulk_create при оформлении корзины. Выручка за сегодня — строка
+CookDailyStats за текущий день (api/rollups.py). Поэтому панель читает две
+строки по ключу и несколько ближайших заказов, а не пересчитывает все заказы.
+
+Изменения в обход save() (queryset.update) счётчики не видят — их
+пересобирает команда rebuild_rollups.
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from .kitchen import OPEN_ORDER_STATUSES
+from .models import CookDailyStats, CookOrderCounters, Order
+
+# имена полей CookOrderCounters совпадают со статусами
+COUNTED_STATUSES = OPEN_ORDER_STATUSES
+
+
+def _apply(deltas_by_cook):
+    """
+    Прибавляет к счётчикам {cook_id: {статус: дельта}}. Два запроса на любое
+    число поваров: INSERT OR IGNORE недостающих строк и один UPDATE с CASE.
+    """
+    deltas_by_cook = {
+        cook_id: {name: delta for name, delta in deltas.items() if delta}
+        for cook_id, deltas in deltas_by_cook.items()
+    }
+    deltas_by_cook = {cook_id: deltas for cook_id, deltas in deltas_by_cook.items() if deltas}
+    if not deltas_by_cook:
+        return
+    CookOrderCounters.objects.bulk_create(
+        [CookOrderCounters(cook_id=cook_id) for cook_id in deltas_by_cook],
+        ignore_conflicts=True,
+    )
+    changes = {}
+    for name in COUNTED_STATUSES:
+        whens = [
+            When(cook_id=cook_id, then=Value(deltas[name]))
+            for cook_id, deltas in deltas_by_cook.items() if name in deltas
+        ]
+        if whens:
+            changes[name] = F(name) + Case(*whens, default=Value(0))
+    CookOrderCounters.objects.filter(cook_id__in=list(deltas_by_cook)).update(**changes)
+
+
+def on_order_saved(order, previous_status):
+    if order.status == previous_status:
+        return
+    deltas = Counter()
+    if previous_status in COUNTED_STATUSES:
+        deltas[previous_status] -= 1
+    if order.status in COUNTED_STATUSES:
+        deltas[order.status] += 1
+    _apply({order.cook_id: deltas})
+
+
+def on_order_deleted(order):
+    if order._loaded_status in COUNTED_STATUSES:
+        _apply({order.cook_id: {order._loaded_status: -1}})
+
+
+def on_orders_created(orders):
+    """Для заказов, вставленных bulk_create: сигналы не приходят, число запросов не зависит от числа заказов."""
+    by_cook = defaultdict(Counter)
+    for order in orders:
+        if order.status in COUNTED_STATUSES:
+            by_cook[order.cook_id][order.status] += 1
+    _apply(by_cook)
+
+
+def rebuild():
+    """Пересчитывает счётчики всех поваров по заказам. Возвращает число строк."""
+    rows = (
+        Order.objects.filter(status__in=COUNTED_STATUSES).values('cook_id')
+        .annotate(**{f'{name}_count': Count('id', filter=Q(status=name)) for name in COUNTED_STATUSES})
+        .order_by()
+    )
+    with transaction.atomic():
+        CookOrderCounters.objects.all().delete()
+        created = CookOrderCounters.objects.bulk_create(
+            CookOrderCounters(cook_id=row['cook_id'], **{name: row[f'{name}_count'] for name in COUNTED_STATUSES})
+            for row in rows
+        )
+    return len(created)
+
+
+def next_orders(cook, limit=None):
+    """Ближайшие открытые заказы по желаемому времени готовности; без времени — в конце."""
+    if limit is None:
+        limit = getattr(settings, 'COOK_DASHBOARD_NEXT_ORDERS', 5)
+    return (
+        Order.objects.filter(cook=cook, status__in=COUNTED_STATUSES)
+        .order_by(F('desired_ready_time').asc(nulls_last=True), 'created_at', 'id')
+        .values('id', 'customer_id', 'status', 'desired_ready_time', 'created_at')[:limit]
+    )
+
+
+def summary(cook):
+    counters = (
+        CookOrderCounters.objects.filter(cook_id=cook.id).values(*COUNTED_STATUSES).first()
+        or dict.fromkeys(COUNTED_STATUSES, 0)
+    )
+    today = (
+        CookDailyStats.objects.filter(cook_id=cook.id, day=timezone.localdate())
+        .values('orders', 'items', 'revenue').first()
+        or {'orders': 0, 'items': 0, 'revenue': Decimal('0')}
+    )
+    return {
+        **counters,
+        'today_orders': today['orders'],
+        'today_items': today['items'],
+        'today_revenue': today['revenue'],
+        'next_orders': list(next_orders(cook)),
+    }
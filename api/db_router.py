@@ -0,0 +1,114 @@
+"""
+Чтение из реплики, запись — в основную базу.
+
+Алиас для чтения задаётся settings.DATABASE_READ_ALIAS (например, 'replica' —
+копия db.sqlite3, которую обновляет команда refresh_read_replica, или
+настоящая реплика). Если он не задан, весь трафик идёт в default.
+
+В реплику уходят только чтения из действий list/retrieve вьюсетов с
+ReplicaReadMixin; аутентификация и проверка прав выполняются раньше и читают
+основную базу. Чтение «после записи» закреплено за default:
+
+- в пределах запроса — после первой записи все чтения идут в default;
+- между запросами — пользователь, который что-то записал, ещё
+  READ_REPLICA_PIN_SECONDS секунд читает из default (метка в кэше ставится
+  DatabaseRoutingMiddleware).
+
+Вне HTTP-запросов (команды, фоновые потоки) всё читается из default.
+"""
+import contextvars
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = False
+        self.wrote = False
+
+
+def read_alias():
+    alias = getattr(settings, 'DATABASE_READ_ALIAS', None)
+    if alias and alias != DEFAULT_DB_ALIAS and alias in settings.DATABASES:
+        return alias
+    return None
+
+
+def use_replica():
+    """Разрешает чтение из реплики до конца текущего запроса."""
+    state = _state.get()
+    if state is not None and read_alias():
+        state.replica = True
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin(user):
+    timeout = getattr(settings, 'READ_REPLICA_PIN_SECONDS', 5)
+    if user is not None and user.is_authenticated and timeout > 0:
+        cache.set(_pin_key(user.pk), 1, timeout)
+
+
+def is_pinned(user):
+    return user is not None and user.is_authenticated and cache.get(_pin_key(user.pk)) is not None
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.wrote:
+            return None
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплика — копия default: объекты из обеих баз можно связывать
+        same_data = {DEFAULT_DB_ALIAS, read_alias()}
+        if obj1._state.db in same_data and obj2._state.db in same_data:
+            return True
+        return None
+
+
+class DatabaseRoutingMiddleware:
+    """Открывает область маршрутизации на запрос и закрепляет писавших за default."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            # DRF записывает аутентифицированного пользователя и в HttpRequest
+            pin(getattr(request, 'user', None))
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Вьюсет читает из реплики в действиях replica_actions, если пользователь
+    недавно ничего не записывал.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and not is_pinned(request.user):
+            use_replica()
@@ -0,0 +1,213 @@
+"""
+События заказов для push-канала (api/realtime.py).
+
+Сигналы (api/signals.py) после коммита транзакции публикуют события в каналы
+`user:<id>` заказчика и повара. Доставка — через брокер, выбранный в
+settings.EVENTS_BROKER:
+
+- InMemoryBroker — в пределах одного процесса (dev, один воркер);
+- SQLiteBroker   — через общий файл SQLite (EVENTS_SQLITE_PATH), поэтому
+  события, опубликованные любым процессом, видят подписчики всех процессов.
+
+У каждого события есть возрастающий id: клиент может переподключиться с
+Last-Event-ID и получить пропущенное (в пределах буфера/срока хранения).
+"""
+import asyncio
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class Broker(ABC):
+    @abstractmethod
+    def publish(self, channels, event):
+        """Публикует событие (dict) в каналы. Вызывается из синхронного кода."""
+
+    @abstractmethod
+    def subscribe(self, channels, last_id=None):
+        """Асинхронный генератор (id, event) для указанных каналов (в наследнике — async def с yield)."""
+
+
+class InMemoryBroker(Broker):
+    def __init__(self, buffer_size=1000):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._buffer = deque(maxlen=buffer_size)   # (id, channel, event) для Last-Event-ID
+        self._subscribers = set()                  # (loop, queue, channels)
+
+    def publish(self, channels, event):
+        with self._lock:
+            event_id = next(self._ids)
+            for channel in channels:
+                self._buffer.append((event_id, channel, event))
+            subscribers = list(self._subscribers)
+        for loop, queue, subscribed in subscribers:
+            if subscribed.intersection(channels):
+                # подписчики живут в цикле событий ASGI, публикация — в потоке Django
+                loop.call_soon_threadsafe(queue.put_nowait, (event_id, event))
+        return event_id
+
+    async def subscribe(self, channels, last_id=None):
+        channels = frozenset(channels)
+        queue = asyncio.Queue()
+        entry = (asyncio.get_running_loop(), queue, channels)
+        with self._lock:
+            backlog = []
+            if last_id is not None:
+                seen = set()
+                for event_id, channel, event in self._buffer:
+                    if event_id > last_id and channel in channels and event_id not in seen:
+                        seen.add(event_id)
+                        backlog.append((event_id, event))
+            self._subscribers.add(entry)
+        try:
+            for item in backlog:
+                yield item
+            while True:
+                yield await queue.get()
+        finally:
+            with self._lock:
+                self._subscribers.discard(entry)
+
+
+class SQLiteBroker(Broker):
+    """
+    События пишутся в отдельный файл SQLite (WAL): таблица events и связь
+    event_channels. Подписчики опрашивают её каждые poll_interval секунд по
+    индексу (channel, event_id). События старше retention секунд удаляются.
+    """
+
+    def __init__(self, path=None, poll_interval=0.25, retention=3600):
+        self.path = str(path or settings.EVENTS_SQLITE_PATH)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        self._last_prune = 0.0
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS events ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' payload TEXT NOT NULL,'
+            ' created REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS event_channels ('
+            ' channel TEXT NOT NULL,'
+            ' event_id INTEGER NOT NULL REFERENCES events (id) ON DELETE CASCADE,'
+            ' PRIMARY KEY (channel, event_id)) WITHOUT ROWID'
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def publish(self, channels, event):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            event_id = conn.execute(
+                'INSERT INTO events (payload, created) VALUES (?, ?)',
+                (json.dumps(event, ensure_ascii=False), now),
+            ).lastrowid
+            conn.executemany(
+                'INSERT INTO event_channels (channel, event_id) VALUES (?, ?)',
+                [(channel, event_id) for channel in channels],
+            )
+            if now - self._last_prune > 60:
+                conn.execute('DELETE FROM events WHERE created < ?', (now - self.retention,))
+                self._last_prune = now
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return event_id
+
+    def _fetch(self, channels, after):
+        placeholders = ','.join('?' * len(channels))
+        return self._connect().execute(
+            'SELECT DISTINCT e.id, e.payload FROM event_channels c'
+            ' JOIN events e ON e.id = c.event_id'
+            f' WHERE c.channel IN ({placeholders}) AND c.event_id > ?'
+            ' ORDER BY e.id',
+            [*channels, after],
+        ).fetchall()
+
+    def _last_id(self):
+        return self._connect().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+    async def subscribe(self, channels, last_id=None):
+        channels = sorted(set(channels))
+        after = last_id if last_id is not None else await asyncio.to_thread(self._last_id)
+        while True:
+            rows = await asyncio.to_thread(self._fetch, channels, after)
+            for event_id, payload in rows:
+                after = event_id
+                yield event_id, json.loads(payload)
+            await asyncio.sleep(self.poll_interval)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(settings, 'EVENTS_BROKER', 'api.events.InMemoryBroker')
+            _broker = import_string(path)()
+        return _broker
+
+
+def set_broker(broker):
+    """Подменяет брокер (тесты, ручная настройка)."""
+    global _broker
+    with _broker_lock:
+        _broker = broker
+
+
+def publish(user_ids, event):
+    channels = sorted({user_channel(user_id) for user_id in user_ids})
+    return get_broker().publish(channels, event)
+
+
+def publish_on_commit(user_ids, event):
+    # подписчик не должен увидеть событие раньше, чем данные станут видны в базе;
+    # сбой доставки не должен ломать сам запрос
+    transaction.on_commit(lambda: publish(user_ids, event), robust=True)
+
+
+_datetime = serializers.DateTimeField()
+
+
+def publish_order(order, event_type):
+    ready_time = order.desired_ready_time
+    publish_on_commit([order.customer_id, order.cook_id], {
+        'type': event_type,
+        'order_id': order.id,
+        'cook_id': order.cook_id,
+        'customer_id': order.customer_id,
+        'status': order.status,
+        'rejection_reason': order.rejection_reason,
+        'desired_ready_time': _datetime.to_representation(ready_time) if ready_time else None,
+    })
@@ -0,0 +1,202 @@
+"""
+Выгрузка заказов для бухгалтерии: GET /api/orders/export/?format=csv|jsonl.
+
+Фильтры: date_from/date_to (дата создания, включительно), status=a,b, cook_id.
+CSV — строка на позицию заказа (заказ без позиций — одна строка с пустыми
+полями позиции), JSONL — строка на заказ с вложенными позициями. Цена —
+текущая цена блюда: отдельной цены в позиции нет.
+
+Ответ потоковый: заголовок уходит сразу, до запроса к базе; строки читаются
+одним запросом через курсор (QuerySet.iterator(chunk_size)) и отдаются
+пачками по ORDER_EXPORT_CHUNK_SIZE, поэтому память не растёт с объёмом
+выгрузки. Заказы идут по id (порядок rowid) — первой строке не предшествует
+сортировка всей таблицы.
+"""
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import renderers, serializers
+
+ORDER_FIELDS = (
+    'id', 'created_at', 'updated_at', 'completed_at', 'status',
+    'customer_id', 'customer__username', 'cook_id', 'cook__username', 'cook__address',
+    'desired_ready_time', 'rejection_reason',
+)
+ITEM_FIELDS = (
+    'orderitem__id', 'orderitem__dish_id', 'orderitem__dish__name', 'orderitem__dish__price',
+    'orderitem__quantity', 'orderitem__status',
+)
+CSV_HEADER = (
+    'order_id', 'created_at', 'updated_at', 'completed_at', 'status',
+    'customer_id', 'customer', 'cook_id', 'cook', 'cook_address',
+    'desired_ready_time', 'rejection_reason',
+    'item_id', 'dish_id', 'dish', 'price', 'quantity', 'item_status', 'line_total',
+)
+_ITEMS_AT = len(ORDER_FIELDS)
+_DATETIMES = (1, 2, 3, 10)
+
+_datetime = serializers.DateTimeField()
+
+
+def chunk_size():
+    return getattr(settings, 'ORDER_EXPORT_CHUNK_SIZE', 2000)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_orders(queryset, params):
+    # диапазон по самому created_at, а не created_at__date — без функции над столбцом
+    if params.get('date_from'):
+        queryset = queryset.filter(created_at__gte=_day_start(params['date_from']))
+    if params.get('date_to'):
+        queryset = queryset.filter(created_at__lt=_day_start(params['date_to'] + timedelta(days=1)))
+    if params.get('status'):
+        queryset = queryset.filter(status__in=params['status'])
+    if params.get('cook_id'):
+        queryset = queryset.filter(cook_id=params['cook_id'])
+    return queryset
+
+
+def rows(queryset):
+    """Кортежи ORDER_FIELDS + ITEM_FIELDS, позиции одного заказа подряд. Запрос — при первом next()."""
+    return (
+        queryset.order_by('id', 'orderitem__id')
+        .values_list(*ORDER_FIELDS, *ITEM_FIELDS)
+        .iterator(chunk_size=chunk_size())
+    )
+
+
+def _order_values(row):
+    values = list(row[:_ITEMS_AT])
+    for index in _DATETIMES:
+        values[index] = _datetime.to_representation(values[index]) if values[index] else None
+    return values
+
+
+def _line_total(price, quantity):
+    return price * quantity if price is not None and quantity is not None else None
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM — чтобы Excel открыл кириллицу в UTF-8
+    buffer.write('\ufeff')
+    writer.writerow(CSV_HEADER)
+    yield _drain(buffer)
+    size = chunk_size()
+    for count, row in enumerate(rows, 1):
+        item_id, dish_id, dish, price, quantity, item_status = row[_ITEMS_AT:]
+        writer.writerow([
+            '' if value is None else value
+            for value in (
+                *_order_values(row), item_id, dish_id, dish, price, quantity, item_status,
+                _line_total(price, quantity),
+            )
+        ])
+        if count % size == 0:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def jsonl_chunks(rows):
+    # пустая первая пачка: ответ начинается сразу, ещё до запроса к базе
+    yield b''
+    lines = []
+    size = chunk_size()
+    for order_id, group in groupby(rows, key=itemgetter(0)):
+        group = list(group)
+        values = _order_values(group[0])
+        order = dict(zip(CSV_HEADER, values))
+        order['items'] = [
+            {
+                'id': item_id,
+                'dish_id': dish_id,
+                'dish': dish,
+                'price': str(price),
+                'quantity': quantity,
+                'status': item_status,
+                'line_total': str(_line_total(price, quantity)),
+            }
+            for item_id, dish_id, dish, price, quantity, item_status in (row[_ITEMS_AT:] for row in group)
+            if item_id is not None
+        ]
+        lines.append(json.dumps(order, ensure_ascii=False))
+        if len(lines) >= size:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+def _drain(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value.encode()
+
+
+async def _async_chunks(chunks):
+    """
+    Под ASGI Django сначала собирает синхронный итератор целиком. Здесь пачки
+    берутся по одной в потоке запроса (thread_sensitive), где открыт курсор.
+    """
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await step(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # сама выгрузка отдаётся потоком — сюда попадают только ошибки
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for field, messages in (data or {}).items():
+            for message in messages if isinstance(messages, list) else [messages]:
+                writer.writerow([field, message])
+        return buffer.getvalue().encode()
+
+
+class JSONLinesRenderer(renderers.BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return (json.dumps(data, ensure_ascii=False) + '\n').encode() if data is not None else b''
+
+
+CHUNKS = {'csv': csv_chunks, 'jsonl': jsonl_chunks}
+
+
+def streaming_response(request, queryset, fmt):
+    chunks = CHUNKS[fmt](rows(queryset))
+    if isinstance(request._request, ASGIRequest):
+        chunks = _async_chunks(chunks)
+    renderer = request.accepted_renderer
+    response = StreamingHttpResponse(chunks, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+    response['Content-Disposition'] = f'attachment; filename="orders-{timezone.localdate():%Y%m%d}.{fmt}"'
+    # nginx не должен копить выгрузку целиком
+    response['X-Accel-Buffering'] = 'no'
+    return response
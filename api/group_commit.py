@@ -0,0 +1,129 @@
+"""
+Групповой коммит мелких независимых записей (корзина, избранное).
+
+При SQLITE_GROUP_COMMIT = True такие записи не открывают каждая свою
+транзакцию: их выполняет один поток-писатель. Он забирает из очереди всё,
+что накопилось, пока шёл предыдущий коммит (до GROUP_COMMIT_MAX_BATCH
+операций; GROUP_COMMIT_WINDOW > 0 — дополнительно ждать попутчиков столько
+секунд), и выполняет пачку в одной транзакции — каждую в своей точке
+сохранения, так что ошибка одной операции не откатывает остальные.
+Вызывающий поток ждёт коммита своей пачки, поэтому после возврата запись
+уже надёжно сохранена — как и без группировки.
+
+Операция, вызванная внутри уже открытой транзакции, выполняется сразу:
+она должна войти в транзакцию вызывающего.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .sqlite import call_with_backoff, run_with_retry
+
+
+class GroupCommitter:
+    """
+    Поток-писатель с очередью операций. run_batch(funcs) выполняет пачку в
+    одной транзакции и возвращает [(ok, результат или исключение), ...].
+    """
+
+    def __init__(self, run_batch, window=0.0, max_batch=64, name='group-commit'):
+        self.run_batch = run_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.operations = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, func):
+        """Ставит операцию в очередь и ждёт коммита её пачки."""
+        future = Future()
+        self._queue.put((func, future))
+        return future.result()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                # всё, что накопилось, пока писатель был занят, забираем без ожидания
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                results = self.run_batch([func for func, _ in batch])
+            except BaseException as exc:
+                results = [(False, exc)] * len(batch)
+            self.batches += 1
+            self.operations += len(batch)
+            for (_, future), (ok, value) in zip(batch, results):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+
+def run_django_batch(funcs, using=DEFAULT_DB_ALIAS):
+    def attempt():
+        results = []
+        with transaction.atomic(using=using):
+            for func in funcs:
+                try:
+                    with transaction.atomic(using=using):
+                        results.append((True, func()))
+                except Exception as exc:
+                    results.append((False, exc))
+        return results
+
+    try:
+        return call_with_backoff(attempt)
+    finally:
+        # поток-писатель живёт долго: не держим соединение между пачками
+        connections[using].close_if_unusable_or_obsolete()
+
+
+_committer = None
+_committer_lock = threading.Lock()
+
+
+def get_committer():
+    global _committer
+    with _committer_lock:
+        if _committer is None:
+            _committer = GroupCommitter(
+                run_django_batch,
+                window=getattr(settings, 'GROUP_COMMIT_WINDOW', 0.0),
+                max_batch=getattr(settings, 'GROUP_COMMIT_MAX_BATCH', 64),
+            )
+        return _committer
+
+
+def submit(func, using=DEFAULT_DB_ALIAS):
+    """Выполняет запись func() — группой, если включено, иначе отдельной транзакцией с повтором."""
+    if not getattr(settings, 'SQLITE_GROUP_COMMIT', False) or connections[using].in_atomic_block:
+        return run_with_retry(func, using=using)
+    return get_committer().submit(func)
@@ -0,0 +1,133 @@
+"""
+Обработка фото блюд: уменьшенные копии (JPEG + WebP) и размытая заглушка.
+
+Оригинал, загруженный поваром, не меняется. Рядом с ним сохраняются варианты
+`<имя>_<размер>.jpg/.webp`, а их пути и размеры записываются в
+`Dish.image_variants`. Заглушка (LQIP) — крошечный размытый JPEG в виде
+data URI, который клиент показывает, пока грузится настоящая картинка.
+
+Обработка идёт в пуле потоков после коммита транзакции, чтобы не задерживать
+ответ на загрузку. Для уже загруженных фото есть команда build_image_variants.
+"""
+import base64
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageFilter, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Ширина вариантов в пикселях; высота — по пропорциям оригинала
+VARIANT_WIDTHS = {
+    'thumb': 200,
+    'medium': 600,
+    'large': 1200,
+}
+FORMATS = (
+    ('jpeg', 'JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    ('webp', 'WEBP', 'webp', {'quality': 80, 'method': 4}),
+)
+PLACEHOLDER_WIDTH = 16
+
+_executor = None
+
+
+def _open(name, storage):
+    with storage.open(name, 'rb') as fh:
+        image = Image.open(fh)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    return image
+
+
+def _flatten(image):
+    # JPEG не умеет прозрачность — кладём картинку на белый фон
+    if image.mode != 'RGBA':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def _resized(image, width):
+    if image.width <= width:
+        return image.copy()
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def make_placeholder(image):
+    small = _flatten(_resized(image, PLACEHOLDER_WIDTH)).filter(ImageFilter.GaussianBlur(1))
+    buf = BytesIO()
+    small.save(buf, 'JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def render_variants(name, storage=None):
+    """
+    Строит варианты для файла `name` и сохраняет их в хранилище.
+    Не трогает базу данных, поэтому годится и для отдельных процессов.
+    Возвращает (image_variants, image_placeholder).
+    """
+    storage = storage or default_storage
+    image = _open(name, storage)
+    base = posixpath.splitext(name)[0]
+
+    sizes = {}
+    for label, width in VARIANT_WIDTHS.items():
+        resized = _resized(image, width)
+        entry = {'width': resized.width, 'height': resized.height}
+        for key, fmt, ext, options in FORMATS:
+            buf = BytesIO()
+            (_flatten(resized) if fmt == 'JPEG' else resized).save(buf, fmt, **options)
+            entry[key] = storage.save(f'{base}_{label}.{ext}', ContentFile(buf.getvalue()))
+        sizes[label] = entry
+
+    return {'source': name, 'sizes': sizes}, make_placeholder(image)
+
+
+def process_dish_image(dish_id, name):
+    """Строит варианты и записывает их в блюдо, если фото за это время не сменилось."""
+    from . import versions
+    from .models import Dish
+
+    try:
+        variants, placeholder = render_variants(name)
+        updated = Dish.objects.filter(id=dish_id, image=name).update(
+            image_variants=variants,
+            image_placeholder=placeholder,
+        )
+        if updated:
+            cook_id = Dish.objects.filter(id=dish_id).values_list('cook_id', flat=True).first()
+            versions.bump(*versions.dish_keys(cook_id))
+    except Exception:
+        logger.exception('Не удалось обработать фото блюда %s (%s)', dish_id, name)
+    finally:
+        if getattr(settings, 'IMAGE_PROCESSING_ASYNC', True):
+            # соединения рабочего потока не должны висеть открытыми
+            connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+            thread_name_prefix='dish-images',
+        )
+    return _executor
+
+
+def schedule(dish_id, name):
+    if getattr(settings, 'IMAGE_PROCESSING_ASYNC', True):
+        _get_executor().submit(process_dish_image, dish_id, name)
+    else:
+        process_dish_image(dish_id, name)
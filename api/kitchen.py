@@ -0,0 +1,67 @@
+"""
+Очередь кухни повара: GET /api/kitchen/queue/.
+
+Открытые позиции — ещё не готовые (confirmed, in_progress) в заказах, которые
+не закрыты (pending, accepted, in_progress). Позиции отсортированы по
+желаемому времени готовности заказа; заказы без времени — в конце.
+
+Сводка по блюдам («Суп ×7, к 14:00») считается в базе GROUP BY по dish_id.
+Оба запроса идут по индексу order_cook_status_ready_idx
+(cook, status, desired_ready_time) и позициям по orderitem_order_status_idx.
+"""
+from django.db.models import Count, F, Min, Q, Sum
+
+from .models import OrderItem
+
+OPEN_ORDER_STATUSES = ('pending', 'accepted', 'in_progress')
+OPEN_ITEM_STATUSES = ('confirmed', 'in_progress')
+
+
+def open_items(cook):
+    return OrderItem.objects.filter(
+        order__cook=cook,
+        order__status__in=OPEN_ORDER_STATUSES,
+        status__in=OPEN_ITEM_STATUSES,
+    )
+
+
+def queue_queryset(cook):
+    """Позиции очереди — плоские словари одним запросом, без моделей и сериализаторов."""
+    return (
+        open_items(cook)
+        .order_by(F('order__desired_ready_time').asc(nulls_last=True), 'order__created_at', 'order_id', 'id')
+        .values(
+            'id',
+            'order_id',
+            'dish_id',
+            'quantity',
+            'status',
+            dish_name=F('dish__name'),
+            order_status=F('order__status'),
+            desired_ready_time=F('order__desired_ready_time'),
+            ordered_at=F('order__created_at'),
+        )
+    )
+
+
+def batches_queryset(cook):
+    """Сводка по блюдам: сколько штук, в скольких заказах и к какому ближайшему сроку."""
+    return (
+        open_items(cook)
+        .values('dish_id', dish_name=F('dish__name'))
+        .annotate(
+            total_quantity=Sum('quantity'),
+            in_progress_quantity=Sum('quantity', filter=Q(status='in_progress'), default=0),
+            order_count=Count('order_id', distinct=True),
+            due_by=Min('order__desired_ready_time'),
+        )
+        .order_by(F('due_by').asc(nulls_last=True), 'dish_name', 'dish_id')
+    )
+
+
+def queue(cook):
+    return list(queue_queryset(cook))
+
+
+def batches(cook):
+    return list(batches_queryset(cook))
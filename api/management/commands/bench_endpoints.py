@@ -0,0 +1,277 @@
+import gc
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import URLResolver, reverse
+from rest_framework.test import APIClient
+
+from api import tokens, urls
+from api.models import CartItem, Order, OrderItem, User
+from api.seeding import DEFAULT_PASSWORD, populate
+from api.synthetic import Volumes
+
+
+def route_names(patterns=None):
+    """Имена всех маршрутов api/urls.py (варианты с суффиксом формата — один маршрут)."""
+    names = set()
+    for pattern in urls.urlpatterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class QueryTimer:
+    """Число и суммарное время запросов к базе (connection.queries округляет время до миллисекунд)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def percentile(samples, percent):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Задержка маршрутов api/urls.py на синтетических данных (api/seeding.py): p50/p95/p99, '
+        'число и время запросов к базе, размер ответа. Сравнивает с JSON-базой (--baseline) и '
+        'сообщает о регрессиях; --save записывает результат как новую базу. Данные создаются '
+        'в транзакции, которая откатывается; запросы на запись откатываются по одному.'
+    )
+
+    def add_arguments(self, parser):
+        defaults = Volumes()
+        parser.add_argument('--cooks', type=int, default=defaults.cooks)
+        parser.add_argument('--customers', type=int, default=defaults.customers)
+        parser.add_argument('--dishes-per-cook', type=int, default=defaults.dishes_per_cook)
+        parser.add_argument('--orders', type=int, default=defaults.orders)
+        parser.add_argument('--max-items', type=int, default=defaults.max_items, help='Позиций в заказе, максимум.')
+        parser.add_argument('--max-cart-items', type=int, default=defaults.max_cart_items)
+        parser.add_argument('--max-favorites', type=int, default=defaults.max_favorites)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=30, help='Замеров на маршрут.')
+        parser.add_argument('--warmup', type=int, default=3, help='Запросов до замеров.')
+        parser.add_argument('--only', default='', help='Сценарии через запятую (по умолчанию все).')
+        parser.add_argument(
+            '--baseline', default=str(settings.BASE_DIR / 'bench_endpoints.json'),
+            help='JSON-база для сравнения и для --save.',
+        )
+        parser.add_argument('--save', action='store_true', help='Записать результат в --baseline.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый рост задержки, времени в базе и размера ответа, доля (0.25 — на 25%%).',
+        )
+
+    def handle(self, *args, **options):
+        volumes = Volumes(
+            cooks=options['cooks'],
+            customers=options['customers'],
+            dishes_per_cook=options['dishes_per_cook'],
+            orders=options['orders'],
+            max_items=options['max_items'],
+            max_cart_items=options['max_cart_items'],
+            max_favorites=options['max_favorites'],
+        )
+        if min(volumes.cooks, volumes.customers, volumes.dishes_per_cook, volumes.orders) < 1:
+            raise CommandError('Нужны хотя бы один повар, покупатель, блюдо и заказ.')
+        only = {name for name in options['only'].split(',') if name}
+
+        # тестовый клиент ходит на testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), transaction.atomic():
+            data = populate(volumes, seed=options['seed'], prefix=f'bench{time.monotonic_ns()}-')
+            cache.clear()
+            cases = list(self.cases(data))
+            missing = route_names() - {route for _, route, *_ in cases}
+            if missing:
+                raise CommandError(f'Нет сценариев для маршрутов: {", ".join(sorted(missing))}.')
+            results = {
+                name: self.run_case(method, path, user, payload, options['warmup'], options['requests'])
+                for name, route, method, path, user, payload in cases
+                if not only or name in only
+            }
+            transaction.set_rollback(True)
+
+        self.report(results)
+        report = {
+            'meta': {
+                'volumes': vars(volumes),
+                'seed': options['seed'],
+                'requests': options['requests'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'routes': results,
+        }
+        baseline_path = Path(options['baseline'])
+        regressions = []
+        if baseline_path.exists():
+            regressions = self.compare(json.loads(baseline_path.read_text()), report, options['tolerance'])
+        if options['save']:
+            baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n')
+            self.stdout.write(f'База записана: {baseline_path}')
+        if regressions and not options['save']:
+            raise CommandError(f'Регрессии: {len(regressions)}.')
+
+    def cases(self, data):
+        """(сценарий, маршрут, метод, путь, пользователь, тело)."""
+        admin = User.objects.get(pk=data.admin_ids[0])
+        cook = User.objects.get(pk=data.cook_ids[0])
+        # покупатель с самой длинной историей заказов
+        busiest = (
+            Order.objects.filter(customer_id__in=data.customer_ids).values('customer_id')
+            .annotate(orders=Count('id')).order_by('-orders', 'customer_id').first()
+        )
+        customer = User.objects.get(pk=busiest['customer_id'] if busiest else data.customer_ids[0])
+        dish_id = data.dish_ids[0]
+        cook_order = Order.objects.filter(cook=cook).order_by('id').first()
+        pending = Order.objects.filter(cook=cook, status='pending').order_by('id').first() or cook_order
+        customer_order = Order.objects.filter(customer=customer).order_by('id').first()
+        item = OrderItem.objects.filter(order__cook=cook).order_by('id').first()
+        cart_item = CartItem.objects.filter(customer=customer).order_by('id').first()
+        if cart_item is None:
+            cart_item = CartItem.objects.create(customer=customer, dish_id=dish_id)
+        credentials = {'username': customer.username, 'password': DEFAULT_PASSWORD}
+
+        yield 'api-root', 'api-root', 'get', reverse('api-root'), admin, None
+        yield 'api_token_auth', 'api_token_auth', 'post', reverse('api_token_auth'), None, credentials
+        yield 'api_signed_token', 'api_signed_token', 'post', reverse('api_signed_token'), None, credentials
+        yield ('api_signed_token_refresh', 'api_signed_token_refresh', 'post', reverse('api_signed_token_refresh'),
+               None, {'refresh': tokens.issue_pair(customer)['refresh']})
+        yield 'kitchen-queue', 'kitchen-queue', 'get', reverse('kitchen-queue'), cook, None
+        yield 'cook-dashboard', 'cook-dashboard', 'get', reverse('cook-dashboard'), cook, None
+
+        yield 'user-list', 'user-list', 'get', reverse('user-list'), admin, None
+        yield 'user-detail', 'user-detail', 'get', reverse('user-detail', args=[cook.id]), admin, None
+        yield 'user-me', 'user-me', 'get', reverse('user-me'), customer, None
+        yield 'user-cooks', 'user-cooks', 'get', reverse('user-cooks'), None, None
+        yield 'user-favorites', 'user-favorites', 'get', reverse('user-favorites'), customer, None
+        yield 'user-add-favorite', 'user-add-favorite', 'post', reverse('user-add-favorite'), customer, {'dish_id': dish_id}
+        yield ('user-remove-favorite', 'user-remove-favorite', 'delete', reverse('user-remove-favorite'),
+               customer, {'dish_id': dish_id})
+        yield 'user-auth-cache-stats', 'user-auth-cache-stats', 'get', reverse('user-auth-cache-stats'), admin, None
+
+        yield 'dish-list', 'dish-list', 'get', reverse('dish-list'), customer, None
+        yield 'dish-list?cook_id', 'dish-list', 'get', f"{reverse('dish-list')}?cook_id={cook.id}", customer, None
+        yield 'dish-list?page_size', 'dish-list', 'get', f"{reverse('dish-list')}?page_size=20", customer, None
+        yield 'dish-detail', 'dish-detail', 'get', reverse('dish-detail', args=[dish_id]), customer, None
+        yield 'dish-cache-stats', 'dish-cache-stats', 'get', reverse('dish-cache-stats'), admin, None
+
+        yield 'order-list[customer]', 'order-list', 'get', reverse('order-list'), customer, None
+        yield 'order-list[cook]', 'order-list', 'get', reverse('order-list'), cook, None
+        yield 'order-list[admin]?page_size', 'order-list', 'get', f"{reverse('order-list')}?page_size=50", admin, None
+        yield 'order-detail', 'order-detail', 'get', reverse('order-detail', args=[customer_order.id]), customer, None
+        yield 'order-changes', 'order-changes', 'get', f"{reverse('order-changes')}?since=0&wait=0", cook, None
+        yield ('order-process', 'order-process', 'post', reverse('order-process', args=[pending.id]),
+               cook, {'status': 'accepted'})
+        yield 'order-export', 'order-export', 'get', f"{reverse('order-export')}?format=csv", admin, None
+
+        yield 'orderitem-list', 'orderitem-list', 'get', reverse('orderitem-list'), cook, None
+        yield 'orderitem-detail', 'orderitem-detail', 'get', reverse('orderitem-detail', args=[item.id]), cook, None
+
+        yield 'cartitem-list', 'cartitem-list', 'get', reverse('cartitem-list'), customer, None
+        yield 'cartitem-detail', 'cartitem-detail', 'get', reverse('cartitem-detail', args=[cart_item.id]), customer, None
+        yield 'cartitem-checkout', 'cartitem-checkout', 'post', reverse('cartitem-checkout'), customer, {}
+
+        yield 'report-cook-daily', 'report-cook-daily', 'get', reverse('report-cook-daily'), cook, None
+        yield 'report-top-dishes', 'report-top-dishes', 'get', reverse('report-top-dishes'), cook, None
+
+    def run_case(self, method, path, user, payload, warmup, requests):
+        client = APIClient()
+        if user is not None:
+            # настоящая аутентификация по подписанному токену, а не force_authenticate
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens.issue_pair(user)['access']}")
+        send = getattr(client, method)
+        latencies, query_times = [], []
+        queries = size = status = None
+        gc.collect()
+        for run in range(warmup + requests):
+            timer = QueryTimer()
+            # запись каждого запроса откатывается — все замеры на одних и тех же данных
+            with transaction.atomic(), connection.execute_wrapper(timer):
+                started = time.perf_counter()
+                response = send(path, payload, format='json') if payload is not None else send(path)
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            if run < warmup:
+                continue
+            latencies.append(elapsed * 1000)
+            query_times.append(timer.seconds * 1000)
+            queries, size, status = timer.count, len(body), response.status_code
+        return {
+            'status': status,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'queries': queries,
+            'query_ms': round(statistics.median(query_times), 3),
+            'bytes': size,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'сценарий':<30} {'код':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'запросов':>8} {'в базе':>9} {'байт':>10}"
+        )
+        for name, row in results.items():
+            line = (
+                f"{name:<30} {row['status']:>4} {row['p50_ms']:>7.2f}мс {row['p95_ms']:>7.2f}мс "
+                f"{row['p99_ms']:>7.2f}мс {row['queries']:>8} {row['query_ms']:>7.2f}мс {row['bytes']:>10}"
+            )
+            self.stdout.write(self.style.WARNING(line) if row['status'] >= 400 else line)
+
+    def compare(self, baseline, report, tolerance):
+        """Печатает отличия от базы и возвращает список регрессий."""
+        if baseline.get('meta', {}).get('volumes') != report['meta']['volumes']:
+            self.stdout.write(self.style.WARNING('Объёмы данных отличаются от базы — сравнение приблизительное.'))
+        regressions = []
+        for name, row in report['routes'].items():
+            base = baseline.get('routes', {}).get(name)
+            if base is None:
+                continue
+            problems = []
+            if row['status'] != base['status']:
+                problems.append(f"код {base['status']} → {row['status']}")
+            if row['queries'] > base['queries']:
+                problems.append(f"запросов {base['queries']} → {row['queries']}")
+            # хвост одного прогона шумный: задержка выросла, только если выросли и p50, и p95;
+            # абсолютный порог в 1 мс отсекает шум на быстрых маршрутах
+            if all(self.slower(row[key], base[key], tolerance) for key in ('p50_ms', 'p95_ms')):
+                problems.append(f"p50 {base['p50_ms']:.2f} → {row['p50_ms']:.2f} мс, "
+                                f"p95 {base['p95_ms']:.2f} → {row['p95_ms']:.2f} мс")
+            if self.slower(row['query_ms'], base['query_ms'], tolerance):
+                problems.append(f"время в базе {base['query_ms']:.2f} → {row['query_ms']:.2f} мс")
+            if row['bytes'] > base['bytes'] * (1 + tolerance):
+                problems.append(f"размер {base['bytes']} → {row['bytes']} байт")
+            if problems:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f'РЕГРЕССИЯ {name}: ' + '; '.join(problems)))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('Регрессий относительно базы нет.'))
+        return regressions
+
+    @staticmethod
+    def slower(value, base, tolerance):
+        return value > base * (1 + tolerance) and value - base > 1
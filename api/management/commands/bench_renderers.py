@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from api import kitchen
+from api.models import CartItem, Dish
+from api.read_serializers import CartItemReadSerializer, DishReadSerializer, OrderReadSerializer
+from api.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+from api.views import OrderViewSet
+
+from .bench_serializers import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Время рендеринга ответов списков (блюда, заказы, корзина, очередь кухни) стандартным '
+        'JSONRenderer, FastJSONRenderer и MessagePackRenderer (если установлен msgpack). '
+        'Проверяет, что JSON совпадает побайтно. Данные создаются в транзакции, которая откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='100,1000,10000', help='Размеры списков через запятую.')
+        parser.add_argument('--repeat', type=int, default=5, help='Повторов; берётся лучшее время.')
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/')
+        candidates = [('DRF', JSONRenderer()), ('orjson', FastJSONRenderer())]
+        if msgpack is not None:
+            candidates.append(('msgpack', MessagePackRenderer()))
+        for size in [int(value) for value in options['rows'].split(',')]:
+            with transaction.atomic():
+                cook, customer = seed(size)
+                for name, payload in self.payloads(request, cook, customer):
+                    results = [(label, *self.measure(renderer, payload, options['repeat'])) for label, renderer in candidates]
+                    if results[0][2] != results[1][2]:
+                        raise CommandError(f'{name}: FastJSONRenderer отдаёт другой JSON.')
+                    base = results[0][1]
+                    self.stdout.write(f'{name:>7} × {size}: ' + ', '.join(
+                        f'{label} {elapsed * 1000:.2f} мс (×{base / elapsed:.1f}, {len(body)} байт)'
+                        for label, elapsed, body in results
+                    ))
+                transaction.set_rollback(True)
+
+    def payloads(self, request, cook, customer):
+        readers = [
+            ('dishes', DishReadSerializer, Dish.objects.filter(cook=cook).order_by('created_at', 'id')),
+            ('orders', OrderReadSerializer, OrderViewSet.queryset.filter(cook=cook).order_by('-created_at', '-id')),
+            ('cart', CartItemReadSerializer, CartItem.objects.filter(customer=customer)),
+        ]
+        for name, reader_class, queryset in readers:
+            reader = reader_class(request)
+            yield name, reader.to_representation(reader.rows(queryset))
+        # значения прямо из values(): datetime и Decimal кодирует сам рендерер
+        yield 'kitchen', {'items': kitchen.queue(cook), 'batches': kitchen.batches(cook)}
+
+    def measure(self, renderer, payload, repeat):
+        best, body = None, None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            body = renderer.render(payload, renderer.media_type, {})
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
@@ -0,0 +1,94 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.models import CartItem, Dish, Order, OrderItem
+from api.read_serializers import CartItemReadSerializer, DishReadSerializer, OrderReadSerializer
+from api.serializers import CartItemSerializer, DishSerializer, OrderSerializer
+from api.views import OrderViewSet
+
+User = get_user_model()
+
+
+def seed(size):
+    """size блюд, size заказов по две позиции и корзина из size позиций."""
+    tag = f'bench{time.monotonic_ns()}'
+    cook = User.objects.create(username=f'{tag}-cook', role='cook', address='Адрес')
+    customer = User.objects.create(username=f'{tag}-customer', role='customer')
+    dishes = Dish.objects.bulk_create(
+        Dish(cook=cook, name=f'Блюдо {n}', description='Описание', price=n % 500 + 0.5)
+        for n in range(size)
+    )
+    ready = timezone.now() + timedelta(hours=2)
+    orders = Order.objects.bulk_create(
+        Order(customer=customer, cook=cook, status='pending', desired_ready_time=ready if n % 2 else None)
+        for n in range(size)
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, dish=dishes[(n + shift) % size], quantity=shift + 1)
+        for n, order in enumerate(orders)
+        for shift in (0, 1)
+    )
+    CartItem.objects.bulk_create(CartItem(customer=customer, dish=dish) for dish in dishes)
+    return cook, customer
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает DishSerializer, OrderSerializer и CartItemSerializer с быстрым путём '
+        '(api/read_serializers.py): время от запроса до готового JSON и совпадение байтов. '
+        'Данные создаются в транзакции, которая откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='1000,10000,100000', help='Размеры списков через запятую.')
+        parser.add_argument('--repeat', type=int, default=1, help='Повторов; берётся лучшее время.')
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/')
+        renderer = JSONRenderer()
+        for size in [int(value) for value in options['rows'].split(',')]:
+            with transaction.atomic():
+                cook, customer = seed(size)
+                cases = [
+                    ('dishes', Dish.objects.filter(cook=cook).select_related('cook').order_by('created_at', 'id'),
+                     DishSerializer, DishReadSerializer),
+                    ('orders', OrderViewSet.queryset.filter(cook=cook).order_by('-created_at', '-id'),
+                     OrderSerializer, OrderReadSerializer),
+                    ('cart', CartItem.objects.filter(customer=customer).select_related('dish__cook'),
+                     CartItemSerializer, CartItemReadSerializer),
+                ]
+                for name, queryset, serializer_class, reader_class in cases:
+                    def classic():
+                        data = serializer_class(queryset.all(), many=True, context={'request': request}).data
+                        return renderer.render(data)
+
+                    def fast():
+                        reader = reader_class(request)
+                        return renderer.render(reader.to_representation(reader.rows(queryset.all())))
+
+                    classic_time, classic_body = self.measure(classic, options['repeat'])
+                    fast_time, fast_body = self.measure(fast, options['repeat'])
+                    if classic_body != fast_body:
+                        raise CommandError(f'{name}: вывод быстрого пути отличается от сериализатора.')
+                    self.stdout.write(
+                        f'{name:>6} × {size}: DRF {classic_time * 1000:9.1f} мс, '
+                        f'быстрый {fast_time * 1000:9.1f} мс, ускорение ×{classic_time / fast_time:.1f}, '
+                        f'{len(fast_body)} байт'
+                    )
+                transaction.set_rollback(True)
+
+    def measure(self, func, repeat):
+        best, body = None, None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            body = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
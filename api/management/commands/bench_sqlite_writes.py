@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.group_commit import GroupCommitter
+from api.sqlite import call_with_backoff, is_lock_error, journal_mode, pragma_statements
+
+MODES = ('stock', 'tuned', 'group')
+
+
+def _schema(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE cart (customer INTEGER, dish INTEGER, quantity INTEGER, PRIMARY KEY (customer, dish))')
+    conn.commit()
+    conn.close()
+
+
+def _increment(conn, customer, dish):
+    # как get_or_create + save: чтение, затем запись в той же транзакции
+    row = conn.execute('SELECT quantity FROM cart WHERE customer = ? AND dish = ?', (customer, dish)).fetchone()
+    if row is None:
+        conn.execute('INSERT INTO cart VALUES (?, ?, 1)', (customer, dish))
+    else:
+        conn.execute('UPDATE cart SET quantity = ? WHERE customer = ? AND dish = ?', (row[0] + 1, customer, dish))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест записи в SQLite из нескольких потоков: стандартные настройки (stock), '
+        'SQLITE_JOURNAL_MODE и PRAGMA из SQLITE_PRAGMAS + BEGIN IMMEDIATE + повтор (tuned) и групповой коммит (group). '
+        'Работает на временном файле и не трогает рабочую базу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--ops', type=int, default=200, help='Операций на поток.')
+        parser.add_argument('--modes', default=','.join(MODES))
+
+    def handle(self, *args, **options):
+        for mode in options['modes'].split(','):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                _schema(path)
+                result = self.run_mode(mode, path, options['threads'], options['ops'])
+            self.stdout.write(
+                f"{mode:>6}: {result['ops_per_sec']:8.0f} оп/с, ошибок {result['errors']}, "
+                f"p50 {result['p50_ms']:.2f} мс, p95 {result['p95_ms']:.2f} мс"
+                + (f", транзакций {result['transactions']}" if 'transactions' in result else '')
+            )
+
+    def connect(self, mode, path):
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        if mode != 'stock':
+            for statement in [f'PRAGMA journal_mode={journal_mode()}', *pragma_statements()]:
+                conn.execute(statement)
+        return conn
+
+    def transaction(self, conn, mode, body):
+        conn.execute('BEGIN' if mode == 'stock' else 'BEGIN IMMEDIATE')
+        try:
+            result = body()
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    def run_mode(self, mode, path, threads, ops):
+        latencies, errors = [], []
+        lock = threading.Lock()
+        committer = None
+        if mode == 'group':
+            writer = self.connect(mode, path)
+
+            def run_batch(funcs):
+                def attempt():
+                    results = []
+                    conn = writer
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        for func in funcs:
+                            conn.execute('SAVEPOINT op')
+                            try:
+                                results.append((True, func(conn)))
+                                conn.execute('RELEASE op')
+                            except Exception as exc:
+                                conn.execute('ROLLBACK TO op')
+                                conn.execute('RELEASE op')
+                                results.append((False, exc))
+                    except BaseException:
+                        conn.execute('ROLLBACK')
+                        raise
+                    conn.execute('COMMIT')
+                    return results
+                return call_with_backoff(attempt)
+
+            committer = GroupCommitter(run_batch)
+
+        def worker(customer):
+            conn = None if committer else self.connect(mode, path)
+            for i in range(ops):
+                dish = i % 10
+                started = time.perf_counter()
+                try:
+                    if committer:
+                        committer.submit(lambda c, dish=dish: _increment(c, customer, dish))
+                    elif mode == 'stock':
+                        self.transaction(conn, mode, lambda: _increment(conn, customer, dish))
+                    else:
+                        call_with_backoff(lambda: self.transaction(conn, mode, lambda: _increment(conn, customer, dish)))
+                except Exception as exc:
+                    if not is_lock_error(exc):
+                        raise
+                    with lock:
+                        errors.append(exc)
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            if conn is not None:
+                conn.close()
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        result = {
+            'ops_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+            'errors': len(errors),
+            'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+            'p95_ms': statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else 0.0,
+        }
+        if committer:
+            committer.stop()
+            result['transactions'] = committer.batches
+        return result
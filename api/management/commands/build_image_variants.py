@@ -0,0 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import versions
+from api.images import render_variants
+from api.models import Dish
+
+
+def _init_worker():
+    # при запуске через spawn дочерний процесс стартует без настроенного Django
+    if not apps.ready:
+        django.setup()
+
+
+def _render(name):
+    try:
+        return render_variants(name), None
+    except Exception as exc:
+        return None, str(exc)
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии, WebP и заглушки для уже загруженных фото блюд.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Число процессов (по умолчанию — число CPU)')
+        parser.add_argument('--force', action='store_true', help='Перестроить и те фото, у которых варианты уже есть')
+
+    def handle(self, *args, **options):
+        rows = Dish.objects.exclude(image='').exclude(image__isnull=True).values_list(
+            'id', 'image', 'image_variants'
+        )
+        todo = [
+            (dish_id, name) for dish_id, name, variants in rows
+            if options['force'] or (variants or {}).get('source') != name
+        ]
+        if not todo:
+            self.stdout.write('Нечего обрабатывать.')
+            return
+
+        # процессы только читают/пишут файлы, в базу пишет родитель
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            names = [name for _, name in todo]
+            for (dish_id, name), (result, error) in zip(todo, pool.map(_render, names, chunksize=8)):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                variants, placeholder = result
+                Dish.objects.filter(id=dish_id, image=name).update(
+                    image_variants=variants,
+                    image_placeholder=placeholder,
+                )
+                done += 1
+
+        if done:
+            # update() не шлёт сигналов — сбрасываем ETag каталога явно
+            cook_ids = Dish.objects.filter(id__in=[dish_id for dish_id, _ in todo]).values_list('cook_id', flat=True)
+            versions.bump(versions.DISHES, *map(versions.cook_dishes, set(cook_ids)))
+
+        self.stdout.write(self.style.SUCCESS(f'Обработано: {done}, ошибок: {failed}.'))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api import query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет EXPLAIN QUERY PLAN для запросов горячих путей API и сообщает '
+        'о полных проходах таблиц/индексов и временных B-деревьях. '
+        'Завершается с ошибкой, если найдены неразрешённые проблемы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--show-plans', action='store_true', help='Печатать SQL и план каждого запроса.')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if connections[using].vendor != 'sqlite':
+            self.stdout.write('Анализ планов поддерживается только для SQLite.')
+            return
+
+        failed = 0
+        for report in query_plans.check(using):
+            if report.problems:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'✗ {report.name}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {report.name}'))
+            for kind, detail in report.problems:
+                self.stdout.write(f'    {kind}: {detail}')
+            for kind, detail in report.allowed:
+                self.stdout.write(f'    {kind} (допустимо): {detail}')
+            if options['show_plans']:
+                self.stdout.write(f'    SQL: {report.sql}')
+                for _, _, detail in report.plan:
+                    self.stdout.write(f'      {detail}')
+
+        if failed:
+            raise CommandError(f'Проблемные планы: {failed}. Добавьте индекс или разрешите проблему в api/query_plans.py.')
+        self.stdout.write(self.style.SUCCESS('Все планы запросов в порядке.'))
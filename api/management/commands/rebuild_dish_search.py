@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс блюд (SQLite FTS5).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search.is_enabled(using):
+            self.stdout.write('Полнотекстовый индекс поддерживается только для SQLite.')
+            return
+        search.rebuild_index(using)
+        self.stdout.write(self.style.SUCCESS('Индекс блюд перестроен.'))
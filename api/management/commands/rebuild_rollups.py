@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import dashboard, rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает дневные сводки поваров и блюд и счётчики панели повара по заказам.'
+
+    def handle(self, *args, **options):
+        cooks, dishes = rollups.rebuild()
+        counters = dashboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Сводки пересобраны: поваров-дней {cooks}, блюд-дней {dishes}, счётчиков поваров {counters}.'
+        ))
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api import replica
+
+
+class Command(BaseCommand):
+    help = 'Обновляет файловую реплику SQLite (алиас для чтения) снимком основной базы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--alias',
+            default=getattr(settings, 'DATABASE_READ_ALIAS', None) or 'replica',
+            help='Алиас реплики в DATABASES (по умолчанию DATABASE_READ_ALIAS или replica).',
+        )
+
+    def handle(self, *args, **options):
+        alias = options['alias']
+        if alias not in settings.DATABASES or alias == DEFAULT_DB_ALIAS:
+            raise CommandError(f'Нет алиаса реплики {alias!r} в DATABASES.')
+        source, target = settings.DATABASES[DEFAULT_DB_ALIAS], settings.DATABASES[alias]
+        if not all(db['ENGINE'] == 'django.db.backends.sqlite3' for db in (source, target)):
+            raise CommandError('Файловая реплика поддерживается только для SQLite.')
+
+        size = replica.refresh(source['NAME'], target['NAME'])
+        self.stdout.write(self.style.SUCCESS(f'Реплика {alias} обновлена ({size} байт).'))
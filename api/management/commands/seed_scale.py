@@ -0,0 +1,91 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.seeding import DEFAULT_PASSWORD, populate
+from api.synthetic import Volumes
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными объёма продакшена (api/seeding.py): пользователи '
+        'всех ролей, блюда с ценами, заказы с позициями и распределением статусов, корзины и '
+        'избранное. Результат определяется --seed (даты — ещё и --now); генерация идёт в пуле '
+        'из --workers процессов, вставка — bulk_create порциями в одной транзакции. Пароль всех '
+        'пользователей — --password.'
+    )
+
+    def add_arguments(self, parser):
+        defaults = Volumes()
+        parser.add_argument('--admins', type=int, default=defaults.admins)
+        parser.add_argument('--cooks', type=int, default=defaults.cooks)
+        parser.add_argument('--customers', type=int, default=defaults.customers)
+        parser.add_argument('--dishes-per-cook', type=int, default=defaults.dishes_per_cook)
+        parser.add_argument('--orders', type=int, default=defaults.orders)
+        parser.add_argument('--max-items', type=int, default=defaults.max_items, help='Позиций в заказе, максимум.')
+        parser.add_argument('--max-cart-items', type=int, default=defaults.max_cart_items)
+        parser.add_argument('--max-favorites', type=int, default=defaults.max_favorites)
+        parser.add_argument('--days', type=int, default=90, help='Глубина истории заказов, дней.')
+        parser.add_argument(
+            '--now', default=None,
+            help='Момент, от которого отсчитываются даты (ISO 8601); по умолчанию — время запуска.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='seed-', help='Префикс имён пользователей.')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1, help='Процессов генерации; 1 — без пула.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Строк в порции генерации.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Строк в одном INSERT.')
+
+    def handle(self, *args, **options):
+        volumes = Volumes(
+            admins=options['admins'],
+            cooks=options['cooks'],
+            customers=options['customers'],
+            dishes_per_cook=options['dishes_per_cook'],
+            orders=options['orders'],
+            max_items=options['max_items'],
+            max_cart_items=options['max_cart_items'],
+            max_favorites=options['max_favorites'],
+        )
+        if min(vars(volumes).values()) < 0 or options['days'] < 1:
+            raise CommandError('Объёмы не могут быть отрицательными, а история — короче дня.')
+        if volumes.orders and min(volumes.cooks, volumes.customers, volumes.dishes_per_cook, volumes.max_items) < 1:
+            raise CommandError('Для заказов нужны повара, покупатели, блюда и хотя бы одна позиция.')
+        if min(options['workers'], options['chunk_size'], options['batch_size']) < 1:
+            raise CommandError('--workers, --chunk-size и --batch-size должны быть положительными.')
+
+        now = None
+        if options['now']:
+            now = parse_datetime(options['now'])
+            if now is None:
+                raise CommandError('--now: ожидается дата и время в ISO 8601.')
+            if timezone.is_naive(now):
+                now = timezone.make_aware(now)
+
+        started = time.perf_counter()
+        try:
+            data = populate(
+                volumes,
+                seed=options['seed'],
+                prefix=options['prefix'],
+                password=options['password'],
+                days=options['days'],
+                now=now,
+                chunk_size=options['chunk_size'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                log=lambda message: self.stdout.write(f'{time.perf_counter() - started:8.1f} с  {message}'),
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с: администраторов {len(data.admin_ids)}, '
+            f'поваров {len(data.cook_ids)}, покупателей {len(data.customer_ids)}, блюд {len(data.dish_ids)}, '
+            f'заказов {len(data.order_ids)}.'
+        ))
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api import sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Переводит файл базы SQLite в режим журнала SQLITE_JOURNAL_MODE (по умолчанию WAL). '
+        'Режим хранится в самом файле — команда выполняется один раз при развёртывании.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Алиас в DATABASES.')
+        parser.add_argument('--mode', default=None, help='Режим журнала (WAL, DELETE, …); по умолчанию SQLITE_JOURNAL_MODE.')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        if alias not in settings.DATABASES:
+            raise CommandError(f'Нет алиаса {alias!r} в DATABASES.')
+        db = settings.DATABASES[alias]
+        if db['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Режим журнала задаётся только для SQLite.')
+
+        mode = sqlite.set_journal_mode(db['NAME'], options['mode'])
+        self.stdout.write(self.style.SUCCESS(f'{alias}: journal_mode={mode}.'))
@@ -0,0 +1,158 @@
+"""
+Раздача загруженных файлов (MEDIA_ROOT) в продакшене.
+
+- файлы с хэшем в имени (ContentAddressedStorage) отдаются с
+  `Cache-Control: immutable` на год и ETag = хэш содержимого;
+- остальные — с ETag по mtime/размеру и коротким кэшем;
+- поддерживаются If-None-Match / If-Modified-Since (304) и Range (206);
+- при MEDIA_ACCEL_REDIRECT = 'nginx' или 'sendfile' тело отдаёт фронтовой
+  прокси (X-Accel-Redirect / X-Sendfile), а воркер Python только пишет заголовки.
+"""
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.static import was_modified_since
+from django.views.decorators.http import require_safe
+
+from .storage import content_hash
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _RangeFile:
+    """Файл, из которого FileResponse прочитает не больше `length` байт."""
+
+    def __init__(self, fh, start, length):
+        self.fh = fh
+        self.fh.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+def _parse_range(header, size):
+    """(start, end) включительно, None — отдать весь файл, ValueError — 416."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # несколько диапазонов и прочие формы не поддерживаем — отдаём файл целиком
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def _accel_response(path, fullpath, content_type):
+    mode = getattr(settings, 'MEDIA_ACCEL_REDIRECT', None)
+    if mode == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + path
+        return response
+    if mode == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = str(fullpath)
+        return response
+    return None
+
+
+@require_safe
+def serve_media(request, path):
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден.')
+    if not fullpath.is_file():
+        raise Http404('Файл не найден.')
+
+    stat = fullpath.stat()
+    digest = content_hash(path)
+    if digest:
+        etag = f'"{digest}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        cache_control = DEFAULT_CACHE_CONTROL
+
+    validators = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': cache_control,
+    }
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        not_modified = etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+    else:
+        not_modified = not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime)
+    if not_modified:
+        response = HttpResponseNotModified()
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
+    content_type = mimetypes.guess_type(str(fullpath))[0] or 'application/octet-stream'
+
+    response = _accel_response(path, fullpath, content_type)
+    if response is None:
+        response = _file_response(request, fullpath, stat.st_size, etag, content_type)
+    for header, value in validators.items():
+        response[header] = value
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _file_response(request, fullpath, size, etag, content_type):
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            response = FileResponse(
+                _RangeFile(fullpath.open('rb'), start, length),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            return response
+
+    return FileResponse(fullpath.open('rb'), content_type=content_type)
@@ -0,0 +1,125 @@
+"""
+Кэш готовых (сериализованных) ответов меню повара: GET /api/dishes/?cook_id=N.
+
+Ключ включает токен маркера `dishes:cook:<id>` (api/versions.py), который
+сигналы меняют при создании, правке и удалении блюд повара — в том числе из
+админки. Поэтому старая запись просто перестаёт читаться, а меню других
+поваров остаётся в кэше.
+
+Промах защищён от «лавины»: ответ строит только тот, кто взял блокировку
+(cache.add), остальные ждут готовое значение до LOCK_WAIT секунд.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from . import versions
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+POLL_INTERVAL = 0.02
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'waits': 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    """Счётчики текущего процесса: hits, misses, waits и доля попаданий."""
+    with _stats_lock:
+        data = dict(_stats)
+    total = data['hits'] + data['misses']
+    data['hit_ratio'] = round(data['hits'] / total, 4) if total else None
+    return data
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def menu_key(cook_id, token, url):
+    digest = hashlib.sha1(url.encode()).hexdigest()
+    return f'menu:{cook_id}:{token}:{digest}'
+
+
+def get_or_build(key, build, timeout=None):
+    """
+    Возвращает (value, status), где status — 'HIT' или 'MISS'.
+    build() вызывается не более одного раза на ключ, пока держится блокировка.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'MENU_CACHE_TIMEOUT', 300)
+
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        return value, 'HIT'
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        # ответ уже строит другой запрос — ждём его результат
+        _count('waits')
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                _count('hits')
+                return value, 'HIT'
+        # не дождались — строим сами, но блокировку не трогаем
+        _count('misses')
+        return build(), 'MISS'
+
+    try:
+        _count('misses')
+        value = build()
+        if value is not None:
+            cache.set(key, value, timeout)
+        return value, 'MISS'
+    finally:
+        cache.delete(lock_key)
+
+
+class MenuCacheMixin:
+    """
+    Кэширует list() для запросов с cook_id. Ставится в MRO после
+    ConditionalGetMixin, чтобы 304 отдавался раньше обращения к кэшу.
+    """
+
+    def list(self, request, *args, **kwargs):
+        cook_id = request.query_params.get('cook_id')
+        if cook_id is None or not getattr(settings, 'MENU_CACHE_ENABLED', True):
+            return super().list(request, *args, **kwargs)
+
+        # маркер уже прочитан ConditionalGetMixin — повторный запрос не нужен
+        marker_key = versions.cook_dishes(cook_id)
+        markers = getattr(request, 'version_markers', None) or versions.get(marker_key)
+        token = markers[marker_key][0]
+
+        parent = super().list
+        responses = []
+
+        def build():
+            response = parent(request, *args, **kwargs)
+            responses.append(response)
+            return response.data if response.status_code == 200 else None
+
+        key = menu_key(cook_id, token, request.build_absolute_uri())
+        data, status = get_or_build(key, build)
+        if data is None:
+            return responses[0]
+        response = responses[0] if responses else Response(data)
+        response['X-Cache'] = status
+        # общий для всех пользователей ключ: сжатое меню тоже берётся из кэша (api/compression.py)
+        response.compression_cache_key = key
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_dish_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['created_at', 'id'], name='dish_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+
+
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_dish_fts USING fts5(
+        name, description,
+        content='api_dish', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_dish_fts_ai AFTER INSERT ON api_dish BEGIN
+        INSERT INTO api_dish_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_dish_fts_ad AFTER DELETE ON api_dish BEGIN
+        INSERT INTO api_dish_fts(api_dish_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_dish_fts_au AFTER UPDATE OF name, description ON api_dish BEGIN
+        INSERT INTO api_dish_fts(api_dish_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO api_dish_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO api_dish_fts(api_dish_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS api_dish_fts_ai',
+    'DROP TRIGGER IF EXISTS api_dish_fts_ad',
+    'DROP TRIGGER IF EXISTS api_dish_fts_au',
+    'DROP TABLE IF EXISTS api_dish_fts',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # FTS5 есть только в SQLite; на других СУБД поиск работает через icontains
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_dish_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FTS_SQL), _run(DROP_SQL)),
+    ]
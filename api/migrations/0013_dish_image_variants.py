@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_dish_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dish',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Заглушка фото (data URI)'),
+        ),
+        migrations.AddField(
+            model_name='dish',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Варианты фото'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_dish_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeMarker',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('token', models.CharField(max_length=32, verbose_name='Версия')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Маркер изменений',
+                'verbose_name_plural': 'Маркеры изменений',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+import uuid
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def seed_markers(apps, schema_editor):
+    # Маркеры для уже существующих меню: без них все старые меню делили бы
+    # «нулевую» версию, и кэш не отличал бы их состояние до и после миграции.
+    ChangeMarker = apps.get_model('api', 'ChangeMarker')
+    Dish = apps.get_model('api', 'Dish')
+    now = timezone.now()
+    cook_ids = Dish.objects.values_list('cook_id', flat=True).distinct()
+    keys = ['dishes', 'cooks', 'orders'] + [f'dishes:cook:{cook_id}' for cook_id in cook_ids]
+    ChangeMarker.objects.bulk_create(
+        [ChangeMarker(key=key, token=uuid.uuid4().hex, updated_at=now) for key in keys],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_changemarker'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_markers, migrations.RunPython.noop),
+    ]
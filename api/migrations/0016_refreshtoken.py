@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_seed_change_markers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=32, unique=True, verbose_name='Идентификатор')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата выдачи')),
+                ('expires_at', models.DateTimeField(verbose_name='Действует до')),
+                ('used_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата использования')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_tokens', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Refresh-токен',
+                'verbose_name_plural': 'Refresh-токены',
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:44
+
+from django.db import migrations, models
+
+
+def seed_sequence(apps, schema_editor):
+    # строка счётчика нужна сразу: первый UPDATE не должен гоняться за её созданием
+    ChangeSequence = apps.get_model('api', 'ChangeSequence')
+    ChangeSequence.objects.get_or_create(name='orders')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_refreshtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Название')),
+                ('value', models.PositiveBigIntegerField(default=0, verbose_name='Значение')),
+            ],
+            options={
+                'verbose_name': 'Счётчик изменений',
+                'verbose_name_plural': 'Счётчики изменений',
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Номер изменения'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, verbose_name='Номер изменения'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['cook', 'change_seq'], name='order_cook_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'change_seq'], name='order_customer_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['change_seq'], name='order_change_idx'),
+        ),
+        migrations.RunPython(seed_sequence, migrations.RunPython.noop),
+    ]
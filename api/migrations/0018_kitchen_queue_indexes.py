@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_order_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['cook', 'status', 'desired_ready_time'], name='order_cook_status_ready_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'status'], name='orderitem_order_status_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # точное время завершения старых заказов неизвестно — берём последнее изменение
+    Order = apps.get_model('api', 'Order')
+    Order.objects.filter(status='completed', completed_at__isnull=True).update(completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата завершения'),
+        ),
+        migrations.CreateModel(
+            name='CookDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('orders', models.IntegerField(default=0, verbose_name='Заказов')),
+                ('items', models.IntegerField(default=0, verbose_name='Порций')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Выручка')),
+                ('cook', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL, verbose_name='Повар')),
+            ],
+            options={
+                'verbose_name': 'Дневная сводка повара',
+                'verbose_name_plural': 'Дневные сводки поваров',
+                'constraints': [models.UniqueConstraint(fields=('cook', 'day'), name='cook_daily_stats_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DishDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('orders', models.IntegerField(default=0, verbose_name='Заказов')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Порций')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Выручка')),
+                ('cook', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='dish_daily_stats', to=settings.AUTH_USER_MODEL, verbose_name='Повар')),
+                ('dish', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.dish', verbose_name='Блюдо')),
+            ],
+            options={
+                'verbose_name': 'Дневная сводка блюда',
+                'verbose_name_plural': 'Дневные сводки блюд',
+                'indexes': [models.Index(fields=['cook', 'day'], name='dish_daily_cook_day_idx'), models.Index(fields=['day'], name='dish_daily_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dish', 'day'), name='dish_daily_stats_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+COUNTED = ('pending', 'accepted', 'in_progress')
+
+
+def fill_counters(apps, schema_editor):
+    Order = apps.get_model('api', 'Order')
+    CookOrderCounters = apps.get_model('api', 'CookOrderCounters')
+    rows = (
+        Order.objects.filter(status__in=COUNTED).values('cook_id')
+        .annotate(**{f'{name}_count': Count('id', filter=Q(status=name)) for name in COUNTED})
+        .order_by()
+    )
+    CookOrderCounters.objects.bulk_create(
+        CookOrderCounters(cook_id=row['cook_id'], **{name: row[f'{name}_count'] for name in COUNTED})
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CookOrderCounters',
+            fields=[
+                ('cook', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_counters', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Повар')),
+                ('pending', models.IntegerField(default=0, verbose_name='Новых')),
+                ('accepted', models.IntegerField(default=0, verbose_name='Принятых')),
+                ('in_progress', models.IntegerField(default=0, verbose_name='В процессе')),
+            ],
+            options={
+                'verbose_name': 'Счётчики заказов повара',
+                'verbose_name_plural': 'Счётчики заказов поваров',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
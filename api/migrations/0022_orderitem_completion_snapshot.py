@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:51
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def snapshot_completed(apps, schema_editor):
+    # уже учтённые в сводках позиции: цена блюда на момент миграции
+    Dish = apps.get_model('api', 'Dish')
+    OrderItem = apps.get_model('api', 'OrderItem')
+    OrderItem.objects.filter(order__status='completed').update(
+        unit_price=Subquery(Dish.objects.filter(pk=OuterRef('dish_id')).values('price')[:1]),
+        completed_quantity=F('quantity'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_cook_order_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='completed_quantity',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Количество при завершении'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True, verbose_name='Цена при завершении'),
+        ),
+        migrations.RunPython(snapshot_completed, migrations.RunPython.noop),
+    ]
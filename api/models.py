@@ -5,8 +5,12 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from contextlib import contextmanager
+
 from django.conf import settings
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F
+from django.utils import timezone
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -38,6 +42,12 @@ class User(AbstractUser):
         verbose_name='Избранные блюда'
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # списки поваров и проверки роли
+            models.Index(fields=['role'], name='user_role_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
@@ -59,8 +69,28 @@ class Dish(models.Model):
         blank=True,
         verbose_name='Фото блюда'
     )
+    # Заполняются в фоне (api/images.py): уменьшенные копии и размытая заглушка
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты фото'
+    )
+    image_placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Заглушка фото (data URI)'
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата добавления')
 
+    class Meta:
+        indexes = [
+            # keyset-пагинация каталога по (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='dish_created_id_idx'),
+            # меню повара в порядке добавления (та же keyset-пагинация)
+            models.Index(fields=['cook', 'created_at'], name='dish_cook_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} — {self.cook.username}"
 
@@ -80,6 +110,8 @@ class Order(models.Model):
         on_delete=models.CASCADE,
         limit_choices_to={'role': 'customer'},
         related_name='orders',
+        # покрывается составными индексами (customer, ...)
+        db_index=False,
         verbose_name='Заказчик'
     )
     cook = models.ForeignKey(
@@ -87,6 +119,8 @@ class Order(models.Model):
         on_delete=models.CASCADE,
         limit_choices_to={'role': 'cook'},
         related_name='orders_as_cook',
+        # покрывается составными индексами (cook, ...)
+        db_index=False,
         verbose_name='Повар'
     )
     dishes = models.ManyToManyField(Dish, through='OrderItem', verbose_name='Блюда')
@@ -109,13 +143,52 @@ class Order(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата заказа')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+    # Номер последнего изменения для GET /api/orders/changes/ (см. ChangeSequence)
+    change_seq = models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Номер изменения')
+    # Когда заказ последний раз перешёл в completed — день в отчётах (api/rollups.py)
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Дата завершения')
+
+    # статус, прочитанный из базы: по нему сигналы видят переход между статусами
+    _loaded_status = None
+    # поля вне ленты изменений: save(update_fields=...) только по ним не берёт change_seq
+    UNSTAMPED_FIELDS = frozenset({'completed_at'})
+
+    class Meta:
+        indexes = [
+            # ленты изменений повара и заказчика
+            models.Index(fields=['cook', 'change_seq'], name='order_cook_change_idx'),
+            models.Index(fields=['customer', 'change_seq'], name='order_customer_change_idx'),
+            models.Index(fields=['change_seq'], name='order_change_idx'),
+            # очередь кухни: открытые заказы повара по времени готовности
+            models.Index(fields=['cook', 'status', 'desired_ready_time'], name='order_cook_status_ready_idx'),
+            # списки заказов повара (с фильтром по статусу) и заказчика, новые сверху
+            models.Index(fields=['cook', 'status', 'created_at'], name='order_cook_status_created_idx'),
+            models.Index(fields=['cook', 'created_at'], name='order_cook_created_idx'),
+            models.Index(fields=['customer', 'created_at'], name='order_customer_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.status == 'completed' and self._loaded_status != 'completed':
+            self.completed_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'completed_at'}
+        with ChangeSequence.stamping(self, kwargs):
+            super().save(*args, **kwargs)
+        self._loaded_status = self.status
 
     def __str__(self):
         return f"Заказ #{self.id} от {self.customer.username}"
 
 
 class OrderItem(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, verbose_name='Заказ')
+    # индекс по order_id — первая колонка orderitem_order_status_idx
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, db_index=False, verbose_name='Заказ')
     dish = models.ForeignKey(Dish, on_delete=models.CASCADE, verbose_name='Блюдо')
     quantity = models.PositiveIntegerField(default=1, verbose_name='Количество')
     # Новый статус на уровне позиции заказа
@@ -130,6 +203,33 @@ class OrderItem(models.Model):
         default='confirmed',
         verbose_name='Статус блюда'
     )
+    change_seq = models.PositiveBigIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='Номер изменения'
+    )
+    # Учтено в дневных сводках при завершении заказа (api/rollups.py): при отмене
+    # завершения вычитаются ровно эти значения, а не текущие цена и количество
+    unit_price = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True, editable=False, verbose_name='Цена при завершении'
+    )
+    completed_quantity = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, verbose_name='Количество при завершении'
+    )
+
+    # поля вне ленты изменений: save(update_fields=...) только по ним не берёт change_seq
+    UNSTAMPED_FIELDS = frozenset({'unit_price', 'completed_quantity'})
+
+    class Meta:
+        indexes = [
+            # открытые позиции заказа (очередь кухни)
+            models.Index(fields=['order', 'status'], name='orderitem_order_status_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with ChangeSequence.stamping(self, kwargs):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.dish.name} x {self.quantity}"
@@ -159,4 +259,202 @@ class CartItem(models.Model):
         verbose_name_plural = 'Элементы корзины'
 
     def __str__(self):
-        return f"В корзине у {self.customer.username}: {self.dish.name} x {self.quantity}"
\ No newline at end of file
+        return f"В корзине у {self.customer.username}: {self.dish.name} x {self.quantity}"
+
+class ChangeMarker(models.Model):
+    """
+    Маркер версии набора данных (например, меню повара или заказов пользователя).
+    При любом изменении данных маркеру присваивается новый случайный token;
+    по токенам строятся ETag без выполнения выборок и сериализации (api/versions.py).
+    """
+    key = models.CharField(max_length=100, primary_key=True, verbose_name='Ключ')
+    token = models.CharField(max_length=32, verbose_name='Версия')
+    updated_at = models.DateTimeField(verbose_name='Дата изменения')
+
+    class Meta:
+        verbose_name = 'Маркер изменений'
+        verbose_name_plural = 'Маркеры изменений'
+
+    def __str__(self):
+        return f"{self.key}: {self.token}"
+
+
+class RefreshToken(models.Model):
+    """
+    Refresh-токен для подписанных access-токенов (api/tokens.py).
+    Каждый refresh-токен одноразовый: при обмене он помечается использованным
+    и выдаётся новый. Повторное предъявление использованного токена отзывает
+    все refresh-токены пользователя.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='refresh_tokens',
+        verbose_name='Пользователь'
+    )
+    jti = models.CharField(max_length=32, unique=True, verbose_name='Идентификатор')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата выдачи')
+    expires_at = models.DateTimeField(verbose_name='Действует до')
+    used_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата использования')
+
+    class Meta:
+        verbose_name = 'Refresh-токен'
+        verbose_name_plural = 'Refresh-токены'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.jti}"
+
+
+class ChangeSequence(models.Model):
+    """
+    Счётчик изменений заказов и позиций: каждая запись Order/OrderItem получает
+    следующий номер в change_seq. Номер выдаётся в той же транзакции, что и
+    запись, а UPDATE счётчика блокирует его до коммита, поэтому номера
+    становятся видны строго по возрастанию — курсор ленты изменений
+    (api/changes.py) не пропускает записи, закоммиченные позже.
+
+    Цена — одна строка на всех писателей заказов: транзакции с записью заказа
+    идут по очереди. Поэтому номер берётся только там, где он нужен ленте:
+    пачки получают номера одним UPDATE (stamp() перед bulk_create), а
+    save(update_fields=...) только по полям из UNSTAMPED_FIELDS модели
+    обходится без номера.
+    """
+    ORDERS = 'orders'
+
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='Название')
+    value = models.PositiveBigIntegerField(default=0, verbose_name='Значение')
+
+    class Meta:
+        verbose_name = 'Счётчик изменений'
+        verbose_name_plural = 'Счётчики изменений'
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+    @classmethod
+    def allocate(cls, count=1, name=ORDERS, using=None):
+        """Резервирует count номеров; возвращает последний. Вызывать внутри транзакции."""
+        manager = cls.objects.db_manager(using)
+        if not manager.filter(name=name).update(value=F('value') + count):
+            manager.get_or_create(name=name)
+            manager.filter(name=name).update(value=F('value') + count)
+        return manager.filter(name=name).values_list('value', flat=True).get()
+
+    @classmethod
+    def current(cls, name=ORDERS, using=None):
+        return cls.objects.db_manager(using).filter(name=name).values_list('value', flat=True).first() or 0
+
+    @classmethod
+    def stamp(cls, objs, using=None):
+        """Выдаёт номера объектам перед bulk_create (он не вызывает save())."""
+        last = cls.allocate(len(objs), using=using) if objs else 0
+        for seq, obj in enumerate(objs, start=last - len(objs) + 1):
+            obj.change_seq = seq
+        return objs
+
+    @classmethod
+    @contextmanager
+    def stamping(cls, instance, save_kwargs):
+        """Контекст для save(): номер и сама запись — в одной транзакции."""
+        using = save_kwargs.get('using') or router.db_for_write(type(instance), instance=instance)
+        update_fields = save_kwargs.get('update_fields')
+        if update_fields is not None:
+            # служебные поля не видны в ленте: такая запись не берёт номер и не ждёт
+            # блокировку строки счётчика
+            if not set(update_fields) - type(instance).UNSTAMPED_FIELDS:
+                yield
+                return
+            save_kwargs['update_fields'] = {*update_fields, 'change_seq'}
+        with transaction.atomic(using=using, savepoint=False):
+            instance.change_seq = cls.allocate(using=using)
+            yield
+
+
+class CookDailyStats(models.Model):
+    """
+    Дневная сводка повара по завершённым заказам. Обновляется при переходе
+    заказа в completed и обратно (api/rollups.py), пересобирается командой
+    rebuild_rollups.
+    """
+    cook = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        # покрывается уникальным индексом (cook, day)
+        db_index=False,
+        verbose_name='Повар'
+    )
+    day = models.DateField(verbose_name='День')
+    orders = models.IntegerField(default=0, verbose_name='Заказов')
+    items = models.IntegerField(default=0, verbose_name='Порций')
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Выручка')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cook', 'day'], name='cook_daily_stats_unique'),
+        ]
+        verbose_name = 'Дневная сводка повара'
+        verbose_name_plural = 'Дневные сводки поваров'
+
+    def __str__(self):
+        return f"{self.cook_id} {self.day}: {self.revenue}"
+
+
+class DishDailyStats(models.Model):
+    """Дневная сводка по блюду: в скольких заказах, сколько порций и выручка."""
+    dish = models.ForeignKey(
+        Dish,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='Блюдо'
+    )
+    # повар блюда — чтобы отчёт повара не соединялся с api_dish
+    cook = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='dish_daily_stats',
+        db_index=False,
+        verbose_name='Повар'
+    )
+    day = models.DateField(verbose_name='День')
+    orders = models.IntegerField(default=0, verbose_name='Заказов')
+    quantity = models.IntegerField(default=0, verbose_name='Порций')
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='Выручка')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dish', 'day'], name='dish_daily_stats_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['cook', 'day'], name='dish_daily_cook_day_idx'),
+            models.Index(fields=['day'], name='dish_daily_day_idx'),
+        ]
+        verbose_name = 'Дневная сводка блюда'
+        verbose_name_plural = 'Дневные сводки блюд'
+
+    def __str__(self):
+        return f"{self.dish_id} {self.day}: {self.quantity}"
+
+
+class CookOrderCounters(models.Model):
+    """
+    Число открытых заказов повара по статусам для GET /api/cooks/me/dashboard/.
+    Меняется в той же транзакции, что и статус заказа (api/dashboard.py).
+    """
+    cook = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='order_counters',
+        verbose_name='Повар'
+    )
+    pending = models.IntegerField(default=0, verbose_name='Новых')
+    accepted = models.IntegerField(default=0, verbose_name='Принятых')
+    in_progress = models.IntegerField(default=0, verbose_name='В процессе')
+
+    class Meta:
+        verbose_name = 'Счётчики заказов повара'
+        verbose_name_plural = 'Счётчики заказов поваров'
+
+    def __str__(self):
+        return f"{self.cook_id}: {self.pending}/{self.accepted}/{self.in_progress}"
@@ -0,0 +1,106 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-пагинация по паре (created_at, id).
+
+    Включается только по запросу клиента: если в query string нет ни
+    `cursor`, ни `page_size`, возвращается None и список отдаётся целиком,
+    как раньше. Следующая страница выбирается условием
+    (created_at, id) > (последний created_at, последний id), поэтому
+    стоимость страницы не зависит от глубины прокрутки, а COUNT(*) не нужен.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by('created_at', 'id')
+
+        cursor = self.decode_cursor(params.get(self.cursor_query_param))
+        if cursor is not None:
+            queryset = self.after(queryset, *cursor)
+
+        # берём на одну запись больше, чтобы понять, есть ли следующая страница
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    @staticmethod
+    def after(queryset, created_at, pk):
+        """Записи строго после (created_at, pk)."""
+        # created_at >= … даёт индексу (created_at, id) нижнюю границу;
+        # одно только OR-условие SQLite проверяет полным проходом индекса
+        return queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk),
+            created_at__gte=created_at,
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            created_raw, pk_raw = raw.rsplit('|', 1)
+            created_at = parse_datetime(created_raw)
+            pk = int(pk_raw)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def encode_cursor(self, obj):
+        # obj — модель или именованная строка values_list (api/read_serializers.py)
+        raw = f'{obj.created_at.isoformat()}|{obj.id}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,147 @@
+"""
+Проверка планов запросов горячих путей (команда index_advisor).
+
+representative_queries() воспроизводит запросы вьюсетов — по возможности теми
+же queryset-ами и функциями, что и сами вьюсеты. Для каждого выполняется
+EXPLAIN QUERY PLAN (SQLite), и в плане ищутся:
+
+  full_scan       — `SCAN <таблица>` без индекса: чтение всей таблицы;
+  full_index_scan — `SCAN <таблица> USING INDEX`: проход всего индекса без
+                    границ (допустим только там, где его обрывает LIMIT);
+  temp_btree      — `USE TEMP B-TREE`: сортировка или группировка в памяти.
+
+Запрос может явно разрешить проблему (allow) с пояснением — например,
+группировка в сводке кухни неизбежно строит временное B-дерево.
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.utils import timezone
+
+FULL_SCAN = 'full_scan'
+FULL_INDEX_SCAN = 'full_index_scan'
+TEMP_BTREE = 'temp_btree'
+
+_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(\S+)(?P<rest>.*)$')
+
+
+@dataclass
+class PlannedQuery:
+    name: str
+    queryset: object
+    allow: dict = field(default_factory=dict)  # проблема -> почему допустима
+
+
+@dataclass
+class PlanReport:
+    name: str
+    sql: str
+    plan: list
+    problems: list
+    allowed: list
+
+
+def _sample_ids(using):
+    User = get_user_model()
+    users = User.objects.using(using)
+    cook = users.filter(role='cook').values_list('id', flat=True).first() or 1
+    customer = users.filter(role='customer').values_list('id', flat=True).first() or 1
+    return cook, customer
+
+
+def representative_queries(using='default'):
+    from . import changes, kitchen
+    from .models import CartItem, Dish, OrderItem
+    from .pagination import KeysetPagination
+    from .views import OrderViewSet
+
+    User = get_user_model()
+    cook_id, customer_id = _sample_ids(using)
+    cook = User(id=cook_id, role='cook')
+    customer = User(id=customer_id, role='customer')
+    page = 21  # размер страницы + 1, как у KeysetPagination
+    orders = OrderViewSet.queryset.order_by('-created_at', '-id')
+    dishes = Dish.objects.select_related('cook').order_by('created_at', 'id')
+
+    return [
+        PlannedQuery(
+            'dishes: каталог, первая страница',
+            dishes[:page],
+            allow={FULL_INDEX_SCAN: 'проход по индексу (created_at, id) обрывается LIMIT'},
+        ),
+        PlannedQuery(
+            'dishes: каталог, следующая страница',
+            KeysetPagination.after(dishes, timezone.now(), 1)[:page],
+        ),
+        PlannedQuery('dishes: меню повара', dishes.filter(cook__id=cook_id)[:page]),
+        PlannedQuery('users: список поваров', User.objects.filter(role='cook')),
+        PlannedQuery('orders: заказы повара', orders.filter(cook=cook)),
+        PlannedQuery(
+            'orders: заказы повара по статусу',
+            orders.filter(cook=cook, status__in=['pending', 'accepted']),
+        ),
+        PlannedQuery('orders: заказы заказчика', orders.filter(customer=customer)),
+        PlannedQuery(
+            'orders: позиции страницы заказов',
+            OrderItem.objects.select_related('dish__cook').filter(order_id__in=[1, 2, 3]),
+        ),
+        PlannedQuery(
+            'order-items: позиции повара',
+            OrderItem.objects.select_related('dish__cook').filter(order__cook=cook),
+        ),
+        PlannedQuery(
+            'orders/changes: заказы после курсора',
+            changes.visible_orders(cook).filter(change_seq__gt=0).order_by('change_seq')[:page],
+        ),
+        PlannedQuery(
+            'orders/changes: позиции после курсора',
+            changes.visible_items(customer).filter(change_seq__gt=0).order_by('change_seq')[:page],
+            allow={TEMP_BTREE: 'сортируются только позиции пользователя из окна курсора'},
+        ),
+        PlannedQuery(
+            'kitchen: очередь',
+            kitchen.queue_queryset(cook),
+            allow={TEMP_BTREE: 'сортировка по полям заказа после соединения; только открытые позиции повара'},
+        ),
+        PlannedQuery(
+            'kitchen: сводка по блюдам',
+            kitchen.batches_queryset(cook),
+            allow={TEMP_BTREE: 'GROUP BY и сортировка по сроку среди открытых позиций повара'},
+        ),
+        PlannedQuery('cart: корзина', CartItem.objects.filter(customer=customer).select_related('dish__cook')),
+    ]
+
+
+def explain(queryset, using='default'):
+    """(SQL, строки EXPLAIN QUERY PLAN: [(id, parent, detail), ...])."""
+    sql, params = queryset.query.sql_with_params()
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        rows = cursor.fetchall()
+    return str(queryset.query), [(row[0], row[1], row[-1]) for row in rows]
+
+
+def find_problems(plan):
+    """[(проблема, строка плана), ...]: полные проходы таблиц и индексов, временные B-деревья."""
+    problems = []
+    for _, _, detail in plan:
+        scan = _SCAN.match(detail)
+        if scan and 'VIRTUAL TABLE' not in scan['rest']:
+            problems.append((FULL_INDEX_SCAN if 'USING' in scan['rest'] else FULL_SCAN, detail))
+        elif 'USE TEMP B-TREE' in detail:
+            problems.append((TEMP_BTREE, detail))
+    return problems
+
+
+def check(using='default'):
+    """Планы всех представительных запросов: список PlanReport."""
+    reports = []
+    for query in representative_queries(using):
+        sql, plan = explain(query.queryset.using(using), using)
+        problems, allowed = [], []
+        for kind, detail in find_problems(plan):
+            (allowed if kind in query.allow else problems).append((kind, detail))
+        reports.append(PlanReport(query.name, sql, plan, problems, allowed))
+    return reports
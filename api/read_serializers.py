@@ -0,0 +1,165 @@
+"""
+Быстрый путь чтения для списков блюд, заказов и корзины.
+
+На больших списках DishSerializer, OrderSerializer и CartItemSerializer тратят
+основное время не на запросы, а на механику DRF: привязку полей, цепочки
+атрибутов source='cook.username', вызовы SerializerMethodField. Здесь тот же
+вывод собирается из кортежей values_list() в обычные dict: поля в том же
+порядке и в том же формате, поэтому JSON побайтно совпадает с исходными
+сериализаторами (это проверяют тесты).
+
+Только чтение и только list(): запись и retrieve идут через обычные
+сериализаторы. Включается settings.FAST_READ_SERIALIZERS. Новое поле в
+исходном сериализаторе нужно добавить и сюда — иначе упадут тесты на
+совпадение.
+"""
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .models import Dish, OrderItem
+
+DISH_COLUMNS = (
+    'id', 'name', 'description', 'price', 'cook__username', 'cook_id', 'cook__address',
+    'image', 'image_variants', 'image_placeholder', 'created_at',
+)
+ORDER_COLUMNS = (
+    'id', 'customer__username', 'cook__username', 'status', 'created_at', 'updated_at',
+    'rejection_reason', 'desired_ready_time',
+)
+ORDER_ITEM_COLUMNS = ('order_id', 'id', 'quantity', 'status', *(f'dish__{name}' for name in DISH_COLUMNS))
+CART_ITEM_COLUMNS = ('id', 'quantity', *(f'dish__{name}' for name in DISH_COLUMNS))
+
+_datetime = serializers.DateTimeField()
+_price = Dish._meta.get_field('price')
+_money = serializers.DecimalField(max_digits=_price.max_digits, decimal_places=_price.decimal_places)
+
+
+def _datetime_formatter():
+    """
+    Как DateTimeField.to_representation, но часовой пояс берётся один раз на
+    список: поиск текущего пояса на каждое значение — заметная доля времени.
+    """
+    if api_settings.DATETIME_FORMAT != ISO_8601 or not settings.USE_TZ:
+        return lambda value: _datetime.to_representation(value) if value else None
+    tz = timezone.get_current_timezone()
+
+    def to_representation(value):
+        if not value:
+            return None
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_representation
+
+
+class DishReadSerializer:
+    """Вывод DishSerializer из строк DISH_COLUMNS."""
+    columns = DISH_COLUMNS
+
+    def __init__(self, request=None):
+        self.storage = Dish._meta.get_field('image').storage
+        self.absolute = request.build_absolute_uri if request is not None else None
+        self.datetime = _datetime_formatter()
+
+    def rows(self, queryset):
+        # named=True: KeysetPagination берёт created_at и id последней строки для курсора
+        return queryset.prefetch_related(None).values_list(*self.columns, named=True)
+
+    def _url(self, name):
+        url = self.storage.url(name)
+        return self.absolute(url) if self.absolute is not None else url
+
+    def dish(self, row):
+        (pk, name, description, price, cook, cook_id, cook_address,
+         image, variants, placeholder, created_at) = row
+        url = self._url(image) if image else None
+        sizes = (variants or {}).get('sizes')
+        return {
+            'id': pk,
+            'name': name,
+            'description': description,
+            'price': _money.to_representation(price),
+            'cook': cook,
+            'cook_id': cook_id,
+            'cook_address': cook_address,
+            'image': url,
+            'image_url': url,
+            'image_variants': {
+                label: {
+                    key: self._url(value) if key in ('jpeg', 'webp') else value
+                    for key, value in entry.items()
+                }
+                for label, entry in sizes.items()
+            } if sizes else None,
+            'image_placeholder': placeholder or None,
+            'created_at': self.datetime(created_at),
+        }
+
+    def to_representation(self, rows):
+        return [self.dish(row) for row in rows]
+
+
+class OrderReadSerializer(DishReadSerializer):
+    """Вывод OrderSerializer: заказы из ORDER_COLUMNS, позиции — вторым запросом на всю страницу."""
+    columns = ORDER_COLUMNS
+
+    def items(self, order_ids):
+        # тот же запрос, что Prefetch('orderitem_set', select_related('dish__cook')) во вьюсете,
+        # поэтому и порядок позиций тот же
+        by_order = {}
+        for row in OrderItem.objects.select_related('dish__cook').filter(order_id__in=order_ids) \
+                .values_list(*ORDER_ITEM_COLUMNS):
+            by_order.setdefault(row[0], []).append({
+                'id': row[1],
+                'dish': self.dish(row[4:]),
+                'quantity': row[2],
+                'status': row[3],
+            })
+        return by_order
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        items = self.items([row[0] for row in rows]) if rows else {}
+        return [
+            {
+                'id': pk,
+                'customer': customer,
+                'cook': cook,
+                'status': status,
+                'created_at': self.datetime(created_at),
+                'updated_at': self.datetime(updated_at),
+                'items': items.get(pk, []),
+                'rejection_reason': rejection_reason,
+                'desired_ready_time': self.datetime(desired_ready_time),
+            }
+            for pk, customer, cook, status, created_at, updated_at, rejection_reason, desired_ready_time in rows
+        ]
+
+
+class CartItemReadSerializer(DishReadSerializer):
+    """Вывод CartItemSerializer: позиция корзины с блюдом одной строкой."""
+    columns = CART_ITEM_COLUMNS
+
+    def to_representation(self, rows):
+        return [{'id': row[0], 'dish': self.dish(row[2:]), 'quantity': row[1]} for row in rows]
+
+
+class FastReadMixin:
+    """
+    list() через read_serializer_class, если включён FAST_READ_SERIALIZERS.
+    Ставится в MRO прямо перед ModelViewSet: кэш меню и условные GET
+    работают поверх него как раньше.
+    """
+    read_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.read_serializer_class is None or not getattr(settings, 'FAST_READ_SERIALIZERS', True):
+            return super().list(request, *args, **kwargs)
+        reader = self.read_serializer_class(request)
+        rows = reader.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.to_representation(page))
+        return Response(reader.to_representation(rows))
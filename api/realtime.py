@@ -0,0 +1,186 @@
+"""
+Push-канал событий заказов поверх ASGI (см. Backend/asgi.py).
+
+  GET /api/events/stream/  — Server-Sent Events (text/event-stream)
+  WS  /api/events/ws/      — WebSocket, события приходят JSON-сообщениями
+
+Авторизация — подписанный access-токен или обычный DB-токен, в заголовке
+Authorization (`Bearer …` / `Token …`) или в параметре `?token=` (EventSource
+в браузере не умеет ставить заголовки). Пользователь получает события только
+из своего канала `user:<id>`: заказы, где он заказчик или повар.
+
+SSE поддерживает Last-Event-ID (заголовок или `?last_event_id=`).
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+
+from . import events, tokens
+
+SSE_PATH = '/api/events/stream/'
+WS_PATH = '/api/events/ws/'
+HEARTBEAT_INTERVAL = 15
+
+
+def _headers(scope):
+    return {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+
+
+def _query(scope):
+    return {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+
+
+def _db_token_user(key):
+    from rest_framework.authtoken.models import Token
+    token = Token.objects.select_related('user').filter(key=key).first()
+    if token is None or not token.user.is_active:
+        return None
+    return token.user.pk
+
+
+async def authenticate(scope):
+    """Возвращает id пользователя или None."""
+    headers, query = _headers(scope), _query(scope)
+    keyword, _, value = headers.get('authorization', '').partition(' ')
+    if not value and 'token' in query:
+        value = query['token']
+        keyword = 'Bearer' if ':' in value else 'Token'
+
+    if keyword.lower() == 'bearer':
+        try:
+            return tokens.read_access(value)[0]
+        except tokens.InvalidToken:
+            return None
+    if keyword.lower() == 'token' and value:
+        return await sync_to_async(_db_token_user)(value)
+    return None
+
+
+def _last_event_id(scope):
+    raw = _headers(scope).get('last-event-id') or _query(scope).get('last_event_id')
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+async def _send_status(send, status, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(body, ensure_ascii=False).encode()})
+
+
+async def sse_app(scope, receive, send):
+    user_id = await authenticate(scope)
+    if user_id is None:
+        await _send_status(send, 401, {'detail': 'Учётные данные не были предоставлены.'})
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            # nginx не должен буферизовать поток
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+
+    async def on_event(event_id, event):
+        chunk = f'id: {event_id}\nevent: {event["type"]}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n'
+        await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+
+    async def on_idle():
+        # комментарий-пульс держит соединение через прокси
+        await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+
+    await _stream(scope, receive, 'http.disconnect', user_id, on_event, on_idle)
+
+
+async def _wait_disconnect(receive, message_type):
+    while True:
+        message = await receive()
+        if message['type'] == message_type:
+            return message
+
+
+async def _stream(scope, receive, disconnect_type, user_id, on_event, on_idle=None):
+    """
+    Перекладывает события подписки в on_event, пока клиент не отключится.
+    Подписку читает отдельная задача через очередь: отмена ожидания по
+    таймауту пульса не должна закрывать сам генератор подписки.
+    """
+    subscription = events.get_broker().subscribe([events.user_channel(user_id)], _last_event_id(scope))
+    queue = asyncio.Queue()
+
+    async def pump():
+        async for item in subscription:
+            await queue.put(item)
+
+    pump_task = asyncio.ensure_future(pump())
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive, disconnect_type))
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnected},
+                timeout=HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter in done:
+                await on_event(*getter.result())
+                continue
+            getter.cancel()
+            if disconnected in done:
+                break
+            if on_idle is not None:
+                await on_idle()
+    finally:
+        disconnected.cancel()
+        pump_task.cancel()
+        try:
+            await pump_task
+        except asyncio.CancelledError:
+            pass
+        await subscription.aclose()
+
+
+async def websocket_app(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    user_id = await authenticate(scope)
+    if user_id is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+    await send({'type': 'websocket.accept'})
+
+    async def on_event(event_id, event):
+        await send({'type': 'websocket.send', 'text': json.dumps({'id': event_id, **event}, ensure_ascii=False)})
+
+    await _stream(scope, receive, 'websocket.disconnect', user_id, on_event)
+
+
+class EventsRouter:
+    """Отдаёт пути push-канала, всё остальное передаёт Django."""
+
+    def __init__(self, django_app):
+        self.django_app = django_app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get('path')
+        if scope['type'] == 'http' and path == SSE_PATH:
+            return await sse_app(scope, receive, send)
+        if scope['type'] == 'websocket':
+            if path == WS_PATH:
+                return await websocket_app(scope, receive, send)
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        return await self.django_app(scope, receive, send)
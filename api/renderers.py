@@ -0,0 +1,83 @@
+"""
+Рендереры ответов API и выбор между ними.
+
+FastJSONRenderer — тот же JSON, что у rest_framework.renderers.JSONRenderer
+(байт в байт), но через orjson: datetime, date, UUID, tuple и словари с
+нестроковыми ключами кодируются в C, остальное (Decimal, ленивые строки,
+timedelta, QuerySet) — тем же JSONEncoder.default, что и у DRF. Отступы
+(`Accept: application/json; indent=4`) и значения, которые orjson не умеет
+(целые больше 64 бит), уходят в стандартный рендерер.
+
+MessagePackRenderer — компактный бинарный формат для мобильных клиентов
+(`Accept: application/msgpack`). Нужен пакет msgpack; без него рендерер не
+включается в settings.
+
+BrowsableAPINegotiation — HTML-страницы браузерного API (формы со всеми
+связанными объектами) отдаются только в DEBUG или админу, остальные
+браузерные запросы получают JSON.
+"""
+import orjson
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.utils import encoders
+
+try:
+    import msgpack
+except ImportError:  # необязательная зависимость
+    msgpack = None
+
+_encoder = encoders.JSONEncoder()
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # формат настроен в REST_FRAMEWORK не по умолчанию или нужен отступ — как у DRF
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # как и DRF, экранируем U+2028/U+2029: ответ остаётся подмножеством JavaScript
+        for raw, escaped in _LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # даты и Decimal — в те же значения, что и в JSON
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+def browsable_api_allowed(request):
+    if settings.DEBUG:
+        return True
+    # здесь аутентификация выполняется раньше обычного; ошибка токена
+    # даст тот же 401, что и без браузерного API
+    user = request.user
+    return user.is_authenticated and getattr(user, 'role', None) == 'admin'
+
+
+class BrowsableAPINegotiation(DefaultContentNegotiation):
+    """Не выбирает BrowsableAPIRenderer, если browsable_api_allowed() ложно."""
+
+    def select_renderer(self, request, renderers_, format_suffix=None):
+        renderer, media_type = super().select_renderer(request, renderers_, format_suffix)
+        if not isinstance(renderer, renderers.BrowsableAPIRenderer) or browsable_api_allowed(request):
+            return renderer, media_type
+        others = [item for item in renderers_ if not isinstance(item, renderers.BrowsableAPIRenderer)]
+        return super().select_renderer(request, others, format_suffix)
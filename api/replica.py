@@ -0,0 +1,37 @@
+"""
+Обновление файловой реплики SQLite через backup API (команда refresh_read_replica).
+
+Копия пишется во временный файл рядом с репликой и подменяет её атомарно
+(os.replace): открытые соединения дочитывают старый файл, новые видят
+свежий снимок. Основная база во время копирования доступна на запись —
+backup API копирует страницы порциями.
+"""
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+PAGES_PER_STEP = 1024
+
+
+def refresh(source, target):
+    """Копирует SQLite-базу source в target. Возвращает размер копии в байтах."""
+    target = Path(target)
+    fd, tmp = tempfile.mkstemp(prefix=f'.{target.name}.', dir=target.parent)
+    os.close(fd)
+    try:
+        src = sqlite3.connect(str(source))
+        dst = sqlite3.connect(tmp)
+        try:
+            src.backup(dst, pages=PAGES_PER_STEP)
+            # реплика только читается: журнал отката ей не нужен между обновлениями
+            dst.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            dst.close()
+            src.close()
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return target.stat().st_size
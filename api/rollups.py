@@ -0,0 +1,174 @@
+"""
+Дневные сводки для отчётов: CookDailyStats и DishDailyStats.
+
+Заказ попадает в сводки, когда переходит в completed, и вычитается из них,
+если уходит из этого статуса или удаляется. День — локальная дата
+Order.completed_at. При завершении в позициях запоминаются цена блюда и
+количество (OrderItem.unit_price, completed_quantity): выручка считается по
+ним, и при отмене завершения вычитаются ровно те суммы, что были добавлены,
+даже если цену блюда или позицию с тех пор изменили. Позиции, добавленные к
+уже завершённому заказу, в сводки не попадают до следующего завершения.
+
+Обновление идёт в той же транзакции, что и сохранение заказа (сигналы в
+api/signals.py). Поэтому отчёты читают только маленькие таблицы сводок,
+а не все заказы. Команда rebuild_rollups пересобирает сводки из истории.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CookDailyStats, Dish, DishDailyStats, Order, OrderItem
+
+COMPLETED = 'completed'
+_money = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _revenue():
+    return Sum(F('completed_quantity') * F('unit_price'), output_field=_money)
+
+
+def _snapshot(items):
+    """Запоминает в позициях текущую цену блюда и количество."""
+    items.update(
+        unit_price=Subquery(Dish.objects.filter(pk=OuterRef('dish_id')).values('price')[:1]),
+        completed_quantity=F('quantity'),
+    )
+
+
+def _increment(model, keys, defaults, deltas):
+    """UPDATE … SET x = x + d; если строки нет — INSERT (с повтором UPDATE при гонке)."""
+    changes = {name: F(name) + value for name, value in deltas.items()}
+    if model.objects.filter(**keys).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **defaults, **deltas)
+    except IntegrityError:
+        model.objects.filter(**keys).update(**changes)
+
+
+def apply_order(order, sign=1):
+    """Добавляет (sign=1) или вычитает (sign=-1) завершённый заказ из сводок."""
+    day = timezone.localdate(order.completed_at or timezone.now())
+    items = OrderItem.objects.filter(order_id=order.id)
+    if sign > 0:
+        _snapshot(items)
+    counted = items.filter(unit_price__isnull=False)
+    lines = list(
+        counted.values('dish_id', 'dish__cook_id')
+        .annotate(total_quantity=Sum('completed_quantity'), total_revenue=_revenue())
+        .order_by()
+    )
+    if sign < 0:
+        counted.update(unit_price=None, completed_quantity=None)
+    _increment(
+        CookDailyStats,
+        {'cook_id': order.cook_id, 'day': day},
+        {},
+        {
+            'orders': sign,
+            'items': sign * sum(line['total_quantity'] for line in lines),
+            'revenue': sign * sum((line['total_revenue'] for line in lines), Decimal('0')),
+        },
+    )
+    for line in lines:
+        _increment(
+            DishDailyStats,
+            {'dish_id': line['dish_id'], 'day': day},
+            {'cook_id': line['dish__cook_id']},
+            {'orders': sign, 'quantity': sign * line['total_quantity'], 'revenue': sign * line['total_revenue']},
+        )
+
+
+def on_order_saved(order, previous_status):
+    if order.status == COMPLETED and previous_status != COMPLETED:
+        apply_order(order, 1)
+    elif previous_status == COMPLETED and order.status != COMPLETED:
+        apply_order(order, -1)
+
+
+def on_order_deleted(order):
+    if order._loaded_status == COMPLETED:
+        apply_order(order, -1)
+
+
+def rebuild(batch_size=1000):
+    """
+    Пересобирает сводки из всех завершённых заказов. Возвращает (строк поваров, строк блюд).
+    Позициям завершённых заказов без запомненной цены (bulk_create, старые
+    данные) она проставляется по текущей цене блюда.
+    """
+    day = TruncDate('completed_at', tzinfo=timezone.get_current_timezone())
+    item_day = TruncDate('order__completed_at', tzinfo=timezone.get_current_timezone())
+
+    with transaction.atomic():
+        _snapshot(OrderItem.objects.filter(order__status=COMPLETED, unit_price__isnull=True))
+        items = OrderItem.objects.filter(order__status=COMPLETED, unit_price__isnull=False).annotate(day=item_day)
+        cook_rows = {
+            (row['cook_id'], row['day']): CookDailyStats(cook_id=row['cook_id'], day=row['day'], orders=row['orders'])
+            for row in Order.objects.filter(status=COMPLETED).annotate(day=day)
+            .values('cook_id', 'day').annotate(orders=Count('id')).order_by()
+        }
+        totals = items.values('order__cook_id', 'day').annotate(
+            total_quantity=Sum('completed_quantity'), total_revenue=_revenue(),
+        )
+        for row in totals.order_by():
+            stats = cook_rows[row['order__cook_id'], row['day']]
+            stats.items, stats.revenue = row['total_quantity'], row['total_revenue']
+
+        dish_rows = [
+            DishDailyStats(
+                dish_id=row['dish_id'],
+                cook_id=row['dish__cook_id'],
+                day=row['day'],
+                orders=row['order_count'],
+                quantity=row['total_quantity'],
+                revenue=row['total_revenue'],
+            )
+            for row in items.values('dish_id', 'dish__cook_id', 'day')
+            .annotate(
+                order_count=Count('order_id', distinct=True),
+                total_quantity=Sum('completed_quantity'),
+                total_revenue=_revenue(),
+            )
+            .order_by()
+        ]
+
+        CookDailyStats.objects.all().delete()
+        DishDailyStats.objects.all().delete()
+        CookDailyStats.objects.bulk_create(cook_rows.values(), batch_size=batch_size)
+        DishDailyStats.objects.bulk_create(dish_rows, batch_size=batch_size)
+    return len(cook_rows), len(dish_rows)
+
+
+def _period(params, default_days):
+    date_to = params.get('date_to') or timezone.localdate()
+    date_from = params.get('date_from') or date_to - timedelta(days=default_days - 1)
+    return date_from, date_to
+
+
+def cook_daily(params, cook_id=None):
+    """Строки CookDailyStats за период (по умолчанию — 30 дней); cook_id=None — все повара."""
+    date_from, date_to = _period(params, 30)
+    rows = CookDailyStats.objects.filter(day__range=(date_from, date_to))
+    if cook_id is not None:
+        rows = rows.filter(cook_id=cook_id)
+    return rows.order_by('day', 'cook_id')
+
+
+def top_dishes(params, cook_id=None):
+    """Самые популярные блюда за период (по умолчанию — 7 дней)."""
+    date_from, date_to = _period(params, 7)
+    rows = DishDailyStats.objects.filter(day__range=(date_from, date_to))
+    if cook_id is not None:
+        rows = rows.filter(cook_id=cook_id)
+    order_by = params.get('order_by', 'quantity')
+    return (
+        rows.values('dish_id', 'cook_id', dish_name=F('dish__name'))
+        .annotate(total_orders=Sum('orders'), total_quantity=Sum('quantity'), total_revenue=Sum('revenue'))
+        .order_by(f'-total_{order_by}', 'dish_id')[:params.get('limit', 10)]
+    )
@@ -0,0 +1,114 @@
+"""
+Полнотекстовый поиск по блюдам (SQLite FTS5).
+
+Индекс `api_dish_fts` — external-content таблица над `api_dish`: текст не
+дублируется, а синхронизация идёт триггерами на INSERT/UPDATE/DELETE, поэтому
+в индекс попадают и правки через админку, и каскадное удаление блюд вместе с
+поваром, и bulk-операции. Токенизатор unicode61 приводит к нижнему регистру
+любые буквы (в том числе кириллицу), чего не умеет LIKE в SQLite.
+
+На других СУБД поиск откатывается к icontains.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+
+from .models import Dish
+
+FTS_TABLE = 'api_dish_fts'
+
+# Вес совпадений в названии выше, чем в описании (аргументы bm25 по колонкам)
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _install_statements():
+    dish = Dish._meta.db_table
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            name, description,
+            content='{dish}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {dish} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {dish} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON {dish} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        """,
+    ]
+
+
+def is_enabled(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite'
+
+
+def ensure_index(using=DEFAULT_DB_ALIAS):
+    """
+    Создаёт таблицу индекса и триггеры, если их нет.
+    Нужна после миграций, пересоздающих таблицу `api_dish`: SQLite при этом
+    удаляет триггеры старой таблицы.
+    """
+    if not is_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        for statement in _install_statements():
+            cursor.execute(statement)
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Полностью перестраивает индекс по текущему содержимому `api_dish`."""
+    if not is_enabled(using):
+        return
+    ensure_index(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def build_match_query(term):
+    """
+    'суп кур' -> '"суп"* "кур"*': все слова обязательны, каждое — как префикс.
+    Спецсимволы синтаксиса FTS5 отбрасываются вместе с пунктуацией.
+    """
+    tokens = _TOKEN_RE.findall(term)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_dishes(queryset, term):
+    """
+    Фильтрует queryset блюд по поисковой строке и сортирует по релевантности.
+    Сортировку можно перекрыть последующим order_by (например, пагинацией).
+    """
+    match = build_match_query(term)
+    if match is None or not is_enabled(queryset.db):
+        return queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+
+    dish = Dish._meta.db_table
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {dish}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+        select={'search_rank': f'bm25({FTS_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT})'},
+        order_by=['search_rank', 'id'],
+    )
@@ -0,0 +1,201 @@
+"""
+Синтетические данные: администраторы, повара, блюда, покупатели, заказы с
+позициями, корзины и избранное. Используются командами seed_scale и
+bench_endpoints.
+
+Строки генерирует api/synthetic.py — порциями, при workers > 1 в пуле
+процессов; здесь они вставляются bulk_create. Всё определяется параметром
+seed: те же Volumes и seed дают те же строки при любом числе процессов.
+
+- id задаются явно, подряд после текущего максимума: порции генерируются
+  независимо и ссылаются друг на друга индексами.
+- Пароль у всех пользователей один, и хеш считается один раз — PBKDF2 на
+  каждого пользователя занял бы часы.
+- Даты создания разбросаны по истории (days дней до now), поэтому auto_now
+  и auto_now_add на время вставки отключены.
+- bulk_create не вызывает сигналы: номера изменений выдаются здесь, маркеры
+  версий, сводки отчётов и счётчики панели повара обновляются в конце.
+"""
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import dashboard, rollups, synthetic, versions
+from .models import CartItem, ChangeSequence, Dish, Order, OrderItem, User
+
+DEFAULT_PASSWORD = 'seed-password'
+
+
+@dataclass
+class Dataset:
+    """Диапазоны id созданных записей."""
+    admin_ids: range
+    cook_ids: range
+    customer_ids: range
+    dish_ids: range
+    order_ids: range
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+@contextmanager
+def _keep_timestamps(*fields):
+    """Временно отключает auto_now/auto_now_add: bulk_create сохранит заданные даты."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _generate(pool, workers, func, total, chunk_size, *args):
+    """
+    (start, stop, func(start, stop, *args)) по порциям [0, total) в порядке порций;
+    в работе не больше 2 × workers порций, чтобы готовые не копились в памяти.
+    """
+    bounds = synthetic.chunks(total, chunk_size)
+    if pool is None:
+        for start, stop in bounds:
+            yield start, stop, func(start, stop, *args)
+        return
+    pending = deque()
+    for start, stop in bounds:
+        pending.append((start, stop, pool.submit(func, start, stop, *args)))
+        if len(pending) >= 2 * workers:
+            start, stop, future = pending.popleft()
+            yield start, stop, future.result()
+    while pending:
+        start, stop, future = pending.popleft()
+        yield start, stop, future.result()
+
+
+def populate(volumes, seed=0, prefix='seed-', password=DEFAULT_PASSWORD, days=90, now=None,
+             chunk_size=5000, batch_size=1000, workers=1, log=None):
+    """
+    Создаёт данные объёма volumes в одной транзакции и возвращает Dataset.
+    Даты отсчитываются от now (по умолчанию — момент запуска).
+    """
+    log = log or (lambda message: None)
+    if User.objects.filter(username__startswith=prefix).exists():
+        raise ValueError(f'Пользователи с префиксом «{prefix}» уже есть — задайте другой префикс.')
+
+    password_hash = make_password(password)
+    now = now or timezone.now()
+    dish_count = volumes.cooks * volumes.dishes_per_cook
+    # порождённые процессы не наследуют открытое соединение с SQLite, в отличие от fork
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) if workers > 1 else None
+
+    with pool or nullcontext(), transaction.atomic(), _keep_timestamps(
+        Dish._meta.get_field('created_at'),
+        Order._meta.get_field('created_at'),
+        Order._meta.get_field('updated_at'),
+    ):
+        user_id = _next_id(User)
+        ids = {}
+        for role, count in (('admin', volumes.admins), ('cook', volumes.cooks), ('customer', volumes.customers)):
+            ids[role] = range(user_id, user_id + count)
+            user_id += count
+            for start, stop, rows in _generate(pool, workers, synthetic.users, count, chunk_size, seed, role, prefix):
+                User.objects.bulk_create([
+                    User(
+                        id=ids[role][start + offset],
+                        username=username,
+                        first_name=first_name,
+                        last_name=last_name,
+                        phone_number=phone,
+                        address=address,
+                        role=role,
+                        is_staff=role == 'admin',
+                        password=password_hash,
+                        date_joined=now,
+                    )
+                    for offset, (username, first_name, last_name, phone, address) in enumerate(rows)
+                ], batch_size)
+                log(f'{role}: {stop}/{count}')
+
+        dish_id = _next_id(Dish)
+        dish_ids = range(dish_id, dish_id + dish_count)
+        generated = _generate(
+            pool, workers, synthetic.dishes, dish_count, chunk_size, seed, volumes.dishes_per_cook, now, days,
+        )
+        for start, stop, rows in generated:
+            Dish.objects.bulk_create([
+                Dish(
+                    id=dish_ids[start + offset],
+                    cook_id=ids['cook'][cook],
+                    name=name,
+                    description=description,
+                    price=price,
+                    created_at=created_at,
+                )
+                for offset, (cook, name, description, price, created_at) in enumerate(rows)
+            ], batch_size)
+            log(f'dish: {stop}/{dish_count}')
+
+        order_id = _next_id(Order)
+        order_ids = range(order_id, order_id + volumes.orders)
+        generated = _generate(pool, workers, synthetic.orders, volumes.orders, chunk_size, seed, volumes, now, days)
+        for start, stop, (rows, items) in generated:
+            Order.objects.bulk_create(ChangeSequence.stamp([
+                Order(
+                    id=order_ids[start + offset],
+                    customer_id=ids['customer'][customer],
+                    cook_id=ids['cook'][cook],
+                    status=status,
+                    rejection_reason=reason,
+                    desired_ready_time=ready,
+                    created_at=created_at,
+                    updated_at=updated_at,
+                    completed_at=completed_at,
+                )
+                for offset, (customer, cook, status, reason, ready, created_at, updated_at, completed_at)
+                in enumerate(rows)
+            ]), batch_size)
+            OrderItem.objects.bulk_create(ChangeSequence.stamp([
+                OrderItem(order_id=order_ids[order], dish_id=dish_ids[dish], quantity=quantity, status=status)
+                for order, dish, quantity, status in items
+            ]), batch_size)
+            log(f'order: {stop}/{volumes.orders}')
+
+        favorite = User.favorite_dishes.through
+        generated = _generate(pool, workers, synthetic.carts, volumes.customers, chunk_size, seed, volumes)
+        for start, stop, (cart, favorites) in generated:
+            CartItem.objects.bulk_create([
+                CartItem(customer_id=ids['customer'][customer], dish_id=dish_ids[dish], quantity=quantity)
+                for customer, dish, quantity in cart
+            ], batch_size)
+            favorite.objects.bulk_create([
+                favorite(user_id=ids['customer'][customer], dish_id=dish_ids[dish])
+                for customer, dish in favorites
+            ], batch_size)
+            log(f'cart: {stop}/{volumes.customers}')
+
+        # следующие обычные вставки продолжат нумерацию после явных id (PostgreSQL и др.)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, Dish, Order]):
+                cursor.execute(sql)
+        versions.bump(versions.DISHES, versions.COOKS, versions.ORDERS)
+        rollups.rebuild(batch_size)
+        dashboard.rebuild()
+        log('сводки пересобраны')
+
+    return Dataset(
+        admin_ids=ids['admin'],
+        cook_ids=ids['cook'],
+        customer_ids=ids['customer'],
+        dish_ids=dish_ids,
+        order_ids=order_ids,
+    )
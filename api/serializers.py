@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Dish, Order, OrderItem, CartItem
+from django.db import transaction
+from django.db.models import F, Prefetch, prefetch_related_objects
+from .models import Dish, Order, OrderItem, CartItem, ChangeSequence, CookDailyStats
+from . import group_commit
 
 User = get_user_model()
 
@@ -58,22 +61,44 @@ class DishSerializer(serializers.ModelSerializer):
     cook_id = serializers.ReadOnlyField(source='cook.id')
     cook_address = serializers.ReadOnlyField(source='cook.address')
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    image_placeholder = serializers.SerializerMethodField()
 
     class Meta:
         model = Dish
         fields = (
             'id', 'name', 'description', 'price',
             'cook', 'cook_id', 'cook_address',
-            'image', 'image_url', 'created_at'
+            'image', 'image_url', 'image_variants', 'image_placeholder', 'created_at'
         )
         read_only_fields = ('cook','cook_id','created_at','image_url')
 
-    def get_image_url(self, obj):
+    def _absolute_url(self, url):
         request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_image_url(self, obj):
         if obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url)
+            return self._absolute_url(obj.image.url)
         return None
 
+    def get_image_variants(self, obj):
+        # {"thumb": {"width", "height", "jpeg": url, "webp": url}, "medium": ..., "large": ...}
+        sizes = (obj.image_variants or {}).get('sizes')
+        if not sizes:
+            return None
+        storage = obj.image.storage
+        return {
+            label: {
+                key: self._absolute_url(storage.url(value)) if key in ('jpeg', 'webp') else value
+                for key, value in entry.items()
+            }
+            for label, entry in sizes.items()
+        }
+
+    def get_image_placeholder(self, obj):
+        return obj.image_placeholder or None
+
 
 class OrderItemSerializer(serializers.ModelSerializer):
     dish = DishSerializer(read_only=True)
@@ -92,6 +117,20 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ('id', 'dish', 'dish_id', 'quantity', 'status')
 
 
+class OrderItemChangeSerializer(OrderItemSerializer):
+    """Позиция в ленте изменений (GET /api/orders/changes/): с id заказа."""
+    order_id = serializers.IntegerField(read_only=True)
+
+    class Meta(OrderItemSerializer.Meta):
+        fields = OrderItemSerializer.Meta.fields + ('order_id',)
+
+
+class OrderItemInputSerializer(serializers.Serializer):
+    """Позиция при создании заказа: {"dish_id": <int>, "quantity": <int>}"""
+    dish_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
 class OrderSerializer(serializers.ModelSerializer):
     customer = serializers.ReadOnlyField(source='customer.username')
 
@@ -107,12 +146,18 @@ class OrderSerializer(serializers.ModelSerializer):
     # Список позиций, который выдается при GET (read_only=True)
     items = OrderItemSerializer(source='orderitem_set', many=True, read_only=True)
 
-    # Поле dish_ids остается write_only, чтобы клиент мог передать список ID
-    dish_ids = serializers.PrimaryKeyRelatedField(
-        queryset=Dish.objects.all(),
+    # Позиции с количеством: [{"dish_id": 1, "quantity": 2}, ...]
+    order_items = OrderItemInputSerializer(
         many=True,
         write_only=True,
-        source='dishes',
+        required=False,
+        help_text='Список позиций с количеством',
+    )
+    # Старый формат: список ID блюд, каждое в количестве 1
+    dish_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        write_only=True,
+        required=False,
     )
 
     rejection_reason = serializers.CharField(
@@ -135,6 +180,7 @@ class OrderSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
             'items',
+            'order_items',
             'dish_ids',
             'rejection_reason',
             'desired_ready_time',
@@ -142,35 +188,62 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ('status', 'created_at', 'updated_at')
 
     def validate(self, attrs):
-        # Проверяем: все “dishes” (dish_ids) должны принадлежать указанному cook
+        if self.instance is not None:
+            attrs.pop('order_items', None)
+            attrs.pop('dish_ids', None)
+            return super().validate(attrs)
+
+        # Собираем количества по блюдам из обоих форматов
+        quantities = {}
+        for dish_id in attrs.pop('dish_ids', []):
+            quantities[dish_id] = quantities.get(dish_id, 0) + 1
+        for item in attrs.pop('order_items', []):
+            quantities[item['dish_id']] = quantities.get(item['dish_id'], 0) + item['quantity']
+        if not quantities:
+            raise serializers.ValidationError({'order_items': 'Укажите хотя бы одно блюдо.'})
+
+        # Все блюда — одним запросом, принадлежность повару — в памяти
+        dishes = Dish.objects.in_bulk(list(quantities))
+        missing = [dish_id for dish_id in quantities if dish_id not in dishes]
+        if missing:
+            raise serializers.ValidationError({
+                'order_items': f'Блюда не найдены: {", ".join(map(str, missing))}.'
+            })
         cook = attrs.get('cook')
-        dishes = attrs.get('dishes', [])
-        if cook and dishes:
-            for dish in dishes:
-                if dish.cook != cook:
+        if cook:
+            for dish in dishes.values():
+                if dish.cook_id != cook.id:
                     raise serializers.ValidationError(
                         f"Блюдо «{dish.name}» не принадлежит повару «{cook.username}»."
                     )
+        attrs['items'] = [(dishes[dish_id], quantity) for dish_id, quantity in quantities.items()]
         return super().validate(attrs)
 
     def create(self, validated_data):
         cook = validated_data.pop('cook')
-        dishes = validated_data.pop('dishes', [])
+        items = validated_data.pop('items')
         ready_time = validated_data.pop('desired_ready_time', None)
         request = self.context.get('request')
         customer = request.user
 
-        order = Order.objects.create(
-            customer=customer,
-            cook=cook,
-            status='pending',  # при создании всегда “pending”
-            desired_ready_time=ready_time,
+        with transaction.atomic():
+            order = Order.objects.create(
+                customer=customer,
+                cook=cook,
+                status='pending',  # при создании всегда “pending”
+                desired_ready_time=ready_time,
+            )
+            # Все позиции — одной вставкой
+            OrderItem.objects.bulk_create(ChangeSequence.stamp([
+                OrderItem(order=order, dish=dish, quantity=quantity)
+                for dish, quantity in items
+            ]))
+
+        # Позиции для ответа — одним запросом вместе с блюдами и поварами
+        prefetch_related_objects(
+            [order],
+            Prefetch('orderitem_set', queryset=OrderItem.objects.select_related('dish__cook')),
         )
-
-        # Создаем OrderItem для каждого “dish”
-        for dish in dishes:
-            OrderItem.objects.create(order=order, dish=dish, quantity=1)
-
         return order
 
     def update(self, instance, validated_data):
@@ -203,18 +276,98 @@ class CartItemSerializer(serializers.ModelSerializer):
         dish = validated_data['dish']
         quantity = validated_data.get('quantity', 1)
 
-        cart_item, created = CartItem.objects.get_or_create(
-            customer=customer,
-            dish=dish,
-            defaults={'quantity': quantity}
-        )
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
-        return cart_item
+        def write():
+            cart_item, created = CartItem.objects.get_or_create(
+                customer=customer,
+                dish=dish,
+                defaults={'quantity': quantity}
+            )
+            if not created:
+                # прибавляем в базе: параллельные добавления не теряются
+                CartItem.objects.filter(pk=cart_item.pk).update(quantity=F('quantity') + quantity)
+                cart_item.refresh_from_db(fields=['quantity'])
+            return cart_item
+
+        # мелкая независимая запись — может уйти групповым коммитом (api/group_commit.py)
+        return group_commit.submit(write)
 
     def update(self, instance, validated_data):
         # Обновляем количество
         instance.quantity = validated_data.get('quantity', instance.quantity)
         instance.save()
         return instance
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Параметры оформления корзины: POST /api/cart/checkout/"""
+    desired_ready_time = serializers.DateTimeField(
+        required=False,
+        allow_null=True,
+        help_text='Время, к которому должно быть готово (ISO 8601)',
+    )
+
+
+class PeriodParamsSerializer(serializers.Serializer):
+    """Период date_from..date_to (включительно) и повар — общие параметры отчётов и выгрузки."""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    cook_id = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, attrs):
+        if attrs.get('date_from') and attrs.get('date_to') and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError('date_from позже date_to.')
+        return attrs
+
+
+class ReportParamsSerializer(PeriodParamsSerializer):
+    """Параметры отчётов /api/reports/…: период, повар (для админа), размер топа."""
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=10)
+    order_by = serializers.ChoiceField(choices=('quantity', 'revenue', 'orders'), default='quantity')
+
+
+class ExportParamsSerializer(PeriodParamsSerializer):
+    """Параметры выгрузки GET /api/orders/export/: период создания, повар, статусы через запятую."""
+    status = serializers.CharField(required=False)
+
+    def validate_status(self, value):
+        statuses = [name for name in value.split(',') if name]
+        unknown = set(statuses) - dict(Order.STATUS_CHOICES).keys()
+        if unknown:
+            raise serializers.ValidationError(f'Неизвестный статус: {", ".join(sorted(unknown))}.')
+        return statuses
+
+
+class CookDailyStatsSerializer(serializers.ModelSerializer):
+    cook_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = CookDailyStats
+        fields = ('cook_id', 'day', 'orders', 'items', 'revenue')
+
+
+class TopDishSerializer(serializers.Serializer):
+    dish_id = serializers.IntegerField()
+    dish_name = serializers.CharField()
+    cook_id = serializers.IntegerField()
+    orders = serializers.IntegerField(source='total_orders')
+    quantity = serializers.IntegerField(source='total_quantity')
+    revenue = serializers.DecimalField(source='total_revenue', max_digits=12, decimal_places=2)
+
+
+class DashboardOrderSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    customer_id = serializers.IntegerField()
+    status = serializers.CharField()
+    desired_ready_time = serializers.DateTimeField(allow_null=True)
+    created_at = serializers.DateTimeField()
+
+
+class CookDashboardSerializer(serializers.Serializer):
+    """Панель повара GET /api/cooks/me/dashboard/ (api/dashboard.py)."""
+    pending = serializers.IntegerField()
+    accepted = serializers.IntegerField()
+    in_progress = serializers.IntegerField()
+    today_orders = serializers.IntegerField()
+    today_items = serializers.IntegerField()
+    today_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    next_orders = DashboardOrderSerializer(many=True)
@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from . import dashboard, events, images, rollups, versions
+from .authentication import token_cache
+from .models import Dish, Order, OrderItem
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Dish)
+def dish_image_changed(sender, instance, **kwargs):
+    name = instance.image.name if instance.image else ''
+    variants = instance.image_variants or {}
+    if not name:
+        if variants or instance.image_placeholder:
+            Dish.objects.filter(id=instance.id).update(image_variants={}, image_placeholder='')
+        return
+    if variants.get('source') == name:
+        return
+    # варианты строятся после коммита, когда файл и строка блюда уже видны воркеру
+    transaction.on_commit(lambda: images.schedule(instance.id, name))
+
+
+# --- маркеры версий для ETag (api/versions.py) ---
+
+@receiver(post_save, sender=Dish)
+def dish_saved(sender, instance, **kwargs):
+    versions.bump(*versions.dish_keys(instance.cook_id))
+
+
+@receiver(post_delete, sender=Dish)
+def dish_deleted(sender, instance, **kwargs):
+    # вместе с блюдом пропадают и отметки «избранное» у поваров
+    versions.bump(versions.COOKS, *versions.dish_keys(instance.cook_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    keys = [versions.COOKS, versions.ORDERS, versions.user_orders(instance.id)]
+    # имена заказчика и повара выводятся в заказе — меняются и списки второй стороны
+    counterparts = (
+        Order.objects.filter(Q(customer_id=instance.id) | Q(cook_id=instance.id))
+        .values_list('customer_id', 'cook_id').distinct()
+    )
+    keys += [versions.user_orders(user_id) for pair in counterparts for user_id in pair]
+    if instance.role == 'cook':
+        # имя и адрес повара выводятся в каждом его блюде
+        keys += versions.dish_keys(instance.id)
+    versions.bump(*keys)
+
+
+@receiver(m2m_changed, sender=User.favorite_dishes.through)
+def favorites_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versions.bump(versions.COOKS)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def order_changed(sender, instance, **kwargs):
+    versions.bump(*versions.order_keys(instance.customer_id, instance.cook_id))
+
+
+def _order_participants(item):
+    # заказ обычно уже у вызывающего (item.order, OrderItem(order=...)) — тогда без SELECT
+    if OrderItem.order.is_cached(item):
+        return item.order.customer_id, item.order.cook_id
+    return Order.objects.filter(id=item.order_id).values_list('customer_id', 'cook_id').first()
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def order_item_changed(sender, instance, signal, created=False, **kwargs):
+    participants = _order_participants(instance)
+    if not participants:
+        return
+    versions.bump(*versions.order_keys(*participants))
+    if signal is post_save:
+        events.publish_on_commit(participants, {
+            'type': 'order_item.created' if created else 'order_item.updated',
+            'order_id': instance.order_id,
+            'item_id': instance.id,
+            'dish_id': instance.dish_id,
+            'quantity': instance.quantity,
+            'status': instance.status,
+        })
+
+
+# --- push-события заказов (api/events.py, api/realtime.py) ---
+
+@receiver(post_save, sender=Order)
+def order_published(sender, instance, created, **kwargs):
+    events.publish_order(instance, 'order.created' if created else 'order.updated')
+
+
+# --- дневные сводки для отчётов (api/rollups.py) ---
+
+@receiver(post_save, sender=Order)
+def order_rollups(sender, instance, **kwargs):
+    # Order.save() обновляет _loaded_status уже после сигнала — здесь он ещё прежний
+    rollups.on_order_saved(instance, instance._loaded_status)
+
+
+@receiver(pre_delete, sender=Order)
+def order_rollups_deleted(sender, instance, **kwargs):
+    # позиции ещё не удалены каскадом — выручку можно посчитать
+    rollups.on_order_deleted(instance)
+
+
+# --- счётчики панели повара (api/dashboard.py) ---
+
+@receiver(post_save, sender=Order)
+def order_counters(sender, instance, **kwargs):
+    dashboard.on_order_saved(instance, instance._loaded_status)
+
+
+@receiver(pre_delete, sender=Order)
+def order_counters_deleted(sender, instance, **kwargs):
+    dashboard.on_order_deleted(instance)
+
+
+# --- кэш токенов (api/authentication.py) ---
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.invalidate_key(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_auth_changed(sender, instance, **kwargs):
+    # роль, is_active и прочие поля берутся из кэша — сбрасываем все токены пользователя
+    token_cache.invalidate_user(instance.pk)
@@ -0,0 +1,113 @@
+"""
+Путь записи в SQLite: повтор транзакций при блокировках.
+
+Параметры соединения задаются в settings: PRAGMA из SQLITE_PRAGMAS выполняются
+при открытии каждого соединения (OPTIONS['init_command']), транзакции
+начинаются с BEGIN IMMEDIATE (OPTIONS['transaction_mode']). Режим журнала
+(SQLITE_JOURNAL_MODE) записывается в сам файл базы, поэтому включается один
+раз при развёртывании — set_journal_mode(), команда sqlite_journal_mode, —
+а не каждым соединением: иначе любой запуск manage.py молча переводил бы
+файл в WAL. Блокировка на
+запись берётся сразу, поэтому два писателя не взаимоблокируются при
+повышении SHARED -> RESERVED, а ждут друг друга в пределах busy_timeout.
+
+Если блокировку так и не дали («database is locked»), run_with_retry
+повторяет транзакцию целиком с экспоненциальной задержкой и случайным
+разбросом. Внутри уже открытой транзакции повтор невозможен — там функция
+просто выполняется, а повторять будет внешний уровень.
+"""
+import functools
+import logging
+import random
+import sqlite3
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+LOCK_MESSAGES = ('database is locked', 'database table is locked', 'database schema is locked')
+
+
+def pragma_statements(pragmas=None):
+    """['PRAGMA synchronous=NORMAL', ...] из словаря (по умолчанию settings.SQLITE_PRAGMAS)."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {}) if pragmas is None else pragmas
+    return [f'PRAGMA {name}={value}' for name, value in pragmas.items()]
+
+
+def journal_mode():
+    return getattr(settings, 'SQLITE_JOURNAL_MODE', 'WAL')
+
+
+def set_journal_mode(path, mode=None):
+    """Переводит файл базы в режим журнала mode (по умолчанию SQLITE_JOURNAL_MODE). Возвращает итоговый режим."""
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute(f'PRAGMA journal_mode={mode or journal_mode()}').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def is_lock_error(exc):
+    return isinstance(exc, (OperationalError, sqlite3.OperationalError)) and any(
+        message in str(exc) for message in LOCK_MESSAGES
+    )
+
+
+def call_with_backoff(func, attempts=None, base_delay=None, max_delay=None):
+    """
+    Вызывает func(), повторяя его при ошибке блокировки до attempts раз.
+    Задержка перед i-м повтором — случайная в [0, min(max_delay, base_delay * 2**i)].
+    """
+    attempts = attempts or getattr(settings, 'SQLITE_LOCK_RETRIES', 5)
+    base_delay = base_delay if base_delay is not None else getattr(settings, 'SQLITE_LOCK_BACKOFF', 0.05)
+    max_delay = max_delay if max_delay is not None else getattr(settings, 'SQLITE_LOCK_BACKOFF_MAX', 1.0)
+    for attempt in range(attempts):
+        try:
+            return func()
+        except Exception as exc:
+            if not is_lock_error(exc) or attempt == attempts - 1:
+                if is_lock_error(exc):
+                    logger.warning('SQLite: блокировка не снята после %s попыток', attempts)
+                raise
+        time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+def run_with_retry(func, using=DEFAULT_DB_ALIAS):
+    """Выполняет func() в отдельной транзакции и повторяет её при блокировке."""
+    if connections[using].in_atomic_block:
+        return func()
+
+    def attempt():
+        with transaction.atomic(using=using):
+            return func()
+
+    return call_with_backoff(attempt)
+
+
+def retry_on_lock(func):
+    """Декоратор: метод выполняется через run_with_retry."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_with_retry(lambda: func(*args, **kwargs))
+    return wrapper
+
+
+class LockRetryMixin:
+    """perform_create/update/destroy вьюсета — в транзакции с повтором при блокировке."""
+
+    def perform_create(self, serializer):
+        def attempt():
+            # блокировка при COMMIT приходит уже после create(): instance заполнен
+            # откатанной строкой, и без сброса save() повторил бы её как update()
+            serializer.instance = None
+            super(LockRetryMixin, self).perform_create(serializer)
+
+        run_with_retry(attempt)
+
+    def perform_update(self, serializer):
+        run_with_retry(lambda: super(LockRetryMixin, self).perform_update(serializer))
+
+    def perform_destroy(self, instance):
+        run_with_retry(lambda: super(LockRetryMixin, self).perform_destroy(instance))
@@ -0,0 +1,55 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME_RE = re.compile(r'(?:^|/)([0-9a-f]{64})(?:\.[\w]+)?$')
+
+
+def content_hash(name):
+    """Хэш содержимого из имени файла, если файл сохранён ContentAddressedStorage."""
+    match = HASHED_NAME_RE.search(name)
+    return match.group(1) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, в котором имя файла — SHA-256 его содержимого:
+    `dishes/2025/06/16/photo.jpg` -> `dishes/ab/cd/abcd…ef.jpg`.
+
+    Одинаковые картинки хранятся один раз: если файл с таким хэшем уже есть,
+    он не перезаписывается, а возвращается его имя. Содержимое по имени
+    никогда не меняется, поэтому такие файлы можно кэшировать навсегда
+    (см. api/media.py).
+
+    Из-за дедупликации один файл могут использовать несколько блюд,
+    поэтому удалять файлы при удалении блюда нельзя.
+    """
+    chunk_size = 64 * 1024
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks(self.chunk_size):
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        hexdigest = digest.hexdigest()
+
+        # сохраняем только верхний каталог (dishes/) и расширение
+        top = name.replace('\\', '/').split('/', 1)[0] if '/' in name else ''
+        ext = posixpath.splitext(name)[1].lower()
+        return posixpath.join(top, hexdigest[:2], hexdigest[2:4], hexdigest + ext)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return self._save(name, content)
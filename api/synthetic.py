@@ -0,0 +1,169 @@
+"""
+Генерация синтетических строк для api/seeding.py.
+
+Функции здесь не обращаются к базе и не импортируют Django: они выполняются
+в процессах пула и возвращают кортежи. Ссылки — индексы (n-й повар, n-е
+блюдо), а не id; id из индексов получает основной процесс. Каждая порция
+получает свой генератор random.Random(f'{seed}:{вид}:{начало}'), поэтому
+результат не зависит ни от числа процессов, ни от порядка их завершения.
+"""
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+
+FIRST_NAMES = (
+    ('Александр', 'Алексей', 'Андрей', 'Артём', 'Виктор', 'Дмитрий', 'Евгений', 'Иван', 'Игорь', 'Кирилл',
+     'Максим', 'Михаил', 'Никита', 'Николай', 'Олег', 'Павел', 'Роман', 'Сергей', 'Тимур', 'Юрий'),
+    ('Александра', 'Алина', 'Анастасия', 'Анна', 'Валерия', 'Дарья', 'Екатерина', 'Елена', 'Ирина', 'Ксения',
+     'Мария', 'Марина', 'Наталья', 'Ольга', 'Полина', 'Светлана', 'София', 'Татьяна', 'Юлия', 'Яна'),
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов', 'Новиков',
+    'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семёнов', 'Егоров', 'Павлов', 'Козлов',
+    'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин', 'Захаров',
+)
+STREETS = (
+    'ул. Ленина', 'ул. Гагарина', 'ул. Мира', 'ул. Советская', 'ул. Садовая', 'ул. Лесная', 'ул. Школьная',
+    'пр. Победы', 'пр. Строителей', 'Набережная ул.', 'ул. Пушкина', 'ул. Чехова', 'ул. Молодёжная',
+    'Цветной бульвар', 'ул. Кирова',
+)
+# блюдо, цена от и до (руб.), вес порции (г)
+DISHES = (
+    ('Борщ', 250, 450, 350), ('Щи', 220, 380, 350), ('Солянка', 300, 520, 350), ('Уха', 320, 600, 350),
+    ('Рассольник', 220, 380, 350), ('Харчо', 280, 480, 350), ('Окрошка', 220, 400, 300),
+    ('Плов', 320, 580, 300), ('Пельмени', 280, 520, 250), ('Вареники', 240, 420, 250),
+    ('Манты', 320, 540, 300), ('Голубцы', 300, 500, 300), ('Котлеты', 280, 480, 200),
+    ('Жаркое', 350, 620, 300), ('Гуляш', 340, 600, 300), ('Бефстроганов', 420, 720, 250),
+    ('Лагман', 330, 560, 350), ('Хачапури', 320, 560, 300), ('Драники', 200, 360, 250),
+    ('Блины', 180, 360, 200), ('Сырники', 200, 380, 200), ('Запеканка', 180, 340, 200),
+    ('Оливье', 220, 380, 200), ('Винегрет', 160, 300, 200), ('Шарлотка', 150, 300, 150),
+)
+# обороты без согласования по роду и числу
+DISH_STYLES = (
+    '', 'по-домашнему', 'по-деревенски', 'по-бабушкиному', 'с грибами', 'со сметаной', 'с говядиной',
+    'с курицей', 'с зеленью', 'с сыром', 'на сливочном масле', 'на пару', 'из печи',
+)
+
+# (статус, вес); открытые заказы — свежие, остальные разбросаны по истории
+ORDER_STATUSES = (
+    ('completed', 60), ('cancelled', 8), ('rejected', 4),
+    ('pending', 12), ('accepted', 8), ('in_progress', 8),
+)
+OPEN_STATUSES = ('pending', 'accepted', 'in_progress')
+ITEM_STATUSES = {'completed': 'ready', 'in_progress': 'in_progress'}
+REJECTION_REASONS = ('Нет продуктов', 'Кухня перегружена', 'Не успеем к нужному времени', 'Повар заболел')
+
+
+@dataclass
+class Volumes:
+    admins: int = 1
+    cooks: int = 10
+    customers: int = 100
+    dishes_per_cook: int = 20
+    orders: int = 1000
+    # позиций в заказе, в корзине и избранных блюд — случайно до максимума
+    max_items: int = 3
+    max_cart_items: int = 3
+    max_favorites: int = 3
+
+
+def chunks(total, size):
+    """Границы порций [start, stop)."""
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def _rng(seed, kind, start):
+    return random.Random(f'{seed}:{kind}:{start}')
+
+
+def _skewed(rng, count):
+    # первые индексы популярнее: квадрат равномерной величины
+    return min(int(count * rng.random() ** 2), count - 1)
+
+
+def users(start, stop, seed, role, prefix):
+    """(username, first_name, last_name, phone_number, address) для пользователей [start, stop)."""
+    rng = _rng(seed, role, start)
+    rows = []
+    for n in range(start, stop):
+        female = rng.random() < 0.5
+        last_name = rng.choice(LAST_NAMES) + ('а' if female else '')
+        rows.append((
+            f'{prefix}{role}{n}',
+            rng.choice(FIRST_NAMES[female]),
+            last_name,
+            f'+79{rng.randrange(10 ** 9):09d}',
+            f'{rng.choice(STREETS)}, д. {rng.randint(1, 150)}, кв. {rng.randint(1, 300)}',
+        ))
+    return rows
+
+
+def dishes(start, stop, seed, dishes_per_cook, now, days):
+    """(индекс повара, name, description, price, created_at) для блюд [start, stop); блюда идут по поварам подряд."""
+    rng = _rng(seed, 'dish', start)
+    rows = []
+    for n in range(start, stop):
+        name, low, high, weight = rng.choice(DISHES)
+        style = rng.choice(DISH_STYLES)
+        rows.append((
+            n // dishes_per_cook,
+            f'{name} {style}'.strip(),
+            f'{name} {style}'.strip() + f'. Порция {weight + rng.randrange(-5, 6) * 10} г.',
+            f'{rng.randrange(low, high + 1, 10)}.00',
+            # меню появилось раньше истории заказов
+            now - timedelta(days=days, seconds=rng.randrange(days * 86400)),
+        ))
+    return rows
+
+
+def orders(start, stop, seed, volumes, now, days):
+    """
+    Заказы [start, stop) и их позиции.
+    Заказ: (индекс покупателя, индекс повара, status, rejection_reason,
+    desired_ready_time, created_at, updated_at, completed_at).
+    Позиция: (индекс заказа, индекс блюда, quantity, status).
+    """
+    rng = _rng(seed, 'order', start)
+    statuses, weights = zip(*ORDER_STATUSES)
+    rows, items = [], []
+    for n in range(start, stop):
+        status = rng.choices(statuses, weights)[0]
+        cook = _skewed(rng, volumes.cooks)
+        # открытые — за последние сутки, закрытые — за всю историю
+        age = rng.randrange(86400 if status in OPEN_STATUSES else days * 86400)
+        created_at = now - timedelta(seconds=age)
+        ready = created_at + timedelta(minutes=rng.randrange(30, 240)) if rng.random() < 0.5 else None
+        completed_at = None
+        updated_at = created_at
+        if status != 'pending':
+            updated_at = min(created_at + timedelta(minutes=rng.randrange(1, 120)), now)
+        if status == 'completed':
+            completed_at = updated_at
+        rows.append((
+            _skewed(rng, volumes.customers),
+            cook,
+            status,
+            rng.choice(REJECTION_REASONS) if status == 'rejected' else '',
+            ready,
+            created_at,
+            updated_at,
+            completed_at,
+        ))
+        menu = range(cook * volumes.dishes_per_cook, (cook + 1) * volumes.dishes_per_cook)
+        for dish in rng.sample(menu, min(rng.randint(1, volumes.max_items), len(menu))):
+            quantity = rng.choices((1, 2, 3, 4), (60, 25, 10, 5))[0]
+            items.append((n, dish, quantity, ITEM_STATUSES.get(status, 'confirmed')))
+    return rows, items
+
+
+def carts(start, stop, seed, volumes):
+    """Корзины и избранное покупателей [start, stop): списки (индекс покупателя, индекс блюда[, quantity])."""
+    rng = _rng(seed, 'cart', start)
+    total = volumes.cooks * volumes.dishes_per_cook
+    cart, favorites = [], []
+    for n in range(start, stop):
+        for dish in rng.sample(range(total), min(rng.randint(0, volumes.max_cart_items), total)):
+            cart.append((n, dish, rng.randint(1, 3)))
+        for dish in rng.sample(range(total), min(rng.randint(0, volumes.max_favorites), total)):
+            favorites.append((n, dish))
+    return cart, favorites
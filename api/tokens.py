@@ -0,0 +1,91 @@
+"""
+Подписанные access-токены без обращения к базе.
+
+access  = signing.dumps({'u': id, 'r': role})  — живёт SIGNED_ACCESS_TOKEN_TTL секунд;
+refresh = signing.dumps({'u': id, 'j': jti})   — одноразовый, хранится в RefreshToken.
+
+Подпись — стандартный django.core.signing (HMAC на SECRET_KEY) с отдельными
+salt для access и refresh, поэтому один тип нельзя выдать за другой.
+Роль в access-токене актуальна на момент выдачи; после смены роли новая
+попадёт в токен при следующем обновлении. Так же и с отключением: выданный
+access-токен действует до конца своего срока, refresh неактивному
+пользователю не обменивается.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RefreshToken
+
+User = get_user_model()
+
+ACCESS_SALT = 'api.tokens.access'
+REFRESH_SALT = 'api.tokens.refresh'
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def access_ttl():
+    return getattr(settings, 'SIGNED_ACCESS_TOKEN_TTL', 300)
+
+
+def refresh_ttl():
+    return getattr(settings, 'SIGNED_REFRESH_TOKEN_TTL', 14 * 24 * 3600)
+
+
+def issue_access(user):
+    return signing.dumps({'u': user.pk, 'r': user.role}, salt=ACCESS_SALT)
+
+
+def read_access(token):
+    """Возвращает (user_id, role) или бросает InvalidToken."""
+    try:
+        payload = signing.loads(token, salt=ACCESS_SALT, max_age=access_ttl())
+        return int(payload['u']), str(payload['r'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidToken
+
+
+def issue_pair(user):
+    jti = uuid.uuid4().hex
+    RefreshToken.objects.create(
+        user=user,
+        jti=jti,
+        expires_at=timezone.now() + timedelta(seconds=refresh_ttl()),
+    )
+    return {
+        'access': issue_access(user),
+        'refresh': signing.dumps({'u': user.pk, 'j': jti}, salt=REFRESH_SALT),
+        'expires_in': access_ttl(),
+    }
+
+
+def rotate(refresh):
+    """Обменивает refresh-токен на новую пару; старый становится недействительным."""
+    try:
+        payload = signing.loads(refresh, salt=REFRESH_SALT, max_age=refresh_ttl())
+        user_id, jti = int(payload['u']), str(payload['j'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidToken
+
+    now = timezone.now()
+    stored = RefreshToken.objects.select_related('user').filter(jti=jti, user_id=user_id).first()
+    if stored is None or stored.expires_at <= now or not stored.user.is_active:
+        raise InvalidToken
+
+    # помечаем использованным условным UPDATE: из двух параллельных обменов пройдёт один
+    with transaction.atomic():
+        used = RefreshToken.objects.filter(pk=stored.pk, used_at__isnull=True).update(used_at=now)
+        if used:
+            return issue_pair(stored.user)
+
+    # повторное использование — токен мог утечь, отзываем все refresh-токены пользователя
+    RefreshToken.objects.filter(user_id=user_id, used_at__isnull=True).update(used_at=now)
+    raise InvalidToken
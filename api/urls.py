@@ -1,9 +1,12 @@
 # api/urls.py
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken.views import obtain_auth_token
 from django.conf import settings
-from django.conf.urls.static import static
+
+from .media import serve_media
 
 from .views import (
     UserViewSet,
@@ -11,6 +14,11 @@ from .views import (
     OrderViewSet,
     OrderItemViewSet,
     CartItemViewSet,
+    SignedTokenObtainView,
+    SignedTokenRefreshView,
+    KitchenQueueView,
+    CookDashboardView,
+    ReportViewSet,
 )
 
 router = DefaultRouter()
@@ -19,14 +27,23 @@ router.register('dishes',      DishViewSet,      basename='dish')
 router.register('orders',      OrderViewSet,     basename='order')
 router.register('order-items', OrderItemViewSet, basename='orderitem')
 router.register('cart',        CartItemViewSet,  basename='cartitem')
+router.register('reports',     ReportViewSet,    basename='report')
 
 urlpatterns = [
     # токен-авторизация
     path('auth/token/', obtain_auth_token, name='api_token_auth'),
+    # подписанные access/refresh-токены
+    path('auth/signed-token/', SignedTokenObtainView.as_view(), name='api_signed_token'),
+    path('auth/signed-token/refresh/', SignedTokenRefreshView.as_view(), name='api_signed_token_refresh'),
+    # очередь кухни повара
+    path('kitchen/queue/', KitchenQueueView.as_view(), name='kitchen-queue'),
+    # панель повара
+    path('cooks/me/dashboard/', CookDashboardView.as_view(), name='cook-dashboard'),
     # все наши ViewSet-роуты (/api/…)
     path('', include(router.urls)),
 ]
 
-# раздавать загруженные картинки только в режиме разработки
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# загруженные картинки (также доступны по /media/, см. Backend/urls.py)
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+]
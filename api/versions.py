@@ -0,0 +1,64 @@
+"""
+Маркеры версий для дешёвых ETag.
+
+Ключи:
+  dishes               — любое блюдо (и данные поваров, показываемые в блюдах)
+  dishes:cook:<id>     — меню конкретного повара
+  cooks                — список поваров (/api/users/cooks/)
+  orders               — все заказы (для админа)
+  orders:user:<id>     — заказы, где пользователь — заказчик или повар
+
+Маркеры обновляются сигналами (api/signals.py) в той же транзакции, что и
+изменение данных. Операции в обход сигналов (bulk_create, update) должны
+вызывать bump() сами.
+"""
+import uuid
+
+from django.utils import timezone
+
+from .models import ChangeMarker
+
+DISHES = 'dishes'
+COOKS = 'cooks'
+ORDERS = 'orders'
+
+
+def cook_dishes(cook_id):
+    return f'dishes:cook:{cook_id}'
+
+
+def user_orders(user_id):
+    return f'orders:user:{user_id}'
+
+
+def dish_keys(cook_id):
+    return [DISHES, cook_dishes(cook_id)]
+
+
+def order_keys(customer_id, cook_id):
+    return [ORDERS, user_orders(customer_id), user_orders(cook_id)]
+
+
+def bump(*keys):
+    """Выдаёт ключам новые версии одним UPSERT-запросом."""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    now = timezone.now()
+    ChangeMarker.objects.bulk_create(
+        [ChangeMarker(key=key, token=uuid.uuid4().hex, updated_at=now) for key in keys],
+        update_conflicts=True,
+        unique_fields=['key'],
+        update_fields=['token', 'updated_at'],
+    )
+
+
+def get(*keys):
+    """{key: (token, updated_at)}; для ещё не тронутых ключей — ('0', None)."""
+    markers = {
+        key: (token, updated_at)
+        for key, token, updated_at in ChangeMarker.objects.filter(key__in=keys).values_list(
+            'key', 'token', 'updated_at'
+        )
+    }
+    return {key: markers.get(key, ('0', None)) for key in keys}
@@ -1,25 +1,47 @@
+from contextlib import nullcontext
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from .models import Dish, Order, CartItem, OrderItem
-from .serializers import UserSerializer, DishSerializer, OrderSerializer, CartItemSerializer, OrderItemSerializer
+from django.db import router, transaction
+from django.db.models import Prefetch
+from .models import Dish, Order, CartItem, OrderItem, ChangeSequence
+from .serializers import (
+    UserSerializer, DishSerializer, OrderSerializer, CartItemSerializer, OrderItemSerializer,
+    CheckoutSerializer, OrderItemChangeSerializer, ReportParamsSerializer, CookDailyStatsSerializer,
+    TopDishSerializer, CookDashboardSerializer, ExportParamsSerializer,
+)
 from .permissions import IsAdmin, IsCook, IsCustomer
+from .pagination import KeysetPagination
+from .search import search_dishes
+from .conditional import ConditionalGetMixin, conditional_response
+from .menu_cache import MenuCacheMixin
+from .read_serializers import CartItemReadSerializer, DishReadSerializer, FastReadMixin, OrderReadSerializer
+from .db_router import ReplicaReadMixin
+from .sqlite import LockRetryMixin, retry_on_lock
+from .authentication import load_user, token_cache
+from . import menu_cache
+from . import changes, dashboard, events, export, group_commit, kitchen, rollups, versions
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.views import APIView
+from rest_framework.authtoken.serializers import AuthTokenSerializer
+from . import tokens
 
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     - create (POST): регистрация — (AllowAny)
     - list / retrieve / update / delete: только админ (IsAdmin)
     - GET /api/users/me/   — текущему пользователю (IsAuthenticated)
     - GET /api/users/cooks/ — любой (AllowAny)
+    - GET /api/users/auth_cache_stats/ — счётчики кэша токенов (IsAdmin)
     """
-    queryset = User.objects.all()
+    queryset = User.objects.prefetch_related('favorite_dishes')
     serializer_class = UserSerializer
+    # список поваров — часть каталога, читается из реплики
+    replica_actions = ('list', 'retrieve', 'cooks')
 
     def get_permissions(self):
         if self.action == 'create':
@@ -39,13 +61,19 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def cooks(self, request):
-        cooks = User.objects.filter(role='cook')
-        serializer = self.get_serializer(cooks, many=True)
-        return Response(serializer.data)
+        def build():
+            cooks = User.objects.filter(role='cook').prefetch_related('favorite_dishes')
+            serializer = self.get_serializer(cooks, many=True)
+            return Response(serializer.data)
+        return conditional_response(request, [versions.COOKS], build)
+
+    @action(detail=False, methods=['get'])
+    def auth_cache_stats(self, request):
+        return Response(token_cache.stats())
 
     @action(detail=False, methods=['get', 'patch'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
-        user = request.user
+        user = load_user(request.user, self.get_queryset())
         if request.method == 'GET':
             serializer = self.get_serializer(user)
             return Response(serializer.data)
@@ -66,8 +94,8 @@ class UserViewSet(viewsets.ModelViewSet):
         Возвращает список избранных блюд текущего пользователя.
         """
         user = request.user
-        favorite_dishes = user.favorite_dishes.all()
-        serializer = DishSerializer(favorite_dishes, many=True)
+        favorite_dishes = user.favorite_dishes.select_related('cook')
+        serializer = DishSerializer(favorite_dishes, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsCustomer])
@@ -85,7 +113,7 @@ class UserViewSet(viewsets.ModelViewSet):
             dish = Dish.objects.get(id=dish_id)
         except Dish.DoesNotExist:
             return Response({'detail': 'Блюдо не найдено'}, status=status.HTTP_404_NOT_FOUND)
-        user.favorite_dishes.add(dish)
+        group_commit.submit(lambda: user.favorite_dishes.add(dish))
         return Response({'detail': f'Блюдо {dish.name} добавлено в избранное'}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['delete'], permission_classes=[permissions.IsAuthenticated, IsCustomer])
@@ -103,49 +131,64 @@ class UserViewSet(viewsets.ModelViewSet):
             dish = Dish.objects.get(id=dish_id)
         except Dish.DoesNotExist:
             return Response({'detail': 'Блюдо не найдено'}, status=status.HTTP_404_NOT_FOUND)
-        user.favorite_dishes.remove(dish)
+        group_commit.submit(lambda: user.favorite_dishes.remove(dish))
         return Response({'detail': f'Блюдо {dish.name} удалено из избранного'}, status=status.HTTP_200_OK)
 
 
-class DishViewSet(viewsets.ModelViewSet):
+class DishViewSet(ReplicaReadMixin, ConditionalGetMixin, MenuCacheMixin, FastReadMixin, viewsets.ModelViewSet):
     """
     CRUD для блюд:
       - create/update/delete: только повар (IsCook)
       - list/retrieve: любой аутентифицированный (IsAuthenticated)
     GET /api/dishes/?cook_id=<id> — фильтр по повару.
+    GET /api/dishes/?cursor=&page_size=<n> — постраничная выдача по (created_at, id);
+    без этих параметров список отдаётся целиком.
+    list/retrieve отвечают 304 на If-None-Match, пока меню не менялось.
+    Ответы с cook_id кэшируются (заголовок X-Cache: HIT/MISS).
+    GET /api/dishes/cache_stats/ — счётчики кэша меню (только админ).
     """
-    pagination_class = None
+    pagination_class = KeysetPagination
     serializer_class = DishSerializer
+    read_serializer_class = DishReadSerializer
     parser_classes = (MultiPartParser, FormParser)
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [IsCook()]
+        if self.action == 'cache_stats':
+            return [IsAdmin()]
         return [permissions.IsAuthenticated()]
 
+    def get_version_keys(self):
+        cook_id = self.request.query_params.get('cook_id')
+        if self.action == 'list' and cook_id is not None:
+            return [versions.cook_dishes(cook_id)]
+        return [versions.DISHES]
+
     def get_queryset(self):
-        queryset = Dish.objects.all()
+        queryset = Dish.objects.select_related('cook')
         cook_id = self.request.query_params.get('cook_id')
 
         if cook_id is not None:
             queryset = queryset.filter(cook__id=cook_id)
 
-        # 2) фильтрация по поисковой строке: искать в name и description
+        # 2) полнотекстовый поиск по name и description, по релевантности
         search_term = self.request.query_params.get('search')
         if search_term:
-            queryset = queryset.filter(
-                Q(name__icontains=search_term) |
-                Q(description__icontains=search_term)
-            )
+            queryset = search_dishes(queryset, search_term)
 
         return queryset
 
     def perform_create(self, serializer):
         serializer.save(cook=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        return Response(menu_cache.stats())
 
-class OrderItemViewSet(viewsets.ModelViewSet):
-    queryset = OrderItem.objects.all()
+
+class OrderItemViewSet(ReplicaReadMixin, LockRetryMixin, viewsets.ModelViewSet):
+    queryset = OrderItem.objects.select_related('dish__cook')
     serializer_class = OrderItemSerializer
 
     def get_permissions(self):
@@ -157,17 +200,18 @@ class OrderItemViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = self.queryset
         if user.role == 'cook':
             # только свои позиции
-            return OrderItem.objects.filter(order__cook=user)
+            return queryset.filter(order__cook=user)
         if user.role == 'customer':
-            return OrderItem.objects.filter(order__customer=user)
+            return queryset.filter(order__customer=user)
         if user.role == 'admin':
-            return OrderItem.objects.all()
+            return queryset.all()
         return OrderItem.objects.none()
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ReplicaReadMixin, ConditionalGetMixin, LockRetryMixin, FastReadMixin, viewsets.ModelViewSet):
     """
     Order CRUD + action 'process':
       - create (POST) — только заказчик (IsCustomer)
@@ -178,14 +222,23 @@ class OrderViewSet(viewsets.ModelViewSet):
       - update/partial_update (PATCH) — только админ (IsAdmin)
       - destroy (DELETE) — только админ (IsAdmin)
       - POST /api/orders/{id}/process/ — только повар (IsCook), обрабатывает заказ
+      - GET /api/orders/export/ — потоковая выгрузка в CSV/JSONL, только админ (IsAdmin)
+    Список — новые сверху.
+    list/retrieve отвечают 304 на If-None-Match, пока заказы пользователя не менялись.
     """
-    queryset = Order.objects.all()
+    # План загрузки: покупатель и повар заказа одним JOIN, позиции с блюдами
+    # и их поварами — одним дополнительным запросом на всю страницу.
+    queryset = Order.objects.select_related('customer', 'cook').prefetch_related(
+        Prefetch('orderitem_set', queryset=OrderItem.objects.select_related('dish__cook'))
+    )
     serializer_class = OrderSerializer
+    read_serializer_class = OrderReadSerializer
+    replica_actions = ('list', 'retrieve', 'export')
 
     def get_permissions(self):
         if self.action == 'create':
             return [permissions.IsAuthenticated(), IsCustomer()]
-        if self.action in ['update', 'partial_update', 'destroy']:
+        if self.action in ['update', 'partial_update', 'destroy', 'export']:
             return [permissions.IsAuthenticated(), IsAdmin()]
         if self.action == 'process':
             return [permissions.IsAuthenticated(), IsCook()]
@@ -204,24 +257,97 @@ class OrderViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated(), IsCustomer()]
         return [permissions.IsAuthenticated()]
 
+    def get_version_keys(self):
+        user = self.request.user
+        # в позициях заказа выводятся блюда, поэтому учитываем и маркер блюд
+        if user.role == 'admin':
+            return [versions.ORDERS, versions.DISHES]
+        return [versions.user_orders(user.id), versions.DISHES]
+
     def get_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
             return Order.objects.none()
 
+        # новые сверху; порядок совпадает с индексами (cook, created_at)
+        # и (customer, created_at), поэтому сортировка идёт без временного B-дерева
+        queryset = self.queryset.order_by('-created_at', '-id')
+
         if user.role == 'admin':
-            return Order.objects.all()
+            return queryset.all()
         if user.role == 'cook':
-            return Order.objects.filter(cook=user)
+            return queryset.filter(cook=user)
         if user.role == 'customer':
-            return Order.objects.filter(customer=user)
+            return queryset.filter(customer=user)
         return Order.objects.none()
 
     def perform_create(self, serializer):
         # cook устанавливается через cook_id из сериализатора
         serializer.save(customer=self.request.user)
 
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Лента изменений для клиентов без WebSocket (long polling).
+        URL: GET /api/orders/changes/?since=<cursor>&wait=<секунды>
+        Возвращает {"cursor", "orders", "items"}: заказы и позиции, изменённые
+        после курсора. Если изменений нет, ждёт до wait секунд
+        (по умолчанию и не больше ORDER_CHANGES_MAX_WAIT); если все места ожидания
+        процесса заняты (ORDER_CHANGES_MAX_WAITERS) — отвечает сразу.
+        Без since сразу возвращает текущий курсор — с него начинают опрос.
+        """
+        since = request.query_params.get('since')
+        wait = request.query_params.get('wait')
+        try:
+            since = None if since in (None, '') else int(since)
+            wait = changes.max_wait() if wait in (None, '') else float(wait)
+        except ValueError:
+            return Response({'detail': 'Неверный курсор или время ожидания.'}, status=status.HTTP_400_BAD_REQUEST)
+        if since is not None and since < 0:
+            return Response({'detail': 'Неверный курсор или время ожидания.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if since is None:
+            return Response({'cursor': str(ChangeSequence.current()), 'orders': [], 'items': []})
+
+        wait = min(max(wait, 0), changes.max_wait())
+        # ожидание держит поток воркера — одновременно ждут не больше ORDER_CHANGES_MAX_WAITERS
+        with changes.wait_slot() if wait else nullcontext(True) as allowed:
+            orders, items, cursor = changes.wait_for_changes(
+                request.user,
+                since,
+                wait=wait if allowed else 0,
+                orders=self.queryset,
+                items=OrderItem.objects.select_related('dish__cook'),
+            )
+        context = self.get_serializer_context()
+        return Response({
+            'cursor': str(cursor),
+            'orders': OrderSerializer(orders, many=True, context=context).data,
+            'items': OrderItemChangeSerializer(items, many=True, context=context).data,
+        })
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        renderer_classes=[export.CSVRenderer, export.JSONLinesRenderer],
+    )
+    def export(self, request):
+        """
+        Выгрузка заказов с позициями для бухгалтерии (api/export.py).
+        URL: GET /api/orders/export/?format=csv|jsonl&date_from=&date_to=&status=a,b&cook_id=
+        Формат — параметр format или заголовок Accept (text/csv, application/x-ndjson),
+        по умолчанию CSV. Ответ потоковый, без пагинации.
+        """
+        params = ExportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        # база выбирается сейчас: поток читается уже после выхода из DatabaseRoutingMiddleware
+        orders = Order.objects.using(router.db_for_read(Order))
+        orders = export.filter_orders(orders, params.validated_data)
+        return export.streaming_response(request, orders, request.accepted_renderer.format)
+
     @action(detail=True, methods=['post'], url_path='process')
+    @retry_on_lock
     def process(self, request, pk=None):
         """
         Обработка заказа поваром.
@@ -272,7 +398,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class CartItemViewSet(viewsets.ModelViewSet):
+class CartItemViewSet(LockRetryMixin, FastReadMixin, viewsets.ModelViewSet):
     """
     ViewSet для работы с элементами корзины:
       - list: GET /api/cart/          — список элементов корзины текущего пользователя
@@ -280,9 +406,11 @@ class CartItemViewSet(viewsets.ModelViewSet):
       - retrieve: GET /api/cart/{id}/  — детальный элемент (необязательно)
       - update/partial_update: изменить количество
       - destroy: удалить элемент из корзины
+      - checkout: POST /api/cart/checkout/ — оформить корзину в заказы (по одному на повара)
     Доступ: только заказчик (IsCustomer).
     """
     serializer_class = CartItemSerializer
+    read_serializer_class = CartItemReadSerializer
 
     def get_permissions(self):
         # Все операции — только для авторизованного пользователя с ролью 'customer'
@@ -290,8 +418,175 @@ class CartItemViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Возвращаем только те элементы корзины, которые принадлежат текущему user
-        return CartItem.objects.filter(customer=self.request.user)
+        return CartItem.objects.filter(customer=self.request.user).select_related('dish__cook')
 
     def perform_create(self, serializer):
         # В create мы уже обрабатываем логику get_or_create в сериализаторе
         serializer.save(customer=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    @retry_on_lock
+    def checkout(self, request):
+        """
+        Оформление корзины.
+        URL: POST /api/cart/checkout/
+        Тело JSON (опционально):
+        {
+          "desired_ready_time": "2025-06-10T15:30:00Z"
+        }
+        Позиции группируются по повару: на каждого повара создаётся один заказ.
+        Заказы и позиции вставляются пачками в одной транзакции, корзина очищается.
+        Число запросов не зависит от размера корзины.
+        """
+        params = CheckoutSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        ready_time = params.validated_data.get('desired_ready_time')
+
+        with transaction.atomic():
+            cart = list(self.get_queryset())
+            if not cart:
+                return Response(
+                    {'detail': 'Корзина пуста.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            by_cook = {}
+            for cart_item in cart:
+                by_cook.setdefault(cart_item.dish.cook_id, []).append(cart_item)
+
+            # bulk_create не вызывает save() — номера изменений выдаём сами
+            orders = Order.objects.bulk_create(ChangeSequence.stamp([
+                Order(
+                    customer=request.user,
+                    cook_id=cook_id,
+                    status='pending',
+                    desired_ready_time=ready_time,
+                )
+                for cook_id in by_cook
+            ]))
+            OrderItem.objects.bulk_create(ChangeSequence.stamp([
+                OrderItem(order=order, dish_id=cart_item.dish_id, quantity=cart_item.quantity)
+                for order, cart_items in zip(orders, by_cook.values())
+                for cart_item in cart_items
+            ]))
+            # и счётчики панели повара тоже
+            dashboard.on_orders_created(orders)
+            CartItem.objects.filter(id__in=[cart_item.id for cart_item in cart]).delete()
+            # bulk_create не шлёт post_save — обновляем маркеры заказов сами
+            versions.bump(
+                versions.ORDERS,
+                versions.user_orders(request.user.id),
+                *map(versions.user_orders, by_cook),
+            )
+            for order in orders:
+                events.publish_order(order, 'order.created')
+
+        created = OrderViewSet.queryset.filter(id__in=[order.id for order in orders]).order_by('id')
+        serializer = OrderSerializer(created, many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class SignedTokenObtainView(APIView):
+    """
+    POST /api/auth/signed-token/
+    JSON: {"username": "...", "password": "..."}
+    Возвращает {"access", "refresh", "expires_in"}.
+    access передаётся как `Authorization: Bearer <access>`.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = AuthTokenSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return Response(tokens.issue_pair(serializer.validated_data['user']))
+
+
+class SignedTokenRefreshView(APIView):
+    """
+    POST /api/auth/signed-token/refresh/
+    JSON: {"refresh": "..."}
+    Выдаёт новую пару токенов; предъявленный refresh-токен больше не действует.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        refresh = request.data.get('refresh')
+        if not refresh:
+            return Response({'detail': 'Не указан refresh'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            pair = tokens.rotate(refresh)
+        except tokens.InvalidToken:
+            return Response(
+                {'detail': 'Refresh-токен недействителен или уже использован.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return Response(pair)
+
+
+class KitchenQueueView(APIView):
+    """
+    GET /api/kitchen/queue/ — очередь кухни текущего повара (api/kitchen.py).
+    Возвращает {"items": [...], "batches": [...]}:
+      items   — открытые позиции по желаемому времени готовности заказа;
+      batches — сводка по блюдам: total_quantity, in_progress_quantity, order_count, due_by.
+    Отвечает 304 на If-None-Match, пока заказы и блюда повара не менялись.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsCook]
+
+    def get(self, request):
+        cook = request.user
+
+        def build():
+            return Response({
+                'items': kitchen.queue(cook),
+                'batches': kitchen.batches(cook),
+            })
+
+        return conditional_response(
+            request,
+            [versions.user_orders(cook.id), versions.cook_dishes(cook.id)],
+            build,
+        )
+
+
+class CookDashboardView(APIView):
+    """
+    GET /api/cooks/me/dashboard/ — панель текущего повара (api/dashboard.py):
+    число новых, принятых и готовящихся заказов, заказы, порции и выручка
+    за сегодня и ближайшие заказы по времени готовности.
+    Счётчики читаются готовыми — объём работы не зависит от числа заказов.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsCook]
+
+    def get(self, request):
+        return Response(CookDashboardSerializer(dashboard.summary(request.user)).data)
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    Отчёты по дневным сводкам (api/rollups.py) — время ответа не зависит от числа заказов.
+      GET /api/reports/cook-daily/?date_from=&date_to=   — выручка, заказы и порции по дням (30 дней)
+      GET /api/reports/top-dishes/?date_from=&date_to=&limit=&order_by=quantity|revenue|orders
+                                                         — популярные блюда (7 дней)
+    Повар видит только свои данные, админ — всех или одного повара (?cook_id=).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsCook | IsAdmin]
+
+    def _params(self, request):
+        params = ReportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        cook_id = request.user.id if request.user.role == 'cook' else data.get('cook_id')
+        return data, cook_id
+
+    @action(detail=False, methods=['get'], url_path='cook-daily')
+    def cook_daily(self, request):
+        params, cook_id = self._params(request)
+        return Response(CookDailyStatsSerializer(rollups.cook_daily(params, cook_id), many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='top-dishes')
+    def top_dishes(self, request):
+        params, cook_id = self._params(request)
+        return Response(TopDishSerializer(rollups.top_dishes(params, cook_id), many=True).data)
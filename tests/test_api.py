@@ -1,9 +1,20 @@
 import tempfile
+import time
 from datetime import datetime, timedelta
 
 django_settings_module = 'settings'
 
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
@@ -138,4 +149,2035 @@ class BusinessLogicTests(APITestCase):
         item.status = 'in_progress'
         item.save()
         refreshed = OrderItem.objects.get(id=item.id)
-        self.assertEqual(refreshed.status, 'in_progress')
\ No newline at end of file
+        self.assertEqual(refreshed.status, 'in_progress')
+
+
+class QueryBudgetMixin:
+    """
+    Бюджет запросов для эндпоинта: число SQL-запросов не должно зависеть
+    от размера выдачи и не должно превышать заданный потолок.
+    """
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, params or {})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        return len(ctx.captured_queries)
+
+    def assertQueryBudget(self, url, grow, budget, params=None):
+        # замер на маленькой выдаче, затем рост данных и повторный замер
+        small = self.count_queries(url, params)
+        grow()
+        large = self.count_queries(url, params)
+        self.assertEqual(
+            small, large,
+            f'{url}: число запросов растёт с размером выдачи ({small} -> {large})'
+        )
+        self.assertLessEqual(large, budget, f'{url}: {large} запросов при бюджете {budget}')
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='adm', role='admin')
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cooks = []
+        self.add_cooks(1)
+
+    def add_cooks(self, count):
+        start = len(self.cooks)
+        for i in range(start, start + count):
+            cook = User.objects.create(username=f'cook{i}', role='cook', address=f'Addr {i}')
+            dish = Dish.objects.create(name=f'Dish {i}', price=5, cook=cook)
+            cook.favorite_dishes.add(dish)
+            self.customer.favorite_dishes.add(dish)
+            CartItem.objects.create(customer=self.customer, dish=dish, quantity=2)
+            for _ in range(2):
+                order = Order.objects.create(customer=self.customer, cook=cook)
+                OrderItem.objects.create(order=order, dish=dish, quantity=1)
+                OrderItem.objects.create(
+                    order=order,
+                    dish=Dish.objects.create(name=f'Side {i}', price=1, cook=cook),
+                    quantity=3,
+                )
+            self.cooks.append(cook)
+
+    def grow(self):
+        self.add_cooks(4)
+
+    # бюджеты dishes/orders/cooks включают запрос маркеров версий для ETag
+
+    def test_order_list_customer(self):
+        self.client.force_authenticate(self.customer)
+        self.assertQueryBudget(reverse('order-list'), self.grow, budget=4)
+
+    def test_order_list_cook(self):
+        self.client.force_authenticate(self.cooks[0])
+        order = Order.objects.filter(cook=self.cooks[0]).first()
+
+        def grow():
+            for _ in range(4):
+                OrderItem.objects.create(
+                    order=order,
+                    dish=Dish.objects.create(name='Extra', price=2, cook=self.cooks[0]),
+                )
+        self.assertQueryBudget(reverse('order-list'), grow, budget=4)
+
+    def test_order_retrieve(self):
+        self.client.force_authenticate(self.customer)
+        order = Order.objects.filter(customer=self.customer).first()
+
+        def grow():
+            for _ in range(4):
+                OrderItem.objects.create(
+                    order=order,
+                    dish=Dish.objects.create(name='Extra', price=2, cook=order.cook),
+                )
+        self.assertQueryBudget(reverse('order-detail', args=[order.id]), grow, budget=3)
+
+    def test_order_item_list(self):
+        self.client.force_authenticate(self.admin)
+        self.assertQueryBudget(reverse('orderitem-list'), self.grow, budget=2)
+
+    def test_dish_list(self):
+        self.client.force_authenticate(self.customer)
+        self.assertQueryBudget(reverse('dish-list'), self.grow, budget=2)
+
+    def test_cart_list(self):
+        self.client.force_authenticate(self.customer)
+        self.assertQueryBudget(reverse('cartitem-list'), self.grow, budget=2)
+
+    def test_favorites(self):
+        self.client.force_authenticate(self.customer)
+        self.assertQueryBudget(reverse('user-favorites'), self.grow, budget=1)
+
+    def test_cooks(self):
+        self.assertQueryBudget(reverse('user-cooks'), self.grow, budget=3)
+
+    def test_user_list(self):
+        self.client.force_authenticate(self.admin)
+        self.assertQueryBudget(reverse('user-list'), self.grow, budget=3)
+
+
+class DishKeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.other = User.objects.create(username='other', role='cook', address='Addr 2')
+        for i in range(7):
+            Dish.objects.create(name=f'Soup {i}', price=5, cook=self.cook)
+            Dish.objects.create(name=f'Cake {i}', price=3, cook=self.other)
+        self.client.force_authenticate(self.customer)
+        self.url = reverse('dish-list')
+
+    def walk(self, params):
+        ids, url, queries = [], self.url, []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            queries.append([q['sql'] for q in ctx.captured_queries])
+            ids.extend(d['id'] for d in resp.data['results'])
+            url, params = resp.data['next'], None
+        return ids, queries
+
+    def test_without_params_returns_plain_list(self):
+        resp = self.client.get(self.url)
+        self.assertIsInstance(resp.data, list)
+        self.assertEqual(len(resp.data), 14)
+
+    def test_walks_all_pages_in_keyset_order(self):
+        ids, queries = self.walk({'page_size': 3})
+        expected = list(Dish.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(queries), 5)
+        # без COUNT(*) и одинаковое число запросов на любой глубине
+        # (выборка страницы + маркер версий для ETag)
+        self.assertEqual({len(q) for q in queries}, {2})
+        self.assertFalse(any('COUNT(' in sql for page in queries for sql in page))
+
+    def test_combines_with_cook_and_search_filters(self):
+        ids, _ = self.walk({'page_size': 2, 'cook_id': self.cook.id})
+        self.assertEqual(ids, list(self.cook.dishes.order_by('created_at', 'id').values_list('id', flat=True)))
+        ids, _ = self.walk({'cursor': '', 'search': 'Cake 1'})
+        self.assertEqual(ids, [Dish.objects.get(name='Cake 1').id])
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class DishSearchTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.soup = Dish.objects.create(name='Суп куриный', description='Домашний', price=5, cook=self.cook)
+        self.borsch = Dish.objects.create(name='Борщ', description='Как суп, только красный', price=6, cook=self.cook)
+        self.client.force_authenticate(self.customer)
+        self.url = reverse('dish-list')
+
+    def search(self, term):
+        resp = self.client.get(self.url, {'search': term})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [d['id'] for d in resp.data]
+
+    def test_unicode_case_folding_and_ranking(self):
+        # совпадение в названии выше совпадения в описании
+        self.assertEqual(self.search('суп'), [self.soup.id, self.borsch.id])
+        self.assertEqual(self.search('СУП'), [self.soup.id, self.borsch.id])
+
+    def test_prefix_and_all_words(self):
+        self.assertEqual(self.search('бор'), [self.borsch.id])
+        self.assertEqual(self.search('суп кур'), [self.soup.id])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        Dish.objects.filter(id=self.borsch.id).update(name='Щи', description='')
+        self.assertEqual(self.search('борщ'), [])
+        self.assertEqual(self.search('щи'), [self.borsch.id])
+        self.soup.delete()
+        self.assertEqual(self.search('суп'), [])
+
+    def test_cook_cascade_delete_and_rebuild(self):
+        self.cook.delete()
+        self.assertEqual(self.search('суп'), [])
+        call_command('rebuild_dish_search', stdout=StringIO())
+        self.assertEqual(self.search('суп'), [])
+        other = User.objects.create(username='cook2', role='cook', address='Addr')
+        dish = Dish.objects.create(name='Суп гороховый', price=4, cook=other)
+        self.assertEqual(self.search('горох'), [dish.id])
+
+
+class CartCheckoutTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cooks = [
+            User.objects.create(username=f'cook{i}', role='cook', address=f'Addr {i}')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.customer)
+        self.url = reverse('cartitem-checkout')
+
+    def fill_cart(self, cooks, per_cook):
+        for cook in cooks:
+            for i in range(per_cook):
+                dish = Dish.objects.create(name=f'{cook.username} {i}', price=5, cook=cook)
+                CartItem.objects.create(customer=self.customer, dish=dish, quantity=i + 1)
+
+    def checkout(self, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(self.url, data or {}, format='json')
+        return resp, len(ctx.captured_queries)
+
+    def test_splits_cart_per_cook_and_clears_it(self):
+        self.fill_cart(self.cooks[:2], per_cook=2)
+        resp, _ = self.checkout({'desired_ready_time': '2030-01-01T12:00:00Z'})
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(len(resp.data), 2)
+        self.assertEqual(
+            sorted(o['cook'] for o in resp.data),
+            ['cook0', 'cook1'],
+        )
+        for order in resp.data:
+            self.assertEqual(order['status'], 'pending')
+            self.assertEqual(order['desired_ready_time'], '2030-01-01T12:00:00Z')
+            self.assertEqual(sorted(i['quantity'] for i in order['items']), [1, 2])
+        self.assertFalse(CartItem.objects.filter(customer=self.customer).exists())
+        self.assertEqual(OrderItem.objects.filter(order__customer=self.customer).count(), 4)
+
+    def test_empty_cart(self):
+        resp, _ = self.checkout()
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_invalid_ready_time_keeps_cart(self):
+        self.fill_cart(self.cooks[:1], per_cook=1)
+        resp, _ = self.checkout({'desired_ready_time': 'завтра'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(CartItem.objects.filter(customer=self.customer).count(), 1)
+
+    def test_constant_queries(self):
+        self.fill_cart(self.cooks[:1], per_cook=1)
+        resp, small = self.checkout()
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.fill_cart(self.cooks, per_cook=5)
+        resp, large = self.checkout()
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(resp.data), 3)
+        self.assertEqual(small, large)
+
+
+class OrderCreateTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.other = User.objects.create(username='other', role='cook', address='Addr 2')
+        self.dishes = [
+            Dish.objects.create(name=f'Dish {i}', price=5, cook=self.cook) for i in range(12)
+        ]
+        self.client.force_authenticate(self.customer)
+        self.url = reverse('order-list')
+
+    def post(self, data):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(self.url, data, format='json')
+        return resp, len(ctx.captured_queries)
+
+    def test_items_with_quantities(self):
+        resp, _ = self.post({
+            'cook_id': self.cook.id,
+            'order_items': [
+                {'dish_id': self.dishes[0].id, 'quantity': 3},
+                {'dish_id': self.dishes[1].id},
+            ],
+            'dish_ids': [self.dishes[0].id],
+        })
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        quantities = {i['dish']['id']: i['quantity'] for i in resp.data['items']}
+        self.assertEqual(quantities, {self.dishes[0].id: 4, self.dishes[1].id: 1})
+        self.assertEqual(resp.data['items'][0]['dish']['cook'], 'cook')
+
+    def test_rejects_foreign_missing_and_empty(self):
+        foreign = Dish.objects.create(name='Чужое', price=1, cook=self.other)
+        resp, _ = self.post({'cook_id': self.cook.id, 'order_items': [{'dish_id': foreign.id}]})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp, _ = self.post({'cook_id': self.cook.id, 'dish_ids': [999999]})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp, _ = self.post({'cook_id': self.cook.id, 'order_items': [{'dish_id': self.dishes[0].id, 'quantity': 0}]})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp, _ = self.post({'cook_id': self.cook.id})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_constant_queries(self):
+        resp, small = self.post({'cook_id': self.cook.id, 'order_items': [{'dish_id': self.dishes[0].id}]})
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        resp, large = self.post({
+            'cook_id': self.cook.id,
+            'order_items': [{'dish_id': d.id, 'quantity': 2} for d in self.dishes],
+        })
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(resp.data['items']), 12)
+        self.assertEqual(small, large)
+
+
+
+def make_jpeg(width=1600, height=1200, color=(200, 80, 40)):
+    from PIL import Image
+    buf = BytesIO()
+    Image.new('RGB', (width, height), color).save(buf, 'JPEG')
+    return SimpleUploadedFile('photo.jpg', buf.getvalue(), content_type='image/jpeg')
+
+
+class DishImageVariantsTests(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name, IMAGE_PROCESSING_ASYNC=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+
+    def test_upload_builds_variants_and_placeholder(self):
+        self.client.force_authenticate(self.cook)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(reverse('dish-list'), {
+                'name': 'Пирог', 'price': '5.00', 'image': make_jpeg(),
+            }, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+
+        dish = Dish.objects.get(id=resp.data['id'])
+        sizes = dish.image_variants['sizes']
+        self.assertEqual(dish.image_variants['source'], dish.image.name)
+        self.assertEqual((sizes['thumb']['width'], sizes['thumb']['height']), (200, 150))
+        for entry in sizes.values():
+            self.assertTrue(dish.image.storage.exists(entry['webp']))
+            self.assertTrue(entry['jpeg'].endswith('.jpg'))
+        self.assertTrue(dish.image_placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertLess(len(dish.image_placeholder), 1500)
+
+        data = self.client.get(reverse('dish-detail', args=[dish.id])).data
+        self.assertTrue(data['image_variants']['medium']['webp'].startswith('http://testserver/media/'))
+        self.assertEqual(data['image_placeholder'], dish.image_placeholder)
+
+    def test_small_images_are_not_upscaled(self):
+        dish = Dish(name='Каша', price=2, cook=self.cook)
+        dish.image.save('small.jpg', make_jpeg(100, 50), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            dish.save()
+        dish.refresh_from_db()
+        self.assertEqual(dish.image_variants['sizes']['large']['width'], 100)
+
+    def test_backfill_command(self):
+        dish = Dish(name='Суп', price=3, cook=self.cook)
+        dish.image.save('old.jpg', make_jpeg(), save=False)
+        Dish.objects.bulk_create([dish])
+        dish = Dish.objects.get(name='Суп')
+        self.assertEqual(dish.image_variants, {})
+
+        out = StringIO()
+        call_command('build_image_variants', workers=2, stdout=out)
+        dish.refresh_from_db()
+        self.assertIn('webp', dish.image_variants['sizes']['thumb'])
+        self.assertIn('Обработано: 1', out.getvalue())
+
+
+class ContentAddressedMediaTests(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name, IMAGE_PROCESSING_ASYNC=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+
+    def save_dish(self, upload):
+        dish = Dish(name='Плов', price=7, cook=self.cook)
+        dish.image.save(upload.name, upload, save=False)
+        Dish.objects.bulk_create([dish])
+        return dish
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.save_dish(make_jpeg())
+        second = self.save_dish(make_jpeg())
+        other = self.save_dish(make_jpeg(color=(0, 0, 255)))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertRegex(first.image.name, r'^dishes/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+
+    def test_serves_with_immutable_cache_etag_and_ranges(self):
+        dish = self.save_dish(make_jpeg())
+        url = dish.image.url
+        size = dish.image.size
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', resp['Cache-Control'])
+        self.assertEqual(int(resp['Content-Length']), size)
+        etag = resp['ETag']
+        self.assertIn(dish.image.name.rsplit('/', 1)[1].split('.')[0], etag)
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], f'bytes 0-9/{size}')
+        self.assertEqual(len(b''.join(resp.streaming_content)), 10)
+
+        resp = self.client.get(url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(resp['Content-Range'], f'bytes {size - 5}-{size - 1}/{size}')
+
+        resp = self.client.get(url, HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual(resp.status_code, 416)
+
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/dishes/missing.jpg').status_code, 404)
+
+    def test_accel_redirect_mode(self):
+        dish = self.save_dish(make_jpeg())
+        with override_settings(MEDIA_ACCEL_REDIRECT='nginx'):
+            resp = self.client.get(dish.image.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['X-Accel-Redirect'], '/protected-media/' + dish.image.name)
+        self.assertEqual(resp.content, b'')
+        self.assertIn('immutable', resp['Cache-Control'])
+
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.other = User.objects.create(username='other', role='cook', address='Addr 2')
+        self.dish = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+        self.other_dish = Dish.objects.create(name='Каша', price=3, cook=self.other)
+        self.client.force_authenticate(self.customer)
+
+    def revalidate(self, url, etag, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, params or {}, HTTP_IF_NONE_MATCH=etag)
+        return resp, len(ctx.captured_queries)
+
+    def test_dish_list_304_without_serializing(self):
+        url = reverse('dish-list')
+        params = {'cook_id': self.cook.id}
+        resp = self.client.get(url, params)
+        etag = resp['ETag']
+        self.assertTrue(resp.has_header('Last-Modified'))
+
+        resp, queries = self.revalidate(url, etag, params)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp['ETag'], etag)
+        self.assertEqual(queries, 1)
+
+        # правка меню другого повара не сбрасывает ETag
+        self.other_dish.price = 4
+        self.other_dish.save()
+        self.assertEqual(self.revalidate(url, etag, params)[0].status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.dish.price = 6
+        self.dish.save()
+        resp, _ = self.revalidate(url, etag, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_dish_delete_by_cook_cascade(self):
+        url = reverse('dish-list')
+        etag = self.client.get(url).get('ETag')
+        self.other.delete()
+        self.assertEqual(self.revalidate(url, etag)[0].status_code, status.HTTP_200_OK)
+
+    def test_orders_follow_status_and_item_changes(self):
+        order = Order.objects.create(customer=self.customer, cook=self.cook)
+        item = OrderItem.objects.create(order=order, dish=self.dish)
+        url = reverse('order-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag)[0].status_code, status.HTTP_304_NOT_MODIFIED)
+
+        item.status = 'ready'
+        item.save()
+        resp, _ = self.revalidate(url, etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        etag = resp['ETag']
+
+        # заказы чужого пользователя не влияют
+        stranger = User.objects.create(username='cust2', role='customer')
+        Order.objects.create(customer=stranger, cook=self.other)
+        self.assertEqual(self.revalidate(url, etag)[0].status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # оформление корзины идёт через bulk_create, маркер обновляется явно
+        CartItem.objects.create(customer=self.customer, dish=self.dish)
+        self.client.post(reverse('cartitem-checkout'), {}, format='json')
+        self.assertEqual(self.revalidate(url, etag)[0].status_code, status.HTTP_200_OK)
+
+    def test_item_save_uses_loaded_order(self):
+        order = Order.objects.create(customer=self.customer, cook=self.cook)
+        item = OrderItem.objects.create(order=order, dish=self.dish)
+        item.status = 'ready'
+        with CaptureQueriesContext(connection) as ctx:
+            item.save()
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "api_order"' in q['sql']])
+        # заказ не загружен — участники читаются из базы
+        item = OrderItem.objects.get(pk=item.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            item.save()
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "api_order"' in q['sql']]), 1)
+
+    def test_missing_version_keys_names_viewset(self):
+        from api.conditional import ConditionalGetMixin
+
+        class MenuView(ConditionalGetMixin):
+            pass
+
+        with self.assertRaisesRegex(NotImplementedError, 'MenuView должен определить get_version_keys'):
+            MenuView().get_version_keys()
+
+    def test_customer_rename_seen_by_cook_and_admin(self):
+        Order.objects.create(customer=self.customer, cook=self.cook)
+        admin = User.objects.create(username='admin', role='admin')
+        url = reverse('order-list')
+        etags = {}
+        for user in (self.cook, admin):
+            self.client.force_authenticate(user)
+            etags[user] = self.client.get(url)['ETag']
+        self.customer.username = 'renamed'
+        self.customer.save()
+        for user in (self.cook, admin):
+            self.client.force_authenticate(user)
+            resp, _ = self.revalidate(url, etags[user])
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(resp.data['results'][0]['customer'], 'renamed')
+
+    def test_cooks_list(self):
+        url = reverse('user-cooks')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag)[0].status_code, status.HTTP_304_NOT_MODIFIED)
+        self.cook.address = 'New'
+        self.cook.save()
+        self.assertEqual(self.revalidate(url, etag)[0].status_code, status.HTTP_200_OK)
+
+
+class MenuCacheTests(APITestCase):
+    def setUp(self):
+        from api import menu_cache
+        self.menu_cache = menu_cache
+        menu_cache.reset_stats()
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.admin = User.objects.create(username='adm', role='admin')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.other = User.objects.create(username='other', role='cook', address='Addr 2')
+        self.dish = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+        Dish.objects.create(name='Каша', price=3, cook=self.other)
+        self.client.force_authenticate(self.customer)
+        self.url = reverse('dish-list')
+
+    def get_menu(self, cook):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, {'cook_id': cook.id})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp, len(ctx.captured_queries)
+
+    def test_hit_after_miss_and_precise_invalidation(self):
+        resp, _ = self.get_menu(self.cook)
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        resp, queries = self.get_menu(self.cook)
+        self.assertEqual(resp['X-Cache'], 'HIT')
+        self.assertEqual(queries, 1)  # только маркер версии
+        self.assertEqual([d['name'] for d in resp.data], ['Суп'])
+
+        self.get_menu(self.other)
+        # правка блюда повара сбрасывает только его меню
+        self.dish.name = 'Суп дня'
+        self.dish.save()
+        resp, _ = self.get_menu(self.cook)
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        self.assertEqual(resp.data[0]['name'], 'Суп дня')
+        self.assertEqual(self.get_menu(self.other)[0]['X-Cache'], 'HIT')
+
+        Dish.objects.create(name='Борщ', price=6, cook=self.cook)
+        resp, _ = self.get_menu(self.cook)
+        self.assertEqual(len(resp.data), 2)
+        self.dish.delete()
+        resp, _ = self.get_menu(self.cook)
+        self.assertEqual([d['name'] for d in resp.data], ['Борщ'])
+
+        self.client.force_authenticate(self.admin)
+        stats = self.client.get(reverse('dish-cache-stats')).data
+        self.assertEqual((stats['hits'], stats['misses']), (2, 5))
+
+    def test_stats_admin_only(self):
+        resp = self.client.get(reverse('dish-cache-stats'))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_concurrent_misses_build_once(self):
+        import threading
+        import time
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return ['menu']
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.menu_cache.get_or_build('menu:test:stampede', build)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], [['menu']] * 5)
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+        from api.authentication import token_cache
+        self.token_cache = token_cache
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.token = Token.objects.create(user=self.customer)
+        self.url = reverse('cartitem-list')
+
+    def get(self, key=None):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, HTTP_AUTHORIZATION=f'Token {key or self.token.key}')
+        auth_queries = [q for q in ctx.captured_queries if 'authtoken_token' in q['sql']]
+        return resp, len(auth_queries)
+
+    def test_second_request_skips_token_lookup(self):
+        resp, lookups = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(lookups, 1)
+        resp, lookups = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(lookups, 0)
+        stats = self.token_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['db_lookups_saved']), (1, 1, 1))
+
+    def test_role_and_active_changes_invalidate(self):
+        self.get()
+        self.customer.role = 'cook'
+        self.customer.save()
+        self.assertEqual(self.get()[0].status_code, status.HTTP_403_FORBIDDEN)
+        self.customer.role = 'customer'
+        self.customer.is_active = False
+        self.customer.save()
+        self.assertEqual(self.get()[0].status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_delete_invalidates(self):
+        self.get()
+        self.token.delete()
+        self.assertEqual(self.get()[0].status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_ttl_and_bounded_size(self):
+        from rest_framework.authtoken.models import Token
+        with override_settings(TOKEN_AUTH_CACHE_TTL=0):
+            self.get()
+            self.assertEqual(self.get()[1], 1)
+        with override_settings(TOKEN_AUTH_CACHE_SIZE=2):
+            others = [
+                Token.objects.create(user=User.objects.create(username=f'c{i}', role='customer'))
+                for i in range(3)
+            ]
+            for token in others:
+                self.get(token.key)
+            self.assertEqual(self.token_cache.stats()['size'], 2)
+            self.assertEqual(self.get(others[0].key)[1], 1)  # самый старый вытеснен
+
+
+class SignedTokenTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(username='cust', password='pass', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.dish = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+        Order.objects.create(customer=self.customer, cook=self.cook)
+
+    def obtain(self):
+        resp = self.client.post(reverse('api_signed_token'), {'username': 'cust', 'password': 'pass'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        return resp.data
+
+    def get(self, url, access):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {access}')
+        user_queries = [q for q in ctx.captured_queries if 'FROM "api_user"' in q['sql'] or 'authtoken' in q['sql']]
+        return resp, user_queries
+
+    def test_hot_paths_need_no_auth_queries(self):
+        access = self.obtain()['access']
+        for url in (reverse('order-list'), reverse('dish-list'), reverse('cartitem-list')):
+            resp, user_queries = self.get(url, access)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, url)
+            self.assertEqual(user_queries, [], url)
+        self.assertEqual(self.get(reverse('order-list'), access)[0].data['count'], 1)
+
+    def test_role_permissions_from_token(self):
+        access = self.obtain()['access']
+        resp, _ = self.get(reverse('user-list'), access)
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        resp, _ = self.get(reverse('user-me'), access)
+        self.assertEqual(resp.data['username'], 'cust')
+
+    def test_invalid_and_expired_access(self):
+        access = self.obtain()['access']
+        self.assertEqual(self.get(reverse('dish-list'), access + 'x')[0].status_code, status.HTTP_401_UNAUTHORIZED)
+        with override_settings(SIGNED_ACCESS_TOKEN_TTL=-1):
+            self.assertEqual(self.get(reverse('dish-list'), access)[0].status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_and_detects_reuse(self):
+        pair = self.obtain()
+        url = reverse('api_signed_token_refresh')
+        resp = self.client.post(url, {'refresh': pair['refresh']}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        new_pair = resp.data
+        self.assertNotEqual(new_pair['refresh'], pair['refresh'])
+        self.assertEqual(self.get(reverse('dish-list'), new_pair['access'])[0].status_code, status.HTTP_200_OK)
+
+        # старый refresh использован: повтор отзывает и новый
+        resp = self.client.post(url, {'refresh': pair['refresh']}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        resp = self.client.post(url, {'refresh': new_pair['refresh']}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_picks_up_role_change(self):
+        pair = self.obtain()
+        self.customer.role = 'cook'
+        self.customer.save()
+        new_pair = self.client.post(reverse('api_signed_token_refresh'), {'refresh': pair['refresh']}, format='json').data
+        self.assertEqual(self.get(reverse('cartitem-list'), new_pair['access'])[0].status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_me_loads_user_once(self):
+        access = self.obtain()['access']
+        resp, user_queries = self.get(reverse('user-me'), access)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual((resp.data['username'], resp.data['first_name']), ('cust', self.customer.first_name))
+        self.assertEqual(len(user_queries), 1)
+
+    def test_inactive_user_cannot_refresh(self):
+        pair = self.obtain()
+        self.customer.is_active = False
+        self.customer.save()
+        resp = self.client.post(reverse('api_signed_token_refresh'), {'refresh': pair['refresh']}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        # access действует до конца срока, но профиль целиком уже не отдаётся
+        self.assertEqual(self.get(reverse('dish-list'), pair['access'])[0].status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get(reverse('user-me'), pair['access'])[0].status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class OrderEventsTests(APITestCase):
+    def setUp(self):
+        from api import events
+        self.events = events
+        self.broker = events.InMemoryBroker()
+        events.set_broker(self.broker)
+        self.addCleanup(events.set_broker, None)
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.dish = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+
+    def collect(self, channel, action, count):
+        """Подписывается на канал, выполняет action в другом потоке и ждёт count событий."""
+        import asyncio
+        import threading
+
+        async def run():
+            received = []
+            subscription = self.broker.subscribe([channel])
+            # первый __anext__ регистрирует подписчика
+            first = asyncio.ensure_future(subscription.__anext__())
+            await asyncio.sleep(0)
+            thread = threading.Thread(target=action)
+            thread.start()
+            received.append(await asyncio.wait_for(first, 5))
+            while len(received) < count:
+                received.append(await asyncio.wait_for(subscription.__anext__(), 5))
+            thread.join()
+            await subscription.aclose()
+            return received
+
+        return asyncio.run(run())
+
+    def test_process_and_item_status_publish_to_both_sides(self):
+        order = Order.objects.create(customer=self.customer, cook=self.cook)
+        item = OrderItem.objects.create(order=order, dish=self.dish)
+        published = []
+        self.broker.publish = lambda channels, event: published.append((channels, event))
+
+        self.client.force_authenticate(self.cook)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(reverse('order-process', args=[order.id]), {'status': 'accepted'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.status = 'ready'
+            item.save()
+
+        self.assertEqual(
+            [(channels, event['type'], event['status']) for channels, event in published],
+            [
+                ([f'user:{self.customer.id}', f'user:{self.cook.id}'], 'order.updated', 'accepted'),
+                ([f'user:{self.customer.id}', f'user:{self.cook.id}'], 'order_item.updated', 'ready'),
+            ],
+        )
+
+    def test_checkout_publishes_created_orders(self):
+        CartItem.objects.create(customer=self.customer, dish=self.dish)
+        published = []
+        self.broker.publish = lambda channels, event: published.append(event['type'])
+        self.client.force_authenticate(self.customer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('cartitem-checkout'), {}, format='json')
+        self.assertEqual(published, ['order.created'])
+
+    def test_in_memory_broker_delivers_across_threads(self):
+        received = self.collect('user:1', lambda: [
+            self.broker.publish(['user:2'], {'type': 'other'}),
+            self.broker.publish(['user:1', 'user:2'], {'type': 'mine'}),
+        ], count=1)
+        self.assertEqual([event['type'] for _, event in received], ['mine'])
+
+    def test_broker_requires_both_methods(self):
+        class PublishOnly(self.events.Broker):
+            def publish(self, channels, event):
+                pass
+
+        with self.assertRaisesRegex(TypeError, 'subscribe'):
+            PublishOnly()
+
+    def test_sqlite_broker_shares_events_between_instances(self):
+        import asyncio
+        from api.events import SQLiteBroker
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f'{tmp}/events.sqlite3'
+            publisher = SQLiteBroker(path)
+            subscriber = SQLiteBroker(path, poll_interval=0.01)
+            first = publisher.publish(['user:1'], {'type': 'old'})
+            publisher.publish(['user:2'], {'type': 'other'})
+            publisher.publish(['user:1', 'user:2'], {'type': 'new'})
+
+            async def read():
+                subscription = subscriber.subscribe(['user:1', 'user:2'], last_id=first)
+                items = [await asyncio.wait_for(subscription.__anext__(), 5) for _ in range(2)]
+                await subscription.aclose()
+                return items
+
+            items = asyncio.run(read())
+        # событие в двух каналах подписчика приходит один раз
+        self.assertEqual([event['type'] for _, event in items], ['other', 'new'])
+
+    def test_sse_stream(self):
+        import asyncio
+        from api import tokens
+        from api.realtime import EventsRouter
+
+        access = tokens.issue_access(self.customer)
+        scope = {
+            'type': 'http', 'path': '/api/events/stream/', 'method': 'GET',
+            'query_string': f'token={access}'.encode(), 'headers': [],
+        }
+
+        async def run():
+            sent = []
+            disconnect = asyncio.Event()
+
+            async def receive():
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                sent.append(message)
+                if b'order.updated' in message.get('body', b''):
+                    disconnect.set()
+
+            async def publish_later():
+                await asyncio.sleep(0.05)
+                self.broker.publish([f'user:{self.customer.id}'], {'type': 'order.updated', 'order_id': 7})
+
+            asyncio.ensure_future(publish_later())
+            await asyncio.wait_for(EventsRouter(None)(scope, receive, send), 5)
+            return sent
+
+        sent = asyncio.run(run())
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream; charset=utf-8'), sent[0]['headers'])
+        body = b''.join(m.get('body', b'') for m in sent[1:]).decode()
+        self.assertIn('event: order.updated\ndata: {"type": "order.updated", "order_id": 7}', body)
+
+    def test_sse_requires_token(self):
+        import asyncio
+        from api.realtime import EventsRouter
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'path': '/api/events/stream/', 'query_string': b'token=bad:signature', 'headers': []}
+        asyncio.run(EventsRouter(None)(scope, None, send))
+        self.assertEqual(sent[0]['status'], 401)
+
+
+class OrderChangesTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.other_cook = User.objects.create(username='other', role='cook', address='Addr')
+        self.dish = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+        self.other_dish = Dish.objects.create(name='Каша', price=3, cook=self.other_cook)
+        self.order = Order.objects.create(customer=self.customer, cook=self.cook)
+        self.item = OrderItem.objects.create(order=self.order, dish=self.dish)
+        self.url = reverse('order-changes')
+
+    def changes(self, user, **params):
+        self.client.force_authenticate(user)
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data
+
+    def test_initial_cursor_and_item_status_change(self):
+        cursor = self.changes(self.cook)['cursor']
+        self.item.status = 'ready'
+        self.item.save()
+        Order.objects.create(customer=self.customer, cook=self.other_cook)
+
+        data = self.changes(self.cook, since=cursor, wait=0)
+        self.assertEqual(data['orders'], [])
+        self.assertEqual([(i['id'], i['order_id'], i['status']) for i in data['items']],
+                         [(self.item.id, self.order.id, 'ready')])
+        self.assertGreater(int(data['cursor']), int(cursor))
+        # чужой заказ виден его повару, но не этому
+        self.assertEqual(len(self.changes(self.other_cook, since=cursor, wait=0)['orders']), 1)
+        self.assertEqual(self.changes(self.cook, since=data['cursor'], wait=0)['items'], [])
+
+    def test_bulk_created_orders_are_numbered(self):
+        cursor = self.changes(self.customer)['cursor']
+        CartItem.objects.create(customer=self.customer, dish=self.dish)
+        CartItem.objects.create(customer=self.customer, dish=self.other_dish)
+        self.client.post(reverse('cartitem-checkout'), {}, format='json')
+        data = self.changes(self.customer, since=cursor, wait=0)
+        self.assertEqual(len(data['orders']), 2)
+        self.assertEqual(len(data['items']), 2)
+
+    def test_waits_until_change(self):
+        cursor = self.changes(self.customer)['cursor']
+        sleeps = []
+
+        def change_during_wait(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                self.order.status = 'accepted'
+                self.order.save()
+
+        with mock.patch('api.changes.time.sleep', side_effect=change_during_wait):
+            data = self.changes(self.customer, since=cursor, wait=10)
+        self.assertEqual(len(sleeps), 2)
+        self.assertEqual([o['status'] for o in data['orders']], ['accepted'])
+
+    @override_settings(ORDER_CHANGES_MAX_WAITERS=1)
+    def test_waiters_are_capped(self):
+        from api import changes
+        cursor = self.changes(self.customer)['cursor']
+        with changes.wait_slot() as granted, mock.patch('api.changes.time.sleep') as sleep:
+            self.assertTrue(granted)
+            # единственное место занято — ответ сразу, без ожидания
+            data = self.changes(self.customer, since=cursor, wait=10)
+        sleep.assert_not_called()
+        self.assertEqual((data['orders'], data['items']), ([], []))
+        with changes.wait_slot() as granted:
+            self.assertTrue(granted)
+
+    def test_service_fields_do_not_take_change_numbers(self):
+        from api.models import ChangeSequence
+        head = ChangeSequence.current()
+        self.item.unit_price = 5
+        self.item.save(update_fields=['unit_price'])
+        self.assertEqual(ChangeSequence.current(), head)
+        self.item.status = 'ready'
+        self.item.save(update_fields=['status'])
+        self.assertEqual(ChangeSequence.current(), head + 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.change_seq, head + 1)
+
+    def test_timeout_returns_empty(self):
+        cursor = self.changes(self.customer)['cursor']
+        data = self.changes(self.customer, since=cursor, wait=0)
+        self.assertEqual((data['orders'], data['items'], data['cursor']), ([], [], cursor))
+
+    @override_settings(ORDER_CHANGES_PAGE_SIZE=1)
+    def test_large_backlog_is_paged(self):
+        cursor = self.changes(self.customer)['cursor']
+        created = [Order.objects.create(customer=self.customer, cook=self.cook).id for _ in range(3)]
+        seen = []
+        for _ in range(3):
+            data = self.changes(self.customer, since=cursor, wait=0)
+            self.assertEqual(len(data['orders']), 1)
+            cursor = data['cursor']
+            seen.append(data['orders'][0]['id'])
+        # страницы идут по номерам изменений, без пропусков и повторов
+        self.assertEqual(seen, created)
+        self.assertEqual(self.changes(self.customer, since=cursor, wait=0)['orders'], [])
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get(self.url, {'since': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class KitchenQueueTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        other_cook = User.objects.create(username='other', role='cook', address='Addr')
+        self.soup = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+        self.porridge = Dish.objects.create(name='Каша', price=3, cook=self.cook)
+        noon = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        self.late = self.make_order(noon + timedelta(hours=2), [(self.soup, 3), (self.porridge, 1)])
+        self.early = self.make_order(noon, [(self.soup, 4)])
+        self.no_time = self.make_order(None, [(self.porridge, 2)])
+        # не попадают в очередь: готовая позиция, закрытый заказ, чужой повар
+        OrderItem.objects.create(order=self.early, dish=self.porridge, status='ready')
+        self.make_order(noon, [(self.soup, 9)], status='completed')
+        other_dish = Dish.objects.create(name='Плов', price=7, cook=other_cook)
+        Order.objects.create(customer=self.customer, cook=other_cook).orderitem_set.create(dish=other_dish)
+        self.noon = noon
+
+    def make_order(self, ready_time, items, status='accepted'):
+        order = Order.objects.create(
+            customer=self.customer, cook=self.cook, status=status, desired_ready_time=ready_time,
+        )
+        for dish, quantity in items:
+            OrderItem.objects.create(order=order, dish=dish, quantity=quantity)
+        return order
+
+    def get(self, user=None):
+        self.client.force_authenticate(user or self.cook)
+        return self.client.get(reverse('kitchen-queue'))
+
+    def test_items_ordered_by_ready_time(self):
+        resp = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['order_id'], item['dish_name'], item['quantity']) for item in resp.data['items']],
+            [
+                (self.early.id, 'Суп', 4),
+                (self.late.id, 'Суп', 3),
+                (self.late.id, 'Каша', 1),
+                (self.no_time.id, 'Каша', 2),
+            ],
+        )
+
+    def test_batches_grouped_by_dish(self):
+        self.early.orderitem_set.filter(dish=self.soup).update(status='in_progress')
+        batches = self.get().data['batches']
+        self.assertEqual(
+            [(b['dish_name'], b['total_quantity'], b['in_progress_quantity'], b['order_count'], b['due_by'])
+             for b in batches],
+            [
+                ('Суп', 7, 4, 2, self.noon),
+                ('Каша', 3, 0, 2, self.noon + timedelta(hours=2)),
+            ],
+        )
+
+    def test_queries_and_conditional_get(self):
+        for _ in range(5):
+            self.make_order(self.noon, [(self.soup, 1), (self.porridge, 1)])
+        self.client.force_authenticate(self.cook)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('kitchen-queue'))
+        # маркеры + позиции + сводка
+        self.assertEqual(len(ctx.captured_queries), 3)
+        resp = self.client.get(reverse('kitchen-queue'), HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_only_cooks(self):
+        self.assertEqual(self.get(self.customer).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IndexAdvisorTests(APITestCase):
+    def test_hot_paths_have_clean_plans(self):
+        out = StringIO()
+        call_command('index_advisor', stdout=out)
+        self.assertIn('Все планы запросов в порядке.', out.getvalue())
+
+    def test_find_problems(self):
+        from api import query_plans
+        plan = [
+            (2, 0, 'SCAN api_order'),
+            (3, 0, 'SCAN api_dish USING INDEX dish_created_id_idx'),
+            (4, 0, 'SEARCH api_user USING INTEGER PRIMARY KEY (rowid=?)'),
+            (5, 0, 'SCAN CONSTANT ROW'),
+            (9, 0, 'USE TEMP B-TREE FOR ORDER BY'),
+        ]
+        self.assertEqual([kind for kind, _ in query_plans.find_problems(plan)], [
+            query_plans.FULL_SCAN, query_plans.FULL_INDEX_SCAN, query_plans.TEMP_BTREE,
+        ])
+
+    def test_regression_fails_command(self):
+        from api import query_plans
+        original = query_plans.representative_queries
+
+        def with_unindexed(using='default'):
+            return original(using) + [query_plans.PlannedQuery('без индекса', Dish.objects.filter(price=1))]
+
+        with mock.patch.object(query_plans, 'representative_queries', with_unindexed):
+            with self.assertRaises(CommandError):
+                call_command('index_advisor', stdout=StringIO())
+
+    def test_order_list_newest_first(self):
+        customer = User.objects.create(username='cust', role='customer')
+        cook = User.objects.create(username='cook', role='cook')
+        first = Order.objects.create(customer=customer, cook=cook, status='pending')
+        second = Order.objects.create(customer=customer, cook=cook, status='accepted')
+        third = Order.objects.create(customer=customer, cook=cook, status='completed')
+        self.client.force_authenticate(cook)
+        resp = self.client.get(reverse('order-list'))
+        self.assertEqual([o['id'] for o in resp.data['results']], [third.id, second.id, first.id])
+
+
+@override_settings(DATABASE_READ_ALIAS='replica', READ_REPLICA_PIN_SECONDS=5)
+class ReadReplicaRoutingTests(APITestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.dish = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+        Order.objects.create(customer=self.customer, cook=self.cook)
+
+    def count_queries(self, method, url, user=None, data=None):
+        from django.db import connections
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            resp = getattr(self.client, method)(url, data, format='json')
+        return resp, len(primary.captured_queries), len(replica.captured_queries)
+
+    def test_list_reads_go_to_replica(self):
+        # реплика ещё не обновлялась — в ней пусто
+        resp, primary, replica = self.count_queries('get', reverse('dish-list'), self.customer)
+        self.assertEqual(resp.data, [])
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        # после обновления реплики каталог читается из неё
+        User.objects.using('replica').create(id=self.cook.id, username='cook', role='cook')
+        Dish.objects.using('replica').create(id=self.dish.id, name='Суп', price=5, cook_id=self.cook.id)
+        resp, primary, _ = self.count_queries('get', reverse('dish-list'), self.customer)
+        self.assertEqual([d['name'] for d in resp.data], ['Суп'])
+        self.assertEqual(primary, 0)
+
+    def test_writes_and_read_after_write_use_primary(self):
+        User.objects.using('replica').create(id=self.customer.id, username='cust', role='customer')
+        other = User.objects.create(username='other', role='customer')
+        User.objects.using('replica').create(id=other.id, username='other', role='customer')
+
+        resp, _, replica = self.count_queries(
+            'post', reverse('cartitem-list'), self.customer, {'dish_id': self.dish.id, 'quantity': 1},
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replica, 0)
+        self.assertEqual(CartItem.objects.filter(customer=self.customer).count(), 1)
+
+        # писавший пользователь видит свои заказы из основной базы
+        resp, primary, replica = self.count_queries('get', reverse('order-list'), self.customer)
+        self.assertEqual(resp.data['count'], 1)
+        self.assertEqual(replica, 0)
+        # остальные читают из реплики
+        resp, _, replica = self.count_queries('get', reverse('order-list'), other)
+        self.assertGreater(replica, 0)
+
+    def test_without_read_alias_everything_uses_default(self):
+        with override_settings(DATABASE_READ_ALIAS=None):
+            resp, primary, replica = self.count_queries('get', reverse('dish-list'), self.customer)
+        self.assertEqual(len(resp.data), 1)
+        self.assertEqual(replica, 0)
+
+    def test_refresh_copies_sqlite_file(self):
+        import sqlite3
+        from api import replica
+        with tempfile.TemporaryDirectory() as tmp:
+            source, target = f'{tmp}/db.sqlite3', f'{tmp}/replica.sqlite3'
+            with sqlite3.connect(source) as conn:
+                conn.execute('CREATE TABLE t (x)')
+                conn.execute('INSERT INTO t VALUES (1), (2)')
+            replica.refresh(source, target)
+            with sqlite3.connect(target) as conn:
+                self.assertEqual(conn.execute('SELECT COUNT(*) FROM t').fetchone()[0], 2)
+
+
+class SQLiteWritePathTests(APITestCase):
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_journal_mode_set_once_by_command(self):
+        import sqlite3
+        # соединения не переключают режим журнала: файл базы меняет только команда
+        self.assertNotIn('journal_mode', connection.settings_dict['OPTIONS']['init_command'])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f'{tmp}/db.sqlite3'
+            with sqlite3.connect(path) as conn:
+                conn.execute('CREATE TABLE t (x)')
+            conn.close()
+            databases = {**settings.DATABASES, 'other': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}}
+            out = StringIO()
+            with override_settings(DATABASES=databases):
+                call_command('sqlite_journal_mode', database='other', stdout=out)
+            self.assertIn('journal_mode=wal', out.getvalue())
+            with open(path, 'rb') as db:
+                self.assertEqual(db.read(20)[18:20], b'\x02\x02')
+
+    def test_backoff_retries_only_lock_errors(self):
+        import sqlite3
+        from api.sqlite import call_with_backoff
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise sqlite3.OperationalError('database is locked')
+            return 'ok'
+
+        with mock.patch('api.sqlite.time.sleep') as sleep:
+            self.assertEqual(call_with_backoff(flaky, attempts=5, base_delay=0.01), 'ok')
+            self.assertEqual(sleep.call_count, 2)
+            with self.assertRaises(sqlite3.OperationalError), self.assertLogs('api.sqlite', 'WARNING'):
+                call_with_backoff(mock.Mock(side_effect=sqlite3.OperationalError('database is locked')), attempts=2)
+            broken = mock.Mock(side_effect=sqlite3.OperationalError('no such table: x'))
+            with self.assertRaises(sqlite3.OperationalError):
+                call_with_backoff(broken, attempts=5)
+            self.assertEqual(broken.call_count, 1)
+
+    def test_create_retried_after_commit_lock_stays_create(self):
+        import sqlite3
+        from contextlib import contextmanager
+        from rest_framework import serializers
+        from api.sqlite import LockRetryMixin
+        calls = []
+
+        class RecordingSerializer(serializers.Serializer):
+            def create(self, validated_data):
+                calls.append('create')
+                return object()
+
+            def update(self, instance, validated_data):
+                calls.append('update')
+                return instance
+
+        class Base:
+            def perform_create(self, serializer):
+                serializer.save()
+
+        class View(LockRetryMixin, Base):
+            pass
+
+        @contextmanager
+        def locked_commit(using=None):
+            yield
+            # первая попытка: строка записана, но COMMIT не прошёл
+            if len(calls) == 1:
+                raise sqlite3.OperationalError('database is locked')
+
+        serializer = RecordingSerializer(data={})
+        serializer.is_valid(raise_exception=True)
+        with mock.patch('api.sqlite.transaction.atomic', locked_commit), \
+                mock.patch('api.sqlite.connections', {'default': mock.Mock(in_atomic_block=False)}), \
+                mock.patch('api.sqlite.time.sleep'):
+            View().perform_create(serializer)
+        self.assertEqual(calls, ['create', 'create'])
+
+    def test_group_committer_batches_waiting_writes(self):
+        import threading
+        from api.group_commit import GroupCommitter
+        release = threading.Event()
+        batches = []
+
+        def run_batch(funcs):
+            release.wait(5)
+            batches.append(len(funcs))
+            results = []
+            for func in funcs:
+                try:
+                    results.append((True, func()))
+                except Exception as exc:
+                    results.append((False, exc))
+            return results
+
+        committer = GroupCommitter(run_batch)
+        results = {}
+
+        def client(n):
+            try:
+                results[n] = committer.submit(lambda: 1 / n)
+            except ZeroDivisionError as exc:
+                results[n] = exc
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(6)]
+        for thread in threads:
+            thread.start()
+            # первая операция занимает писателя, остальные копятся в очереди
+            time.sleep(0.02)
+        release.set()
+        for thread in threads:
+            thread.join()
+        committer.stop()
+        self.assertEqual(sum(batches), 6)
+        self.assertLess(len(batches), 6)
+        self.assertIsInstance(results[0], ZeroDivisionError)
+        self.assertEqual(results[4], 0.25)
+
+    def test_django_batch_isolates_failed_operation(self):
+        from api.group_commit import run_django_batch
+        customer = User.objects.create(username='cust', role='customer')
+        cook = User.objects.create(username='cook', role='cook')
+        dish = Dish.objects.create(name='Суп', price=5, cook=cook)
+        results = run_django_batch([
+            lambda: CartItem.objects.create(customer=customer, dish=dish).id,
+            lambda: CartItem.objects.create(customer=customer, dish=dish),  # нарушает unique_together
+            lambda: customer.favorite_dishes.add(dish),
+        ])
+        self.assertEqual([ok for ok, _ in results], [True, False, True])
+        self.assertEqual(CartItem.objects.count(), 1)
+        self.assertEqual(customer.favorite_dishes.count(), 1)
+
+    def test_cart_increment_is_atomic_in_database(self):
+        customer = User.objects.create(username='cust', role='customer')
+        dish = Dish.objects.create(name='Суп', price=5, cook=User.objects.create(username='cook', role='cook'))
+        self.client.force_authenticate(customer)
+        for quantity in (1, 2):
+            resp = self.client.post(reverse('cartitem-list'), {'dish_id': dish.id, 'quantity': quantity}, format='json')
+        self.assertEqual(resp.data['quantity'], 3)
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_sqlite_writes', threads=2, ops=5, stdout=out)
+        self.assertEqual([line.split(':')[0].strip() for line in out.getvalue().splitlines()], ['stock', 'tuned', 'group'])
+
+
+class ReportTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.other_cook = User.objects.create(username='other', role='cook', address='Addr')
+        self.soup = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+        self.porridge = Dish.objects.create(name='Каша', price=3, cook=self.cook)
+        self.pilaf = Dish.objects.create(name='Плов', price=7, cook=self.other_cook)
+        self.today = timezone.localdate()
+
+    def make_order(self, cook, items, status='completed'):
+        order = Order.objects.create(customer=self.customer, cook=cook)
+        for dish, quantity in items:
+            OrderItem.objects.create(order=order, dish=dish, quantity=quantity)
+        order.status = status
+        order.save()
+        return order
+
+    def cook_rows(self):
+        from api.models import CookDailyStats
+        return list(CookDailyStats.objects.order_by('cook_id').values_list('cook_id', 'orders', 'items', 'revenue'))
+
+    def dish_rows(self):
+        from api.models import DishDailyStats
+        return list(DishDailyStats.objects.order_by('dish_id').values_list('dish_id', 'orders', 'quantity', 'revenue'))
+
+    def test_completion_updates_rollups(self):
+        order = self.make_order(self.cook, [(self.soup, 2), (self.porridge, 1)])
+        self.make_order(self.cook, [(self.soup, 1)], status='accepted')
+        self.assertIsNotNone(order.completed_at)
+        self.assertEqual(self.cook_rows(), [(self.cook.id, 1, 3, 13)])
+        self.assertEqual(self.dish_rows(), [(self.soup.id, 1, 2, 10), (self.porridge.id, 1, 1, 3)])
+        # повторное сохранение завершённого заказа не учитывается дважды
+        order.save()
+        self.assertEqual(self.cook_rows(), [(self.cook.id, 1, 3, 13)])
+
+    def test_leaving_completed_and_delete_subtract(self):
+        first = self.make_order(self.cook, [(self.soup, 2)])
+        second = self.make_order(self.cook, [(self.soup, 1)])
+        first.status = 'cancelled'
+        first.save()
+        self.assertEqual(self.dish_rows(), [(self.soup.id, 1, 1, 5)])
+        Order.objects.get(pk=second.pk).delete()
+        self.assertEqual(self.cook_rows(), [(self.cook.id, 0, 0, 0)])
+
+    def test_uncompleting_subtracts_amounts_at_completion(self):
+        order = self.make_order(self.cook, [(self.soup, 2), (self.porridge, 1)])
+        self.soup.price = 9
+        self.soup.save()
+        item = order.orderitem_set.get(dish=self.porridge)
+        item.quantity = 4
+        item.save()
+        order.status = 'in_progress'
+        order.save()
+        self.assertEqual(self.cook_rows(), [(self.cook.id, 0, 0, 0)])
+        self.assertEqual(self.dish_rows(), [(self.soup.id, 0, 0, 0), (self.porridge.id, 0, 0, 0)])
+        # повторное завершение — по новым цене и количеству
+        order.status = 'completed'
+        order.save()
+        self.assertEqual(self.cook_rows(), [(self.cook.id, 1, 6, 30)])
+
+    def test_rebuild_matches_incremental(self):
+        self.make_order(self.cook, [(self.soup, 2), (self.porridge, 3)])
+        self.make_order(self.cook, [(self.soup, 1)])
+        self.make_order(self.other_cook, [(self.pilaf, 4)])
+        cook_rows, dish_rows = self.cook_rows(), self.dish_rows()
+        out = StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertEqual(self.cook_rows(), cook_rows)
+        self.assertEqual(self.dish_rows(), dish_rows)
+
+    def test_cook_sees_only_own_reports(self):
+        self.make_order(self.cook, [(self.soup, 2)])
+        self.make_order(self.cook, [(self.porridge, 5)])
+        self.make_order(self.other_cook, [(self.pilaf, 1)])
+        self.client.force_authenticate(self.cook)
+        resp = self.client.get(reverse('report-cook-daily'), {'cook_id': self.other_cook.id})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['cook_id'], row['day'], row['orders'], row['revenue']) for row in resp.data],
+            [(self.cook.id, str(self.today), 2, '25.00')],
+        )
+        resp = self.client.get(reverse('report-top-dishes'), {'order_by': 'revenue'})
+        self.assertEqual([row['dish_name'] for row in resp.data], ['Каша', 'Суп'])
+        resp = self.client.get(reverse('report-top-dishes'), {'order_by': 'quantity', 'limit': 1})
+        self.assertEqual([(row['dish_name'], row['quantity']) for row in resp.data], [('Каша', 5)])
+
+    def test_admin_filters_by_cook(self):
+        self.make_order(self.cook, [(self.soup, 2)])
+        self.make_order(self.other_cook, [(self.pilaf, 1)])
+        self.client.force_authenticate(self.admin)
+        resp = self.client.get(reverse('report-cook-daily'))
+        self.assertEqual(len(resp.data), 2)
+        resp = self.client.get(reverse('report-top-dishes'), {'cook_id': self.other_cook.id})
+        self.assertEqual([row['dish_name'] for row in resp.data], ['Плов'])
+
+    def test_customers_forbidden_and_params_validated(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get(reverse('report-cook-daily')).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.cook)
+        resp = self.client.get(reverse('report-top-dishes'), {'order_by': 'price'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CookDashboardTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.other_cook = User.objects.create(username='other', role='cook', address='Addr')
+        self.soup = Dish.objects.create(name='Суп', price=5, cook=self.cook)
+        self.pilaf = Dish.objects.create(name='Плов', price=7, cook=self.other_cook)
+        self.url = reverse('cook-dashboard')
+
+    def create_order(self, dish, quantity=1, ready_time=None):
+        self.client.force_authenticate(self.customer)
+        resp = self.client.post(reverse('order-list'), {
+            'cook_id': dish.cook_id,
+            'order_items': [{'dish_id': dish.id, 'quantity': quantity}],
+            'desired_ready_time': ready_time,
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        return resp.data['id']
+
+    def process(self, order_id, new_status):
+        self.client.force_authenticate(self.cook)
+        resp = self.client.post(reverse('order-process', args=[order_id]), {'status': new_status}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+
+    def dashboard(self):
+        self.client.force_authenticate(self.cook)
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data
+
+    def counts(self):
+        data = self.dashboard()
+        return data['pending'], data['accepted'], data['in_progress']
+
+    def test_counters_follow_status_transitions(self):
+        first, second, third = (self.create_order(self.soup, 2) for _ in range(3))
+        self.create_order(self.pilaf)
+        self.assertEqual(self.counts(), (3, 0, 0))
+        self.process(first, 'accepted')
+        self.process(second, 'accepted')
+        self.process(second, 'in_progress')
+        self.process(third, 'cancelled')
+        self.assertEqual(self.counts(), (0, 1, 1))
+        self.process(second, 'completed')
+        data = self.dashboard()
+        self.assertEqual((data['pending'], data['accepted'], data['in_progress']), (0, 1, 0))
+        self.assertEqual((data['today_orders'], data['today_items'], data['today_revenue']), (1, 2, '10.00'))
+        Order.objects.get(pk=first).delete()
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_checkout_updates_counters(self):
+        porridge = Dish.objects.create(name='Каша', price=3, cook=self.cook)
+        for dish in (self.soup, porridge, self.pilaf):
+            CartItem.objects.create(customer=self.customer, dish=dish)
+        self.client.force_authenticate(self.customer)
+        resp = self.client.post(reverse('cartitem-checkout'), {}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.counts(), (1, 0, 0))
+        from api.models import CookOrderCounters
+        self.assertEqual(CookOrderCounters.objects.get(cook=self.other_cook).pending, 1)
+
+    def test_next_orders_by_ready_time(self):
+        noon = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        late = self.create_order(self.soup, ready_time=(noon + timedelta(hours=1)).isoformat())
+        no_time = self.create_order(self.soup)
+        early = self.create_order(self.soup, ready_time=noon.isoformat())
+        done = self.create_order(self.soup, ready_time=noon.isoformat())
+        self.process(done, 'completed')
+        self.assertEqual([order['id'] for order in self.dashboard()['next_orders']], [early, late, no_time])
+
+    def test_read_does_not_scan_orders(self):
+        for _ in range(5):
+            self.create_order(self.soup)
+        self.client.force_authenticate(self.cook)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        # счётчики + сводка за сегодня + ближайшие заказы
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_rebuild_matches_counters(self):
+        from api.models import CookOrderCounters
+        orders = [self.create_order(self.soup) for _ in range(3)]
+        self.process(orders[0], 'in_progress')
+        self.create_order(self.pilaf)
+        before = list(CookOrderCounters.objects.order_by('cook_id').values_list())
+        CookOrderCounters.objects.update(pending=100)
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(list(CookOrderCounters.objects.order_by('cook_id').values_list()), before)
+
+    def test_only_cooks(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class OrderExportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Адрес, 1')
+        self.other_cook = User.objects.create(username='other', role='cook', address='Addr')
+        self.soup = Dish.objects.create(name='Суп', price='5.50', cook=self.cook)
+        self.porridge = Dish.objects.create(name='Каша', price=3, cook=self.cook)
+        self.first = self.make_order(self.cook, [(self.soup, 2), (self.porridge, 1)], status='completed')
+        self.second = self.make_order(self.cook, [(self.porridge, 4)])
+        self.empty = self.make_order(self.other_cook, [])
+        self.url = reverse('order-export')
+        self.client.force_authenticate(self.admin)
+
+    def make_order(self, cook, items, status='pending'):
+        order = Order.objects.create(customer=self.customer, cook=cook, status=status)
+        for dish, quantity in items:
+            OrderItem.objects.create(order=order, dish=dish, quantity=quantity)
+        return order
+
+    def export(self, **params):
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp, b''.join(resp.streaming_content).decode('utf-8-sig')
+
+    def test_csv_row_per_item(self):
+        import csv
+        resp, body = self.export()
+        self.assertTrue(resp['Content-Type'].startswith('text/csv'))
+        self.assertIn('attachment;', resp['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual(
+            [(int(r['order_id']), r['dish'], r['quantity'], r['price'], r['line_total'], r['cook_address']) for r in rows],
+            [
+                (self.first.id, 'Суп', '2', '5.50', '11.00', 'Адрес, 1'),
+                (self.first.id, 'Каша', '1', '3.00', '3.00', 'Адрес, 1'),
+                (self.second.id, 'Каша', '4', '3.00', '12.00', 'Адрес, 1'),
+                (self.empty.id, '', '', '', '', 'Addr'),
+            ],
+        )
+        self.assertTrue(rows[0]['completed_at'])
+        self.assertEqual(rows[1]['completed_at'], rows[0]['completed_at'])
+        self.assertEqual(rows[2]['completed_at'], '')
+
+    def test_jsonl_order_per_line(self):
+        import json
+        resp, body = self.export(format='jsonl')
+        self.assertTrue(resp['Content-Type'].startswith('application/x-ndjson'))
+        orders = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([o['order_id'] for o in orders], [self.first.id, self.second.id, self.empty.id])
+        self.assertEqual(
+            [(i['dish'], i['quantity'], i['price'], i['line_total']) for i in orders[0]['items']],
+            [('Суп', 2, '5.50', '11.00'), ('Каша', 1, '3.00', '3.00')],
+        )
+        self.assertEqual(orders[2]['items'], [])
+        self.assertEqual(orders[0]['cook'], 'cook')
+
+    def test_filters(self):
+        import json
+        _, body = self.export(format='jsonl', status='pending,accepted', cook_id=self.cook.id)
+        self.assertEqual([json.loads(line)['order_id'] for line in body.splitlines()], [self.second.id])
+        Order.objects.filter(pk=self.first.pk).update(created_at=timezone.now() - timedelta(days=3))
+        today = timezone.localdate()
+        _, body = self.export(format='jsonl', date_from=today - timedelta(days=4), date_to=today - timedelta(days=2))
+        self.assertEqual([json.loads(line)['order_id'] for line in body.splitlines()], [self.first.id])
+
+    def test_header_sent_before_query_and_chunked(self):
+        with override_settings(ORDER_EXPORT_CHUNK_SIZE=1):
+            resp = self.client.get(self.url)
+            chunks = iter(resp.streaming_content)
+            with CaptureQueriesContext(connection) as ctx:
+                header = next(chunks)
+            self.assertEqual(len(ctx.captured_queries), 0)
+            self.assertTrue(header.decode('utf-8-sig').startswith('order_id,'))
+            with CaptureQueriesContext(connection) as ctx:
+                rest = list(chunks)
+            # одна строка — одна пачка, но запрос к базе один
+            self.assertEqual(len(ctx.captured_queries), 1)
+            self.assertEqual(len([chunk for chunk in rest if chunk]), 4)
+
+    def test_admin_only_and_validation(self):
+        self.client.force_authenticate(self.cook)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.admin)
+        resp = self.client.get(self.url, {'status': 'lost'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Неизвестный статус: lost', resp.content.decode())
+        resp = self.client.get(self.url, {'format': 'jsonl', 'date_from': '2030-01-02', 'date_to': '2030-01-01'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(MENU_CACHE_ENABLED=False)
+class FastReadSerializerTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Адрес "кухни"')
+        self.plain = Dish.objects.create(name='Суп', description='', price='5.50', cook=self.cook)
+        self.pictured = Dish.objects.create(name='Каша', description='Гречневая', price=3, cook=self.cook)
+        # картинка и варианты — без файлов и без сигнала, который пересобрал бы варианты
+        Dish.objects.filter(pk=self.pictured.pk).update(
+            image='dishes/ab/cd/abcd.jpg',
+            image_variants={
+                'source': 'dishes/ab/cd/abcd.jpg',
+                'sizes': {'thumb': {'width': 64, 'height': 48, 'jpeg': 'variants/t.jpg', 'webp': 'variants/t.webp'}},
+            },
+            image_placeholder='data:image/jpeg;base64,AAAA',
+        )
+        self.order = Order.objects.create(
+            customer=self.customer, cook=self.cook, desired_ready_time=timezone.now() + timedelta(hours=1),
+        )
+        OrderItem.objects.create(order=self.order, dish=self.plain, quantity=2)
+        OrderItem.objects.create(order=self.order, dish=self.pictured, quantity=1, status='in_progress')
+        Order.objects.create(customer=self.customer, cook=self.cook, status='rejected', rejection_reason='Нет продуктов')
+        for dish in (self.plain, self.pictured):
+            CartItem.objects.create(customer=self.customer, dish=dish, quantity=3)
+
+    def compare(self, user, url, params=None):
+        self.client.force_authenticate(user)
+        with override_settings(FAST_READ_SERIALIZERS=False):
+            expected = self.client.get(url, params)
+        with CaptureQueriesContext(connection) as ctx:
+            actual = self.client.get(url, params)
+        self.assertEqual(actual.status_code, status.HTTP_200_OK)
+        self.assertEqual(actual.content, expected.content)
+        return actual, len(ctx.captured_queries)
+
+    def test_serializer_parity(self):
+        from rest_framework.renderers import JSONRenderer
+        from api.read_serializers import CartItemReadSerializer, DishReadSerializer, OrderReadSerializer
+        from api.views import OrderViewSet
+        request = APIClient().get('/').wsgi_request
+        cases = [
+            (Dish.objects.select_related('cook').order_by('id'), DishSerializer, DishReadSerializer),
+            (OrderViewSet.queryset.order_by('id'), OrderSerializer, OrderReadSerializer),
+            (CartItem.objects.select_related('dish__cook').order_by('id'), CartItemSerializer, CartItemReadSerializer),
+        ]
+        for queryset, serializer_class, reader_class in cases:
+            for context_request in (request, None):
+                expected = serializer_class(queryset, many=True, context={'request': context_request}).data
+                reader = reader_class(context_request)
+                actual = reader.to_representation(reader.rows(queryset))
+                self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_dish_list_parity(self):
+        self.compare(self.customer, reverse('dish-list'))
+        self.compare(self.customer, reverse('dish-list'), {'cook_id': self.cook.id})
+        self.compare(self.customer, reverse('dish-list'), {'search': 'гречневая'})
+        resp, _ = self.compare(self.customer, reverse('dish-list'), {'page_size': 1})
+        self.compare(self.customer, resp.data['next'])
+
+    def test_order_and_cart_list_parity(self):
+        _, queries = self.compare(self.cook, reverse('order-list'))
+        # маркеры версий + COUNT + заказы + позиции — как с prefetch_related
+        self.assertEqual(queries, 4)
+        self.compare(self.customer, reverse('cartitem-list'))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_serializers', rows='5', stdout=out)
+        self.assertEqual([line.split('×')[0].strip() for line in out.getvalue().splitlines()], ['dishes', 'orders', 'cart'])
+        self.assertEqual(Dish.objects.count(), 2)
+
+
+class RendererTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.customer = User.objects.create(username='cust', role='customer')
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        Dish.objects.create(name='Суп', price='5.50', cook=self.cook)
+
+    def test_fast_json_matches_drf(self):
+        import uuid
+        from decimal import Decimal
+        from datetime import date, time as dt_time, timezone as dt_timezone
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.utils.serializer_helpers import ReturnDict
+        from api.renderers import FastJSONRenderer
+        moscow = dt_timezone(timedelta(hours=3))
+        payload = ReturnDict({
+            'price': Decimal('5.50'),
+            'utc': datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+            'local': datetime(2026, 1, 2, 3, 4, 5, tzinfo=moscow),
+            'naive': datetime(2026, 1, 2, 3, 4, 5),
+            'day': date(2026, 1, 2),
+            'at': dt_time(12, 30),
+            'duration': timedelta(minutes=90),
+            'id': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Ленивая строка'),
+            'separators': 'a b c',
+            'tuple': (1, 'два', None, True, 1.5),
+            'ints': {1: 'one'},
+            'queryset': Dish.objects.values_list('name', flat=True),
+            'huge': 2 ** 70,
+        }, serializer=None)
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        indented = 'application/json; indent=2'
+        self.assertEqual(
+            FastJSONRenderer().render(payload, indented),
+            JSONRenderer().render(payload, indented),
+        )
+
+    def test_api_responses_use_fast_renderer(self):
+        from rest_framework.renderers import JSONRenderer
+        self.client.force_authenticate(self.customer)
+        resp = self.client.get(reverse('dish-list'))
+        self.assertEqual(resp['Content-Type'], 'application/json')
+        self.assertEqual(resp.content, JSONRenderer().render(resp.data))
+
+    def test_browsable_api_only_for_admin_or_debug(self):
+        for user, debug, expected in (
+            (self.customer, False, 'application/json'),
+            (self.admin, False, 'text/html; charset=utf-8'),
+            (self.customer, True, 'text/html; charset=utf-8'),
+        ):
+            self.client.force_authenticate(user)
+            with override_settings(DEBUG=debug):
+                resp = self.client.get(reverse('dish-list'), HTTP_ACCEPT='text/html,*/*;q=0.8')
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(resp['Content-Type'], expected)
+
+    def test_browser_with_bad_token_gets_json_401(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer bad:signature')
+        resp = self.client.get(reverse('dish-list'), HTTP_ACCEPT='text/html,*/*;q=0.8')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(resp['Content-Type'], 'application/json')
+
+    def test_messagepack(self):
+        from api.renderers import msgpack
+        if msgpack is None:
+            self.skipTest('msgpack не установлен')
+        self.client.force_authenticate(self.customer)
+        resp = self.client.get(reverse('dish-list'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(resp['Content-Type'], 'application/msgpack')
+        dishes = msgpack.unpackb(resp.content)
+        self.assertEqual([(d['name'], d['price']) for d in dishes], [('Суп', '5.50')])
+        self.assertTrue(dishes[0]['created_at'].endswith('Z'))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_renderers', rows='3', repeat=1, stdout=out)
+        self.assertEqual(
+            [line.split('×')[0].strip() for line in out.getvalue().splitlines()],
+            ['dishes', 'orders', 'cart', 'kitchen'],
+        )
+
+
+class CompressionTests(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.cook = User.objects.create(username='cook', role='cook', address='Addr')
+        self.customer = User.objects.create(username='cust', role='customer')
+        Dish.objects.bulk_create(
+            Dish(name=f'Блюдо {n}', description='Описание ' * 5, price='5.50', cook=self.cook)
+            for n in range(30)
+        )
+        self.client.force_authenticate(self.customer)
+
+    def test_gzip_above_threshold(self):
+        import gzip
+        plain = self.client.get(reverse('dish-list'))
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        resp = self.client.get(reverse('dish-list'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertLess(len(resp.content), len(plain.content))
+        self.assertEqual(gzip.decompress(resp.content), plain.content)
+        self.assertEqual(resp['ETag'], 'W/' + plain['ETag'])
+        # слабый ETag сжатого ответа подходит для If-None-Match
+        resp = self.client.get(reverse('dish-list'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_small_refused_and_non_get_responses_stay_plain(self):
+        dish = Dish.objects.first()
+        resp = self.client.get(reverse('dish-detail', args=[dish.id]), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', resp)
+        resp = self.client.get(reverse('dish-list'), HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', resp)
+        with override_settings(COMPRESSION_MIN_SIZE=0):
+            resp = self.client.post(
+                reverse('cartitem-list'), {'dish_id': dish.id, 'quantity': 1}, format='json',
+                HTTP_ACCEPT_ENCODING='gzip',
+            )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Content-Encoding', resp)
+
+    def test_streaming_export_not_compressed(self):
+        admin = User.objects.create(username='admin', role='admin')
+        self.client.force_authenticate(admin)
+        with override_settings(COMPRESSION_MIN_SIZE=0):
+            resp = self.client.get(reverse('order-export'), {'format': 'csv'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(resp.streaming)
+        self.assertNotIn('Content-Encoding', resp)
+
+    def test_cached_menu_reuses_compressed_body(self):
+        import gzip
+        from api import compression
+        url = reverse('dish-list')
+        params = {'cook_id': self.cook.id}
+        with mock.patch('api.compression.compress', wraps=compression.compress) as spy:
+            first = self.client.get(url, params, HTTP_ACCEPT_ENCODING='gzip')
+            other = User.objects.create(username='other', role='customer')
+            self.client.force_authenticate(other)
+            second = self.client.get(url, params, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(gzip.decompress(second.content), self.client.get(url, params).content)
+
+        # новое блюдо меняет маркер меню — сжатое тело строится заново
+        Dish.objects.create(name='Новое', price='1.00', cook=self.cook)
+        resp = self.client.get(url, params, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIn('Новое', gzip.decompress(resp.content).decode())
+
+    def test_browsable_menu_not_shared_between_users(self):
+        import gzip
+        url = reverse('dish-list')
+        params = {'cook_id': self.cook.id}
+        with mock.patch('api.compression._cached_compress') as cached:
+            for username in ('admin1', 'admin2'):
+                self.client.force_authenticate(User.objects.create(username=username, role='admin'))
+                resp = self.client.get(url, params, HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(resp['Content-Encoding'], 'gzip')
+                # HTML браузерного API — своё у каждого админа, мимо кэша сжатых тел
+                self.assertIn(username, gzip.decompress(resp.content).decode())
+        cached.assert_not_called()
+
+    def test_conditional_list_compressed_from_fresh_body(self):
+        import gzip
+        cook = User.objects.create(username='cook2', role='cook', address='Addr')
+        Order.objects.bulk_create(Order(customer=self.customer, cook=cook) for _ in range(20))
+        url = reverse('order-list')
+        self.assertIn('"cust"', gzip.decompress(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip').content).decode())
+        # правка в обход сигналов: маркеры не меняются, тело той же длины
+        User.objects.filter(pk=self.customer.pk).update(username='CUST')
+        body = gzip.decompress(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip').content).decode()
+        self.assertIn('"CUST"', body)
+        self.assertNotIn('"cust"', body)
+
+    def test_accepted_encodings(self):
+        from api.compression import accepted_encodings
+        self.assertEqual(accepted_encodings('gzip, br;q=0.5'), {'gzip', 'br'})
+        self.assertEqual(accepted_encodings('*;q=1, br;q=0'), {'*', 'gzip'})
+        self.assertEqual(accepted_encodings(''), set())
+
+
+class EndpointBenchmarkTests(APITestCase):
+    def run_bench(self, baseline, *args):
+        out = StringIO()
+        call_command(
+            'bench_endpoints', '--cooks=2', '--customers=3', '--dishes-per-cook=3', '--orders=10',
+            '--requests=2', '--warmup=0', '--only=dish-list,order-list[cook]', f'--baseline={baseline}',
+            *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def test_seeding_is_deterministic(self):
+        from django.db import transaction
+        from api.seeding import populate
+        from api.synthetic import Volumes
+
+        def snapshot(prefix):
+            with transaction.atomic():
+                data = populate(Volumes(cooks=2, customers=3, dishes_per_cook=2, orders=5), seed=7, prefix=prefix)
+                rows = (
+                    [str(price) for price in Dish.objects.filter(id__in=data.dish_ids).values_list('price', flat=True)],
+                    list(Order.objects.filter(id__in=data.order_ids).order_by('id').values_list('status', flat=True)),
+                    OrderItem.objects.filter(order_id__in=data.order_ids).count(),
+                )
+                transaction.set_rollback(True)
+            return rows
+
+        self.assertEqual(snapshot('a-'), snapshot('b-'))
+
+    def test_baseline_saved_and_compared(self):
+        import json
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = f'{tmp}/baseline.json'
+            self.run_bench(baseline, '--save')
+            with open(baseline) as fh:
+                report = json.load(fh)
+            self.assertEqual(set(report['routes']), {'dish-list', 'order-list[cook]'})
+            row = report['routes']['dish-list']
+            self.assertEqual(row['status'], 200)
+            self.assertGreater(row['bytes'], 0)
+            self.assertLessEqual(row['p50_ms'], row['p95_ms'])
+            self.assertLessEqual(row['p95_ms'], row['p99_ms'])
+            # данные откатились
+            self.assertFalse(Dish.objects.exists())
+
+            # в базе было меньше запросов — это регрессия
+            report['routes']['dish-list']['queries'] = 0
+            with open(baseline, 'w') as fh:
+                json.dump(report, fh)
+            with self.assertRaises(CommandError):
+                self.run_bench(baseline)
+
+    def test_every_route_has_a_scenario(self):
+        from api.management.commands.bench_endpoints import Command, route_names
+        self.assertIn('cook-dashboard', route_names())
+        with mock.patch.object(Command, 'cases', return_value=iter([])):
+            with self.assertRaisesRegex(CommandError, 'kitchen-queue'):
+                self.run_bench('/nonexistent/baseline.json')
+
+
+class SeedScaleTests(APITestCase):
+    NOW = '2026-03-01T12:00:00+00:00'
+
+    def seed(self, prefix, **options):
+        options = {
+            'cooks': 3, 'customers': 5, 'dishes_per_cook': 4, 'orders': 40, 'chunk_size': 7,
+            'now': self.NOW, 'workers': 1, **options,
+        }
+        call_command('seed_scale', prefix=prefix, stdout=StringIO(), **options)
+
+    def snapshot(self, prefix):
+        users = User.objects.filter(username__startswith=prefix)
+        return (
+            list(users.order_by('id').values_list('first_name', 'last_name', 'phone_number', 'address', 'role')),
+            list(Dish.objects.filter(cook__in=users).order_by('id').values_list('name', 'price', 'created_at')),
+            [
+                (customer.removeprefix(prefix), cook.removeprefix(prefix), *rest)
+                for customer, cook, *rest in Order.objects.filter(cook__in=users).order_by('id').values_list(
+                    'customer__username', 'cook__username', 'status', 'created_at', 'completed_at',
+                )
+            ],
+            list(OrderItem.objects.filter(order__cook__in=users).order_by('order_id', 'id').values_list(
+                'dish__name', 'quantity', 'status',
+            )),
+            list(CartItem.objects.filter(customer__in=users).order_by('id').values_list('dish__name', 'quantity')),
+            User.favorite_dishes.through.objects.filter(user__in=users).count(),
+        )
+
+    def test_generates_consistent_data(self):
+        from django.db.models import Count
+        from django.utils.dateparse import parse_datetime
+        from api.models import CookDailyStats, CookOrderCounters
+        self.seed('s-', admins=2)
+        users = User.objects.filter(username__startswith='s-')
+        self.assertEqual(
+            dict(users.values_list('role').annotate(n=Count('id'))),
+            {'admin': 2, 'cook': 3, 'customer': 5},
+        )
+        self.assertTrue(users.get(username='s-admin0').check_password('seed-password'))
+        self.assertEqual(Dish.objects.count(), 12)
+        self.assertEqual(Order.objects.count(), 40)
+        now = parse_datetime(self.NOW)
+        for order in Order.objects.prefetch_related('orderitem_set__dish'):
+            self.assertLessEqual(order.created_at, now)
+            self.assertEqual(order.completed_at is not None, order.status == 'completed')
+            self.assertTrue(order.orderitem_set.all())
+            # позиции — из меню повара заказа
+            self.assertEqual({item.dish.cook_id for item in order.orderitem_set.all()}, {order.cook_id})
+        self.assertEqual(len(set(Order.objects.values_list('change_seq', flat=True))), 40)
+        # сводки и счётчики пересобраны
+        completed = Order.objects.filter(status='completed').count()
+        self.assertEqual(sum(CookDailyStats.objects.values_list('orders', flat=True)), completed)
+        self.assertEqual(
+            sum(sum(row) for row in CookOrderCounters.objects.values_list('pending', 'accepted', 'in_progress')),
+            Order.objects.filter(status__in=['pending', 'accepted', 'in_progress']).count(),
+        )
+        # обычные вставки продолжают нумерацию после явных id
+        self.assertGreater(User.objects.create(username='after').id, users.order_by('-id').first().id)
+
+    def test_deterministic_across_workers(self):
+        self.seed('one-')
+        self.seed('two-', workers=2)
+        self.assertEqual(self.snapshot('one-'), self.snapshot('two-'))
+        self.seed('other-', seed=1)
+        self.assertNotEqual(self.snapshot('one-'), self.snapshot('other-'))
+
+    def test_rejects_existing_prefix(self):
+        self.seed('dup-')
+        with self.assertRaisesRegex(CommandError, 'префиксом'):
+            self.seed('dup-')